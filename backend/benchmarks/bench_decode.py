@@ -0,0 +1,79 @@
+"""
+Wall time and peak memory of getting Whisper-ready audio out of a media file:
+    mp3   - old path: ffmpeg re-encode to a 192 kbps MP3 temp file, then
+            faster-whisper decodes that MP3 again (PyAV)
+    pipe  - ffmpeg decodes straight to 16 kHz mono float32 PCM over a pipe
+Each case runs in a fresh process; peak RSS covers the process and ffmpeg.
+
+Usage (from backend/):
+    python benchmarks/bench_decode.py --media lecture.mp4
+    python benchmarks/bench_decode.py --synthetic_minutes 60
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def make_synthetic_video(minutes: int) -> str:
+    path = os.path.join(tempfile.gettempdir(), f"bench_decode_{minutes}m.mp4")
+    if not os.path.exists(path):
+        subprocess.run([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={minutes * 60}",
+            "-f", "lavfi", "-i", f"testsrc=size=160x120:rate=5:duration={minutes * 60}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path,
+        ], check=True)
+    return path
+
+
+def run_case(mode: str, media: str, speed: float) -> None:
+    from services.media_summariser.process_media import convert_video_to_audio, decode_audio
+
+    start = time.perf_counter()
+    if mode == "mp3":
+        from faster_whisper.audio import decode_audio as whisper_decode
+
+        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
+            mp3_path = tmp.name
+        if not convert_video_to_audio(media, mp3_path, speed=speed):
+            raise SystemExit("ffmpeg conversion failed")
+        audio = whisper_decode(mp3_path, sampling_rate=16000)
+        os.remove(mp3_path)
+    else:
+        audio = decode_audio(media, speed=speed)
+    elapsed = time.perf_counter() - start
+
+    self_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"{mode:<6}{elapsed:>9.2f}{len(audio) / 16000:>11.1f}{self_mb:>13.0f}{child_mb:>15.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Media decode benchmark: MP3 round trip vs PCM pipe.")
+    parser.add_argument("--media", default=None)
+    parser.add_argument("--synthetic_minutes", type=int, default=30)
+    parser.add_argument("--speed", type=float, default=2.0)
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case, args.media, args.speed)
+        return
+
+    media = args.media or make_synthetic_video(args.synthetic_minutes)
+    print(f"media: {media} ({os.path.getsize(media) / 1e6:.1f} MB), speed {args.speed}\n")
+    print(f"{'path':<6}{'wall s':>9}{'audio s':>11}{'peak RSS MB':>13}{'ffmpeg RSS MB':>15}")
+    for mode in ("mp3", "pipe"):
+        subprocess.run([sys.executable, __file__, "--case", mode, "--media", media,
+                        "--speed", str(args.speed)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+p50/p99 of LLM calls against a stub with heavy-tailed latency, with and
+without per-call deadlines and hedged requests.
+
+Usage (from backend/):
+    python benchmarks/bench_llm_hedging.py --calls 2000 --concurrency 20
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import llm_resilience  # noqa: E402
+from services.llm_resilience import AsyncRateLimiter, LatencyTracker, resilient_call  # noqa: E402
+
+
+def stub_latency(base: float, tail_prob: float, alpha: float) -> float:
+    """Mostly `base`-ish latencies with a Pareto tail on `tail_prob` of calls."""
+    latency = random.lognormvariate(0, 0.25) * base
+    if random.random() < tail_prob:
+        latency *= random.paretovariate(alpha) * 10
+    return latency
+
+
+async def stub_llm(args) -> str:
+    await asyncio.sleep(stub_latency(args.base, args.tail_prob, args.alpha))
+    return "ok"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def run(mode: str, args) -> dict:
+    tracker = LatencyTracker()
+    limiter = AsyncRateLimiter(args.calls_per_minute)
+    # prime the tracker so the hedge delay is known from the first call
+    for _ in range(200):
+        tracker.record("stub", stub_latency(args.base, args.tail_prob, args.alpha))
+
+    for key in llm_resilience.hedge_stats:
+        llm_resilience.hedge_stats[key] = 0
+
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with sem:
+            start = time.perf_counter()
+            try:
+                if mode == "baseline":
+                    await stub_llm(args)
+                else:
+                    await resilient_call(
+                        lambda: stub_llm(args),
+                        key="stub",
+                        timeout=args.timeout if mode == "deadline+retry" else 3600,
+                        retries=args.retries if mode == "deadline+retry" else 0,
+                        hedge=(mode == "hedged"),
+                        limiter=limiter,
+                        tracker=tracker,
+                    )
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(args.calls)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "failures": failures,
+        "extra_calls": llm_resilience.hedge_stats["hedged"] + llm_resilience.hedge_stats["retries"],
+        "wall_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedged request benchmark against a heavy-tailed stub LLM.")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--base", type=float, default=0.02, help="Typical stub latency in seconds.")
+    parser.add_argument("--tail_prob", type=float, default=0.03, help="Share of calls that land in the tail.")
+    parser.add_argument("--alpha", type=float, default=1.3, help="Pareto shape of the tail.")
+    parser.add_argument("--timeout", type=float, default=0.15, help="Per-call deadline for deadline+retry.")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--calls_per_minute", type=int, default=0)
+    args = parser.parse_args()
+
+    llm_resilience.LLM_RETRY_BASE_DELAY = args.base / 4
+    random.seed(7)
+    print(f"{'mode':<16}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'extra':>8}{'failed':>8}{'wall s':>9}")
+    for mode in ("baseline", "deadline+retry", "hedged"):
+        r = asyncio.run(run(mode, args))
+        print(f"{r['mode']:<16}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}"
+              f"{r['extra_calls']:>8}{r['failures']:>8}{r['wall_s']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
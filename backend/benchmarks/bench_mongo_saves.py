@@ -0,0 +1,120 @@
+"""
+Throughput of 200 concurrent note saves from async handlers:
+    sync on loop   - the old create_note: blocking insert_one then find_one
+                     to read the note back, called straight from the handler
+    sync to_thread - the same calls pushed to the default thread pool
+    async pool N   - database.crud.create_note on the async client with a
+                     pool of N connections, no read-back
+There is no mongod here, so MongoDB is the in-memory stand-in with
+`latency` ms per round trip: time.sleep for the blocking client, an
+asyncio.sleep while holding one of the pool's connections for the async
+one (database/memory_backend.AsyncInMemoryClient).
+
+Usage (from backend/):
+    python benchmarks/bench_mongo_saves.py --saves 200 --latency 20 --pools 10,50,100
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("INFERENCE_POOL", "0")
+os.environ.setdefault("SMARTNOTES_DATA_DIR", tempfile.mkdtemp(prefix="bench_mongo_saves_"))
+
+WORDS = ("a hash table maps keys to buckets so lookups take constant time on average "
+         "until collisions pile up and the table has to grow").split()
+
+
+def make_note(rng, i: int):
+    from database.historySchema import NoteModel
+    say = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))
+    return NoteModel(
+        user_id="bench", title=f"Video {i}", type="youtube", summary=say(300), source=f"https://youtu.be/{i:011d}",
+        transcript=[{"time": f"{m}:00", "text": say(40)} for m in range(20)],
+        embeddings=[{"text": say(120), "embedding": [rng.random() for _ in range(384)]} for _ in range(8)],
+    )
+
+
+class BlockingCollection:
+    """The old pymongo collection: every call blocks the calling thread for one round trip."""
+
+    def __init__(self, collection, latency: float):
+        self.collection = collection
+        self.latency = latency
+
+    def insert_one(self, doc):
+        time.sleep(self.latency)
+        return self.collection.insert_one(doc)
+
+    def find_one(self, query):
+        time.sleep(self.latency)
+        return self.collection.find_one(query)
+
+
+def old_create_note(collection: BlockingCollection, note) -> dict:
+    from database.crud import note_helper
+    note_dict = note.dict()
+    note_dict["created_at"] = datetime.utcnow()
+    result = collection.insert_one(note_dict)
+    return note_helper(collection.find_one({"_id": result.inserted_id}))
+
+
+async def run_mode(label: str, save, notes) -> tuple:
+    start = time.perf_counter()
+    saved = await asyncio.gather(*(save(note) for note in notes))
+    wall = time.perf_counter() - start
+    assert len(saved) == len(notes) and all(s["id"] for s in saved)
+    return label, wall, len(notes) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent note saves: blocking vs async MongoDB client.")
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=20, help="Round trip to MongoDB in ms.")
+    parser.add_argument("--pools", default="10,50,100", help="Async pool sizes to try.")
+    args = parser.parse_args()
+
+    os.environ["MONGO_MEMORY_LATENCY_MS"] = str(args.latency)
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=False, embeddings=True)
+    from database.config import get_client
+    from database.crud import create_note, notes_collection
+
+    rng = random.Random(11)
+    notes = [make_note(rng, i) for i in range(args.saves)]
+    blocking = BlockingCollection(stand_ins.InMemoryClient().notesDB.notes, args.latency / 1000)
+
+    async def on_loop(note):
+        return old_create_note(blocking, note)
+
+    async def to_thread(note):
+        return await asyncio.to_thread(old_create_note, blocking, note)
+
+    async def bench():
+        results = [await run_mode("sync on loop", on_loop, notes),
+                   await run_mode("sync to_thread", to_thread, notes)]
+        for size in (int(p) for p in args.pools.split(",")):
+            client = get_client()
+            client._max_pool_size, client._pools = size, {}
+            results.append(await run_mode(f"async pool {size}", create_note, notes))
+        return results
+
+    results = asyncio.run(bench())
+    stored = len(list(notes_collection._sync.find({"user_id": "bench"}, {"_id": 1})))
+    assert stored == args.saves * (len(results) - 2), stored
+
+    print(f"\n{args.saves} concurrent saves, {args.latency:g} ms per MongoDB round trip\n")
+    print(f"{'mode':<18}{'wall s':>8}{'saves/s':>10}")
+    for label, wall, rate in results:
+        print(f"{label:<18}{wall:>8.2f}{rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+zstd compression of the large note fields (database/field_codec):
+    fields - ratio and encode/decode MB/s per kind of field, plain zstd vs
+             a dictionary trained on other notes (what
+             database/train_zstd_dictionary does)
+    notes  - notes saved through crud.create_note with compression off and
+             on: bytes stored (note documents + GridFS), and GET /notes/{id}
+             latency; the listing decodes nothing
+The text is English prose from the standard library's docstrings, cut into
+Whisper-style segments, YouTube caption lines and PDF pages, so it
+compresses like real lecture text rather than a small repeated vocabulary.
+MongoDB is the in-memory backend.
+
+Usage (from backend/):
+    python benchmarks/bench_note_compression.py --notes 60
+"""
+import os
+import re
+import sys
+import time
+import random
+import inspect
+import argparse
+import tempfile
+import importlib
+from datetime import datetime
+
+import bson
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("INFERENCE_POOL", "0")
+os.environ.setdefault("SMARTNOTES_DATA_DIR", tempfile.mkdtemp(prefix="bench_note_compression_"))
+
+# the dictionary is trained on text from one set of modules and measured on
+# another, so it can't simply memorise the passages it is tested on
+TRAIN_MODULES = ("argparse", "asyncio", "calendar", "collections", "configparser", "csv", "datetime", "decimal",
+                 "difflib", "email", "fractions", "functools", "heapq", "itertools", "json", "logging", "optparse",
+                 "os", "pathlib", "pickle", "shutil", "socket", "sqlite3", "tarfile", "tempfile", "textwrap")
+TEST_MODULES = ("ast", "concurrent.futures", "dataclasses", "enum", "ftplib", "http.client", "imaplib", "inspect",
+                "io", "mailbox", "multiprocessing", "pdb", "random", "re", "smtplib", "ssl", "statistics", "string",
+                "subprocess", "threading", "typing", "unittest", "urllib.request", "xml.dom.minidom",
+                "xml.etree.ElementTree", "zipfile")
+
+
+def corpus_words(modules):
+    docs = []
+    for name in modules:
+        module = importlib.import_module(name)
+        members = [obj for _, obj in inspect.getmembers(module)]
+        members += [m for cls in members if inspect.isclass(cls) for _, m in inspect.getmembers(cls)]
+        for obj in members:
+            doc = inspect.getdoc(obj)
+            if doc and len(doc) > 200:
+                docs.append(doc)
+    return re.sub(r"\s+", " ", " ".join(dict.fromkeys(docs))).split(" ")
+
+
+def passage(rng, words, n, run=200):
+    """n words as runs of consecutive corpus words from random places."""
+    out = []
+    while len(out) < n:
+        start = rng.randrange(len(words) - run)
+        out.extend(words[start:start + run])
+    return out[:n]
+
+
+def media_transcript(rng, words, minutes):
+    """Whisper segments of a recording, stored in the timed form."""
+    from utils.timed_transcript import compact_transcript
+    text, t, segments = passage(rng, words, int(minutes * 150)), 0.0, []
+    while text:
+        duration = rng.uniform(2.0, 6.0)
+        n = max(1, int(duration * 2.5))
+        segments.append({"time": f"{t:.2f}s -> {t + duration:.2f}s", "text": " ".join(text[:n])})
+        text, t = text[n:], t + duration + rng.uniform(0.0, 0.5)
+    return compact_transcript(segments)
+
+
+def youtube_transcript(rng, words, minutes):
+    """Caption lines merged into ~30 s chunks, as /summarize-yt stores them."""
+    text, t, chunks = passage(rng, words, int(minutes * 150)), 0, []
+    while text:
+        chunks.append({"time": f"{t // 60}:{t % 60:02d}", "text": " ".join(text[:75])})
+        text, t = text[75:], t + 30
+    return {"transcript": chunks}
+
+
+def pdf_pages(rng, words, pages):
+    return {"pdf_content": [" ".join(passage(rng, words, 450)) for _ in range(pages)]}
+
+
+KINDS = {
+    "media 10 min": lambda rng, words: ("media", media_transcript(rng, words, 10)),
+    "media 1 h": lambda rng, words: ("media", media_transcript(rng, words, 60)),
+    "youtube 20 min": lambda rng, words: ("youtube", youtube_transcript(rng, words, 20)),
+    "pdf 5 pages": lambda rng, words: ("PDF", pdf_pages(rng, words, 5)),
+    "pdf 60 pages": lambda rng, words: ("PDF", pdf_pages(rng, words, 60)),
+}
+
+
+def field_bytes(fields):
+    from database.note_storage import encode_field
+    return [encode_field(value) for value in fields.values()]
+
+
+def ratio_and_speed(compressor, decompressor, payloads, repeat=5):
+    raw = sum(len(p) for p in payloads)
+    frames = [compressor.compress(p) for p in payloads]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for p in payloads:
+            compressor.compress(p)
+    encode_s = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for f in frames:
+            decompressor.decompress(f)
+    decode_s = (time.perf_counter() - start) / repeat
+    return raw / sum(len(f) for f in frames), raw / 1e6 / encode_s, raw / 1e6 / decode_s
+
+
+def stored_bytes(notes_collection, blob_bucket):
+    docs = sum(len(bson.encode(doc)) for doc in notes_collection._sync.find({}))
+    blobs = sum(f.length for f in blob_bucket._sync.find({}))
+    return docs, blobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="zstd compression of note transcripts and PDF text.")
+    parser.add_argument("--notes", type=int, default=60, help="Notes per kind saved in the end-to-end run.")
+    parser.add_argument("--train_notes", type=int, default=200, help="Notes per kind the dictionary is trained on.")
+    args = parser.parse_args()
+
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=True, embeddings=True)
+    import asyncio
+    import builtins
+    import zstandard as zstd
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from database import note_storage
+    from database.crud import create_note, notes_collection
+    from database.field_codec import NOTE_ZSTD_LEVEL, dictionaries_collection, field_codec, train_dictionary
+    from database.historySchema import NoteModel
+    from database.train_zstd_dictionary import split_samples
+
+    train_words, words = corpus_words(TRAIN_MODULES), corpus_words(TEST_MODULES)
+    rng = random.Random(17)
+    print(f"corpus: {len(train_words):,} words of docstrings to train on, {len(words):,} to test on")
+
+    train = [data for make in KINDS.values() for _ in range(args.train_notes)
+             for data in field_bytes(make(rng, train_words)[1])]
+    start = time.perf_counter()
+    dictionary_bytes = train_dictionary([s for data in train for s in split_samples(data)])
+    train_s = time.perf_counter() - start
+    dictionary = zstd.ZstdCompressionDict(dictionary_bytes)
+
+    print(f"dictionary: {len(dictionary_bytes) / 1024:.0f} KB trained on {len(train)} fields in {train_s:.1f}s\n")
+    print(f"{'field':<16}{'avg KB':>8}{'plain':>8}{'dict':>8}{'encode MB/s':>13}{'decode MB/s':>13}")
+    plain = (zstd.ZstdCompressor(level=NOTE_ZSTD_LEVEL), zstd.ZstdDecompressor())
+    with_dict = (zstd.ZstdCompressor(level=NOTE_ZSTD_LEVEL, dict_data=dictionary),
+                 zstd.ZstdDecompressor(dict_data=dictionary))
+    for label, make in KINDS.items():
+        payloads = [data for _ in range(20) for data in field_bytes(make(rng, words)[1])]
+        plain_ratio, _, _ = ratio_and_speed(*plain, payloads, repeat=1)
+        ratio, encode_mb_s, decode_mb_s = ratio_and_speed(*with_dict, payloads)
+        print(f"{label:<16}{sum(map(len, payloads)) / len(payloads) / 1024:>8.1f}{plain_ratio:>8.2f}"
+              f"{ratio:>8.2f}{encode_mb_s:>13.0f}{decode_mb_s:>13.0f}")
+
+    # stored the way train_zstd_dictionary does; the codec reads it on first use
+    dictionaries_collection._sync.insert_one({"_id": dictionary.dict_id(), "data": dictionary_bytes,
+                                              "created_at": datetime.utcnow()})
+    notes = [(kind, fields) for _ in range(args.notes) for kind, fields in (make(rng, words) for make in KINDS.values())]
+
+    async def save_all(owner):
+        for i, (kind, fields) in enumerate(notes):
+            await create_note(NoteModel(user_id=owner, title=f"{kind} {i}", type=kind, summary="summary",
+                                        source="bench", **fields))
+
+    results = {}
+    quiet = builtins.print
+    with TestClient(app_module.app) as client:
+        for label, enabled in (("uncompressed", False), ("zstd + dictionary", True)):
+            note_storage.NOTE_COMPRESSION = enabled
+            docs_before, blobs_before = stored_bytes(notes_collection, note_storage.blob_bucket)
+
+            builtins.print = lambda *a, **k: None
+            try:
+                start = time.perf_counter()
+                asyncio.run(save_all(label))
+                save_s = time.perf_counter() - start
+            finally:
+                builtins.print = quiet
+            docs, blobs = stored_bytes(notes_collection, note_storage.blob_bucket)
+            docs, blobs = docs - docs_before, blobs - blobs_before
+
+            decoded = field_codec.decoded
+            page = client.get("/notes/", params={"user_id": label, "limit": 100}).json()["notes"]
+            assert field_codec.decoded == decoded, "the listing decompressed a field"
+            ids = [n["id"] for n in page]
+            start = time.perf_counter()
+            for note_id in ids:
+                client.get(f"/notes/{note_id}", params={"user_id": label}).raise_for_status()
+            detail_ms = (time.perf_counter() - start) / len(ids) * 1e3
+            results[label] = (docs, blobs, save_s / len(notes) * 1e3, detail_ms)
+
+    print(f"\n{len(notes)} notes saved through create_note\n")
+    print(f"{'storage':<20}{'notes MB':>10}{'GridFS MB':>11}{'total MB':>10}{'save ms':>9}{'detail ms':>11}")
+    for label, (docs, blobs, save_ms, detail_ms) in results.items():
+        print(f"{label:<20}{docs / 1e6:>10.2f}{blobs / 1e6:>11.2f}{(docs + blobs) / 1e6:>10.2f}"
+              f"{save_ms:>9.2f}{detail_ms:>11.2f}")
+    (d0, b0, _, _), (d1, b1, _, _) = results.values()
+    stats = field_codec.stats()
+    print(f"\nstored {(d0 + b0) / (d1 + b1):.2f}x smaller; codec: ratio {stats['ratio']}, "
+          f"encode {stats['encode_mb_s']} MB/s, decode {stats['decode_mb_s']} MB/s")
+
+
+if __name__ == "__main__":
+    main()
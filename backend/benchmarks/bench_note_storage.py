@@ -0,0 +1,184 @@
+"""
+Read latency and bytes read per request before and after moving embeddings
+and large fields out of note documents (database/note_storage):
+    listing     - GET /notes/ first page
+    detail      - GET /notes/{id} (note with transcript / page text)
+    transcript  - GET /notes/{id}/transcript?at=... (timestamp lookup)
+    chat        - the /chat retrieval read: embeddings as a matrix
+                  (before: the whole note, as /chat used to read it)
+Notes are seeded in the old inline layout, read, migrated with
+database/migrate_note_storage, and read again. The in-memory MongoDB
+stand-in is wrapped so every document returned is BSON encoded and decoded,
+as the driver would, which gives the bytes read and the decode cost; there
+is no network latency on top.
+
+Usage (from backend/):
+    python benchmarks/bench_note_storage.py --notes 200 --hours 3
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+import bson
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("INFERENCE_POOL", "0")
+os.environ.setdefault("SMARTNOTES_DATA_DIR", tempfile.mkdtemp(prefix="bench_note_storage_"))
+
+WORDS = ("convolution slides a small kernel across the image and sums the products so nearby "
+         "pixels share weights and the layer learns local patterns").split()
+
+wire = {"bytes": 0}
+
+
+def install_wire_stand_ins():
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=True, embeddings=True)
+
+    def over_wire(doc):
+        if doc is None:
+            return None
+        data = bson.encode(doc)
+        wire["bytes"] += len(data)
+        return bson.decode(data)
+
+    find_one = stand_ins.InMemoryCollection.find_one
+    stand_ins.InMemoryCollection.find_one = lambda self, *a, **k: over_wire(find_one(self, *a, **k))
+    iterate = stand_ins.InMemoryCursor.__iter__
+    stand_ins.InMemoryCursor.__iter__ = lambda self: (over_wire(d) for d in iterate(self))
+    download = stand_ins.InMemoryGridFSBucket.open_download_stream
+
+    def counted_download(self, file_id):
+        stream = download(self, file_id)
+        wire["bytes"] += len(stream.getbuffer())
+        return stream
+
+    stand_ins.InMemoryGridFSBucket.open_download_stream = counted_download
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def legacy_note(rng, i, hours, now):
+    """A note as it was stored before: everything inline."""
+    from utils.timed_transcript import compact_transcript
+    chunks = int(hours * 100)
+    doc = {
+        "user_id": "bench",
+        "title": f"Recording {i}",
+        "summary": words(rng, 450),
+        "embeddings": [{"text": words(rng, 150), "embedding": [rng.uniform(-1, 1) for _ in range(384)]}
+                       for _ in range(chunks)],
+        "created_at": now - timedelta(minutes=i),
+    }
+    if i % 3 == 2:
+        doc.update(type="PDF", source="Uploaded PDF", pdf_content=[words(rng, 450) for _ in range(int(hours * 40))])
+    else:
+        t, segments = 0.0, []
+        while t < hours * 3600:
+            segments.append({"time": f"{t:.2f}s -> {t + 4:.2f}s", "text": words(rng, 10)})
+            t += 4.0
+        doc.update(type="media", source="Uploaded media", **compact_transcript(segments))
+    return doc
+
+
+def measure(label, fn, ids):
+    """Mean latency and bytes read per call over the sample of note ids."""
+    latencies, sizes = [], []
+    for note_id in ids:
+        wire["bytes"] = 0
+        start = time.perf_counter()
+        fn(note_id)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(wire["bytes"])
+    return label, statistics.mean(latencies) * 1e3, statistics.mean(sizes)
+
+
+async def ameasure(label, fn, ids):
+    """measure() for a coroutine function, all calls on one event loop."""
+    latencies, sizes = [], []
+    for note_id in ids:
+        wire["bytes"] = 0
+        start = time.perf_counter()
+        await fn(note_id)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(wire["bytes"])
+    return label, statistics.mean(latencies) * 1e3, statistics.mean(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Note reads before/after chunk and blob storage.")
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--hours", type=float, default=3, help="Source length of each note.")
+    parser.add_argument("--sample", type=int, default=30, help="Notes read per measurement.")
+    args = parser.parse_args()
+
+    install_wire_stand_ins()
+    import asyncio
+    import builtins
+    from bson.objectid import ObjectId
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from database.crud import get_note_for_chat, notes_collection
+    from database.note_storage import load_embeddings
+    from database import migrate_note_storage
+
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    print(f"seeding {args.notes} notes of {args.hours:g} h sources in the inline layout ...")
+    # seeded and inspected through the stand-in's synchronous store
+    store = notes_collection._sync
+    store.insert_many([legacy_note(rng, i, args.hours, now) for i in range(args.notes)])
+    ids = [str(n["_id"]) for n in store.find({}, {"_id": 1})]
+    sample = rng.sample(ids, min(args.sample, len(ids)))
+    media = [i for i in sample if store.find_one({"_id": ObjectId(i)}, {"type": 1})["type"] == "media"]
+    biggest_before = max(len(bson.encode(n)) for n in store.find({}))
+
+    quiet = builtins.print
+    results = {}
+    with TestClient(app_module.app) as client:
+        def reads(before: bool):
+            async def chat(note_id):
+                note = await (notes_collection.find_one({"_id": ObjectId(note_id)}) if before
+                              else get_note_for_chat(note_id))
+                texts, matrix = await load_embeddings(note)
+                assert texts and matrix.shape[1] == 384
+            return [
+                measure("listing (first page)", lambda _: client.get("/notes/", params={"user_id": "bench"}), sample[:5]),
+                measure("detail", lambda i: client.get(f"/notes/{i}", params={"user_id": "bench"}).raise_for_status(),
+                        sample),
+                measure("transcript lookup", lambda i: client.get(f"/notes/{i}/transcript",
+                                                                  params={"user_id": "bench", "at": 1234}).raise_for_status(),
+                        media),
+                asyncio.run(ameasure("chat retrieval" + (" (whole note)" if before else ""), chat, sample)),
+            ]
+
+        builtins.print = lambda *a, **k: None
+        try:
+            results["before"] = reads(before=True)
+            sys.argv = ["migrate_note_storage", "--batch", "50"]
+            start = time.perf_counter()
+            migrate_note_storage.main()
+            migrate_s = time.perf_counter() - start
+            results["after"] = reads(before=False)
+        finally:
+            builtins.print = quiet
+
+    biggest_after = max(len(bson.encode(n)) for n in store.find({}))
+    print(f"\nmigrated {args.notes} notes in {migrate_s:.1f}s; largest note document "
+          f"{biggest_before / 1e6:.2f} MB -> {biggest_after / 1e3:.1f} KB\n")
+    print(f"{'read':<34}{'before ms':>11}{'after ms':>10}{'before KB':>12}{'after KB':>11}")
+    for (label, before_ms, before_b), (_, after_ms, after_b) in zip(results["before"], results["after"]):
+        print(f"{label:<34}{before_ms:>11.2f}{after_ms:>10.2f}{before_b / 1e3:>12.1f}{after_b / 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
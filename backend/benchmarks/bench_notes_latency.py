@@ -0,0 +1,116 @@
+"""
+/notes/ latency while a media transcription is running, with transcription
+in the API process's thread pool (INFERENCE_POOL=0) vs the inference
+process pool (INFERENCE_POOL=1). Runs the real app offline (loadtest/
+stand-ins) with a stub Whisper that spins in Python for `rtf` x audio
+seconds, holding the GIL the way CPU-bound work in the API process does.
+
+Usage (from backend/):
+    python benchmarks/bench_notes_latency.py --audio /tmp/lecture.wav --rtf 1.0
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from loadtest.run_offline import wait_until_up  # noqa: E402
+
+
+def percentiles(samples: list) -> str:
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+    return f"{pick(50):>8.1f}{pick(95):>8.1f}{pick(99):>8.1f}{ordered[-1] * 1000:>8.1f}"
+
+
+def sample_notes(client: httpx.Client, stop: threading.Event, out: list, interval: float) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get("/notes/", params={"user_id": "bench"})
+        out.append(time.perf_counter() - start)
+        time.sleep(interval)
+
+
+def run_mode(pool: bool, args, stub_url: str) -> None:
+    env = dict(os.environ,
+               INFERENCE_POOL="1" if pool else "0",
+               STUB_WHISPER_CPU="1", STUB_WHISPER_RTF=str(args.rtf),
+               TRANSCRIPT_CACHE="0", MEDIA_STREAMING="0",
+               SMARTNOTES_DATA_DIR=tempfile.mkdtemp(prefix="bench_notes_"))
+    api = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "loadtest", "offline_app.py"),
+                            "--port", str(args.api_port), "--groq_url", stub_url],
+                           env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    try:
+        wait_until_up(f"{api_url}/docs")
+        client = httpx.Client(base_url=api_url, timeout=120)
+        for i in range(args.notes):
+            client.post("/summarize-yt", json={
+                "user_id": "bench", "title": f"note {i}",
+                "transcript": [{"time": "0.00s -> 5.00s", "text": "seed note about sorting algorithms"}],
+            })
+        if pool:
+            time.sleep(3)  # let the workers finish warming
+
+        idle: list = []
+        stop = threading.Event()
+        sampler = threading.Thread(target=sample_notes, args=(client, stop, idle, args.interval))
+        sampler.start()
+        time.sleep(args.idle_seconds)
+        stop.set()
+        sampler.join()
+
+        busy: list = []
+        stop = threading.Event()
+        sampler = threading.Thread(target=sample_notes, args=(httpx.Client(base_url=api_url, timeout=120),
+                                                              stop, busy, args.interval))
+        start = time.perf_counter()
+        sampler.start()
+        with open(args.audio, "rb") as f:
+            client.post("/summarize-media", files={"file": (os.path.basename(args.audio), f)},
+                        data={"user_id": "bench"})
+        media_seconds = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+
+        label = "pool" if pool else "thread"
+        print(f"{label:<8}{'idle':<20}{len(idle):>6}{percentiles(idle)}")
+        print(f"{label:<8}{f'transcribing {media_seconds:.0f}s':<20}{len(busy):>6}{percentiles(busy)}")
+    finally:
+        api.terminate()
+        api.wait(timeout=20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/notes/ latency during transcription, thread vs process pool.")
+    parser.add_argument("--audio", required=True)
+    parser.add_argument("--rtf", type=float, default=1.0, help="Stub Whisper seconds of CPU per audio second.")
+    parser.add_argument("--notes", type=int, default=50, help="Notes seeded for the bench user.")
+    parser.add_argument("--idle_seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--api_port", type=int, default=8810)
+    parser.add_argument("--stub_port", type=int, default=9110)
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    stub = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "loadtest", "stub_groq.py"),
+                             "--port", str(args.stub_port), "--latency", "fixed", "--latency_ms", "50"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(f"{stub_url}/stats")
+        print(f"{'mode':<8}{'phase':<20}{'n':>6}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'max ms':>8}")
+        for pool in (False, True):
+            run_mode(pool, args, stub_url)
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
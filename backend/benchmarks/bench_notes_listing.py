@@ -0,0 +1,133 @@
+"""
+Response size and latency of the notes history for a user with many notes:
+    full      - the old /notes/: every note with transcript, page text and
+                embeddings, validated through NoteResponseModel
+    page      - /notes/?limit=N: projected titles and summary previews
+    all pages - walking next_cursor until the last page
+    detail    - /notes/{id} for one note (what a click in History costs)
+Runs the real app through TestClient on the in-memory MongoDB stand-in,
+which scans and sorts in Python; on Atlas the page query is served by the
+user_created_at index instead, so only the size columns carry over as is.
+
+Usage (from backend/):
+    python benchmarks/bench_notes_listing.py --notes 2000 --limit 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("INFERENCE_POOL", "0")
+os.environ.setdefault("SMARTNOTES_DATA_DIR", tempfile.mkdtemp(prefix="bench_notes_"))
+
+WORDS = ("attention lets each token weigh every other token so the model can route information "
+         "across the whole sequence in a single layer").split()
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed_notes(collection, user_id: str, count: int, rng) -> None:
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        kind = rng.choice(("youtube", "media", "pdf"))
+        doc = {
+            "user_id": user_id,
+            "title": f"Lecture {i}: {words(rng, 5)}",
+            "type": kind,
+            "summary": words(rng, 450),
+            "source": f"https://youtu.be/{i:011d}" if kind == "youtube" else "Uploaded file",
+            "embeddings": [{"text": words(rng, 120), "embedding": [rng.random() for _ in range(384)]}
+                           for _ in range(8)],
+            "created_at": now - timedelta(minutes=count - i),
+        }
+        if kind == "pdf":
+            doc["pdf_content"] = [words(rng, 400) for _ in range(20)]
+        else:
+            doc["transcript"] = [{"time": f"{m}:00", "text": words(rng, 200)} for m in range(0, 60, 2)]
+        docs.append(doc)
+    collection.insert_many(docs)
+
+
+def timed_get(client, url: str, params=None, repeat: int = 3):
+    best, response = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, params=params)
+        best = min(best, time.perf_counter() - start)
+    response.raise_for_status()
+    return best, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notes history: full listing vs projected pages.")
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--other_users", type=int, default=4, help="Other users with as many notes each.")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=True, embeddings=True)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from database.crud import note_helper, notes_collection
+    from database.historySchema import NoteResponseModel
+
+    # the listing as it was before pagination, for comparison
+    @app_module.app.get("/bench/notes-full", response_model=List[NoteResponseModel])
+    async def full_listing(user_id: str):
+        notes = await notes_collection.find({"user_id": user_id}).sort("created_at", -1).to_list()
+        return [NoteResponseModel(**note_helper(note)) for note in notes]
+
+    rng = random.Random(3)
+    print(f"seeding {args.notes} notes x {args.other_users + 1} users ...")
+    for u in range(args.other_users + 1):
+        # straight into the stand-in's synchronous store
+        seed_notes(notes_collection._sync, f"user-{u}", args.notes, rng)
+
+    with TestClient(app_module.app) as client:
+        full_s, full = timed_get(client, "/bench/notes-full", {"user_id": "user-0"}, repeat=1)
+        page_s, page = timed_get(client, "/notes/", {"user_id": "user-0", "limit": args.limit})
+
+        walk_start, pages, cursor, seen = time.perf_counter(), 0, None, 0
+        walk_bytes = 0
+        while True:
+            params = {"user_id": "user-0", "limit": args.limit, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/notes/", params=params)
+            walk_bytes += len(body.content)
+            data = body.json()
+            pages += 1
+            seen += len(data["notes"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        walk_s = time.perf_counter() - walk_start
+        assert seen == args.notes, seen
+
+        note_id = page.json()["notes"][0]["id"]
+        detail_s, detail = timed_get(client, f"/notes/{note_id}", {"user_id": "user-0"})
+        assert "embeddings" not in detail.json()
+        assert json.loads(full.content)[0]["id"] == note_id
+
+    print(f"\n{'request':<28}{'notes':>7}{'bytes':>14}{'latency ms':>12}")
+    print(f"{'full listing (old)':<28}{args.notes:>7}{len(full.content):>14,}{full_s * 1e3:>12.1f}")
+    print(f"{f'first page (limit {args.limit})':<28}{args.limit:>7}{len(page.content):>14,}{page_s * 1e3:>12.1f}")
+    print(f"{f'all {pages} pages':<28}{seen:>7}{walk_bytes:>14,}{walk_s * 1e3:>12.1f}")
+    print(f"{'one note detail':<28}{1:>7}{len(detail.content):>14,}{detail_s * 1e3:>12.1f}")
+    print(f"\nfirst page is {len(full.content) / len(page.content):,.0f}x smaller and "
+          f"{full_s / page_s:,.0f}x faster than the full listing")
+
+
+if __name__ == "__main__":
+    main()
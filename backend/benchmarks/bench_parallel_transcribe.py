@@ -0,0 +1,54 @@
+"""
+Scaling of VAD-segmented parallel transcription on CPU at 1, 2, 4 and 8
+worker processes. Model loading is excluded (each pool is warmed on a short
+clip first); the transcript of every run is compared with the 1-worker run.
+
+Usage (from backend/):
+    python benchmarks/bench_parallel_transcribe.py --audio lecture.mp3 --workers 1,2,4,8
+"""
+import os
+import sys
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel transcription scaling benchmark.")
+    parser.add_argument("--audio", required=True)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--model", default=None, help="Whisper model size (default WHISPER_MODEL_SIZE).")
+    parser.add_argument("--compute_type", default="int8")
+    parser.add_argument("--segment_seconds", type=float, default=120)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    from services.media_summariser.process_media import SAMPLE_RATE, decode_audio
+    from services.media_summariser.parallel_transcribe import transcribe_parallel
+
+    audio = decode_audio(args.audio, speed=args.speed)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"audio: {duration:.0f}s, {os.cpu_count()} cores\n")
+    print(f"{'workers':>8}{'wall s':>10}{'RTF':>8}{'speedup':>9}{'segments':>10}  same as 1 worker")
+
+    reference = None
+    base_wall = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        kwargs = dict(workers=workers, speed=args.speed, model_size=args.model,
+                      compute_type=args.compute_type, segment_seconds=args.segment_seconds)
+        transcribe_parallel(audio[:30 * SAMPLE_RATE], **kwargs)  # warm the pool
+
+        start = time.perf_counter()
+        transcript = transcribe_parallel(audio, **kwargs)
+        wall = time.perf_counter() - start
+
+        reference = reference if reference is not None else transcript
+        base_wall = base_wall or wall
+        print(f"{workers:>8}{wall:>10.1f}{wall / duration:>8.3f}{base_wall / wall:>9.2f}"
+              f"{len(transcript):>10}  {transcript == reference}")
+
+
+if __name__ == "__main__":
+    main()
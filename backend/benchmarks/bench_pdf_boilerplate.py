@@ -0,0 +1,129 @@
+"""
+Tokens saved per document by boilerplate stripping (utils.pdf_boilerplate),
+comparing plain page text with the stripped text that goes to the LLM and
+the embedder. Tokens are estimated as characters / 4 (no tokenizer needed).
+
+Without --corpus a small synthetic corpus is generated: lecture notes with a
+running header and "Page X of Y" footer, a slide deck with template text
+and a copyright line, and a plain book with no boilerplate (which should
+lose nothing). For the synthetic documents every number in the body is
+checked to survive.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_boilerplate.py
+    python benchmarks/bench_pdf_boilerplate.py --corpus ~/pdf_corpus
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import pymupdf  # noqa: E402
+
+from utils.pdf_boilerplate import find_boilerplate, page_text  # noqa: E402
+
+BODY = ("In {year} the sort handled {n} records in {ms} ms; the pivot split the array at index {i}, "
+        "and recursion depth stayed under {d} levels because the partitions were balanced. ")
+
+
+def body_text(page: int) -> str:
+    return "".join(BODY.format(year=1960 + (page + k) % 60, n=1000 * (page + k + 1), ms=3 * page + k + 7,
+                               i=page * 11 + k, d=k + 12) for k in range(6))
+
+
+def slide_body(page: int) -> str:
+    return body_text(page)[:400].rsplit(" ", 1)[0]
+
+
+def make_lecture_notes(path: str, pages: int = 40) -> None:
+    doc = pymupdf.open()
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_text((56, 40), "CS201 Data Structures and Algorithms - Lecture Notes, Spring Term", fontsize=9)
+        page.insert_textbox(pymupdf.Rect(56, 90, 540, 760), body_text(p), fontsize=10)
+        page.insert_text((260, 810), f"Page {p + 1} of {pages}", fontsize=9)
+    doc.save(path)
+
+
+def make_slides(path: str, pages: int = 60) -> None:
+    doc = pymupdf.open()
+    for p in range(pages):
+        page = doc.new_page(width=842, height=595)
+        page.insert_text((40, 36), "Department of Computer Science | Faculty of Engineering", fontsize=9)
+        page.insert_textbox(pymupdf.Rect(40, 70, 800, 110), f"Slide {p + 1}: sorting case study", fontsize=16)
+        page.insert_textbox(pymupdf.Rect(40, 130, 800, 480), slide_body(p), fontsize=12)
+        page.insert_text((40, 570), "(c) 2024 University of Example. All rights reserved. Confidential.", fontsize=8)
+        page.insert_text((780, 570), str(p + 1), fontsize=8)
+    doc.save(path)
+
+
+def make_book(path: str, pages: int = 30) -> None:
+    doc = pymupdf.open()
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(pymupdf.Rect(56, 56, 540, 790), body_text(p) * 2, fontsize=10)
+    doc.save(path)
+
+
+def tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def measure(path: str, body=None) -> dict:
+    with pymupdf.open(path) as doc:
+        start = time.perf_counter()
+        boilerplate = find_boilerplate(doc)
+        before = after = 0
+        lost = 0
+        for i in range(doc.page_count):
+            plain = doc[i].get_text("text")
+            stripped = page_text(doc[i], boilerplate)
+            before += tokens(plain)
+            after += tokens(stripped)
+            if body:
+                kept = set(re.findall(r"\d+", stripped))
+                lost += len(set(re.findall(r"\d+", body(i))) - kept)
+        return {"pages": doc.page_count, "before": before, "after": after, "signatures": len(boilerplate),
+                "seconds": time.perf_counter() - start, "lost": lost if body else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens saved by PDF boilerplate stripping.")
+    parser.add_argument("--corpus", default=None, help="Directory of PDFs (default: synthetic corpus).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            files = [(os.path.join(args.corpus, n), None) for n in sorted(os.listdir(args.corpus))
+                     if n.lower().endswith(".pdf")]
+        else:
+            files = []
+            for name, make, body in (("lecture_notes", make_lecture_notes, body_text),
+                                     ("slides", make_slides, slide_body),
+                                     ("book", make_book, body_text)):
+                path = os.path.join(tmp, f"{name}.pdf")
+                make(path)
+                files.append((path, body))
+
+        print(f"{'document':<24}{'pages':>6}{'tokens':>9}{'stripped':>10}{'saved':>8}{'saved %':>9}"
+              f"{'rules':>7}{'ms':>7}{'body numbers lost':>19}")
+        total_before = total_after = 0
+        for path, body in files:
+            r = measure(path, body)
+            total_before += r["before"]
+            total_after += r["after"]
+            saved = r["before"] - r["after"]
+            lost = "-" if r["lost"] is None else str(r["lost"])
+            print(f"{os.path.basename(path)[:23]:<24}{r['pages']:>6}{r['before']:>9}{r['after']:>10}{saved:>8}"
+                  f"{saved / max(r['before'], 1):>9.1%}{r['signatures']:>7}{r['seconds'] * 1000:>7.0f}{lost:>19}")
+        saved = total_before - total_after
+        print(f"\n{'total':<24}{'':>6}{total_before:>9}{total_after:>10}{saved:>8}{saved / max(total_before, 1):>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+PDF extraction throughput (pages/sec) on synthetic text PDFs of 10, 300
+and 2000 pages:
+    pypdfloader  - the previous loader (LangChain PyPDFLoader, from disk)
+    pymupdf      - utils.pdf_loader.extract_pages from the in-memory bytes
+    pymupdf-par  - same, page ranges fanned out over a process pool
+The process pool is started and warmed before timing, as the inference
+pool is in the app.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_extract.py
+    python benchmarks/bench_pdf_extract.py --pages 10,300,2000 --workers 4
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import pymupdf  # noqa: E402
+
+from utils.pdf_loader import extract_pages, load_pdf_documents  # noqa: E402
+
+SENTENCE = ("Dynamic programming stores the answers to overlapping subproblems so each one is "
+            "solved once; memoisation does this top-down and tabulation bottom-up. ")
+
+
+def make_pdf(pages: int, path: str) -> None:
+    doc = pymupdf.open()
+    for i in range(pages):
+        page = doc.new_page()
+        body = f"Chapter {i // 20 + 1}, page {i + 1}\n\n" + SENTENCE * 18
+        page.insert_textbox(pymupdf.Rect(56, 56, 540, 790), body, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def timed(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = function()
+        best = min(best, time.perf_counter() - start)
+    assert records
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyPDFLoader vs PyMuPDF extraction, pages/sec.")
+    parser.add_argument("--pages", default="10,300,2000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; best is reported.")
+    args = parser.parse_args()
+
+    executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+    list(executor.map(abs, range(args.workers)))
+
+    print(f"{args.workers} workers, {os.cpu_count()} CPUs\n")
+    print(f"{'pages':>6}{'MB':>7}  {'loader':<13}{'seconds':>9}{'pages/s':>10}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in (int(p) for p in args.pages.split(",")):
+            path = os.path.join(tmp, f"{pages}.pdf")
+            make_pdf(pages, path)
+            with open(path, "rb") as f:
+                data = f.read()
+
+            cases = [
+                ("pypdfloader", lambda: load_pdf_documents(path)),
+                ("pymupdf", lambda: extract_pages(data, path)),
+                ("pymupdf-par", lambda: extract_pages(data, path, executor=executor, workers=args.workers)),
+            ]
+            baseline = None
+            for name, function in cases:
+                seconds = timed(function, args.repeat)
+                baseline = baseline or seconds
+                print(f"{pages:>6}{len(data) / 1e6:>7.1f}  {name:<13}{seconds:>9.3f}"
+                      f"{pages / seconds:>10.0f}{baseline / seconds:>8.1f}x")
+            print()
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
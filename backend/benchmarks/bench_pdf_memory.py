@@ -0,0 +1,146 @@
+"""
+Peak RSS while ingesting a large PDF, whole-document vs streamed:
+    batch       - extract every page, summarize_long_pdf, embed the joined
+                  text (the /summarize-pdf route before streaming)
+    streaming   - ingest_pdf's pipeline: pages are chunked as they come out
+                  of PyMuPDF and dropped; embeddings go to a sink that only
+                  counts them (what a chunk store would do)
+    streaming+v - streaming, but the embedding vectors are collected for the
+                  note the way the route stores them today
+Each run is a fresh process with the inference pool off (extraction counts
+towards this process), stub LLM calls and the hashing embedding stand-in.
+A flat pipeline shows the same peak growth at 1000 and 5000 pages.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_memory.py
+    python benchmarks/bench_pdf_memory.py --pages 1000,5000
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MODES = ("batch", "streaming", "streaming+v")
+SENTENCE = ("Dynamic programming stores the answers to overlapping subproblems so each one is "
+            "solved once; memoisation does this top-down and tabulation bottom-up. ")
+
+
+def make_pdf(pages: int, path: str) -> None:
+    import pymupdf
+    doc = pymupdf.open()
+    for i in range(pages):
+        page = doc.new_page()
+        body = f"Chapter {i // 20 + 1}, page {i + 1}\n\n" + SENTENCE * 18
+        page.insert_textbox(pymupdf.Rect(56, 56, 540, 790), body, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+class PeakSampler(threading.Thread):
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mb()
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            self.peak = max(self.peak, rss_mb())
+            time.sleep(self.interval)
+
+
+async def ingest(mode: str, path: str) -> int:
+    from services.PDF_summarizer import (
+        clean_pdf_chunk_text, reduce_chunk_summaries, safe_summarize, summarize_long_pdf,
+    )
+    from services.media_summariser.embed import create_chunks, embed_texts, wrap_into_document
+    from services.media_summariser.streaming import run_streaming_pipeline
+    from services.ingestion import _cleaned_pages
+    from utils.pdf_loader import extract_pages, stream_pdf_pages
+
+    if mode == "batch":
+        docs = extract_pages(path, path)
+        await summarize_long_pdf(docs)
+        text = "".join(d.page_content for d in docs).replace("\n", " ")
+        return len(embed_texts([c.page_content for c in create_chunks(wrap_into_document(text))]))
+
+    embedded = {"n": 0}
+
+    async def count(records):
+        embedded["n"] += len(records)
+
+    result = await run_streaming_pipeline(
+        _cleaned_pages(stream_pdf_pages(path)),
+        clean=clean_pdf_chunk_text, map_summarize=safe_summarize, reduce=reduce_chunk_summaries,
+        keep_items=False, unit="pages", source_stage="extract",
+        embeddings_sink=count if mode == "streaming" else None,
+    )
+    return embedded["n"] or len(result.embeddings or [])
+
+
+def child(mode: str, path: str) -> None:
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=False, embeddings=True)
+    from services.model_router import model_router
+    from services.media_summariser.embed import get_embedding_model
+
+    async def fake_ainvoke(stage, prompt, max_tokens=None, temperature=None):
+        await asyncio.sleep(0)
+        return "short summary of the chunk"
+
+    model_router.ainvoke = fake_ainvoke
+    get_embedding_model()
+
+    base = rss_mb()
+    sampler = PeakSampler()
+    sampler.start()
+    start = time.perf_counter()
+    embeddings = asyncio.run(ingest(mode, path))
+    seconds = time.perf_counter() - start
+    sampler.stop.set()
+    sampler.join()
+    print(json.dumps({"base": base, "peak": sampler.peak, "seconds": seconds, "embeddings": embeddings}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of batch vs streamed PDF ingestion.")
+    parser.add_argument("--pages", default="1000,5000")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    env = dict(os.environ, INFERENCE_POOL="0")
+    print(f"{'pages':>6}{'MB':>6}  {'mode':<13}{'base MB':>9}{'peak MB':>9}{'growth MB':>11}"
+          f"{'seconds':>9}{'vectors':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in (int(p) for p in args.pages.split(",")):
+            path = os.path.join(tmp, f"{pages}.pdf")
+            make_pdf(pages, path)
+            size = os.path.getsize(path) / 1e6
+            for mode in MODES:
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                     env=env, capture_output=True, text=True, check=True).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{pages:>6}{size:>6.1f}  {mode:<13}{r['base']:>9.0f}{r['peak']:>9.0f}"
+                      f"{r['peak'] - r['base']:>11.0f}{r['seconds']:>9.1f}{r['embeddings']:>9}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
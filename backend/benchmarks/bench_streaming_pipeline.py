@@ -0,0 +1,92 @@
+"""
+End-to-end latency of media ingestion after decode, sequential vs streamed:
+    sequential - drain Whisper, then map-reduce summarize, then embed
+    streaming  - run_streaming_pipeline: map summaries and embeddings run
+                 while segments are still coming out of Whisper
+Whisper is a stub generator that yields one segment every
+`segment_seconds * rtf` seconds; LLM calls sleep for `llm_latency`;
+embeddings use the hashing stand-in from loadtest/. The target for the
+streamed run is Whisper time plus one reduce (the map of the last chunk,
+which can only start once the audio ends, and the final call).
+
+Usage (from backend/):
+    python benchmarks/bench_streaming_pipeline.py --audio_minutes 60 --rtf 0.05 --llm_latency 1.5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORDS = ("gradient descent updates the weights by stepping against the loss slope while the "
+         "learning rate controls the step size and momentum smooths noisy updates").split()
+
+
+def stub_segments(audio_minutes: float, rtf: float, segment_seconds: float = 6.0):
+    t = 0.0
+    i = 0
+    while t < audio_minutes * 60:
+        time.sleep(segment_seconds * rtf)
+        words = [WORDS[(i + k) % len(WORDS)] for k in range(18)]
+        yield {"time": f"{t:.2f}s -> {t + segment_seconds:.2f}s", "text": " ".join(words)}
+        t += segment_seconds
+        i += 1
+
+
+async def run(mode: str, args) -> dict:
+    from services.Media_summarizer import summarize_long_transcript
+    from services.media_summariser.embed import create_embeddings
+    from services.media_summariser.streaming import run_streaming_pipeline
+
+    whisper = {"seconds": 0.0}
+
+    def timed_segments():
+        start = time.perf_counter()
+        yield from stub_segments(args.audio_minutes, args.rtf)
+        whisper["seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == "sequential":
+        transcript = await asyncio.to_thread(list, timed_segments())
+        await summarize_long_transcript(transcript)
+        await asyncio.to_thread(create_embeddings, " ".join(s["text"] for s in transcript))
+    else:
+        await run_streaming_pipeline(timed_segments())
+    return {"wall": time.perf_counter() - start, "whisper": whisper["seconds"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs streamed media pipeline latency.")
+    parser.add_argument("--audio_minutes", type=float, default=60)
+    parser.add_argument("--rtf", type=float, default=0.05, help="Stub Whisper real-time factor.")
+    parser.add_argument("--llm_latency", type=float, default=1.5, help="Seconds per stub LLM call.")
+    args = parser.parse_args()
+
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=True, embeddings=True)
+
+    from services.model_router import model_router
+    calls = {"n": 0}
+
+    async def fake_ainvoke(stage, prompt, max_tokens=None, temperature=None):
+        calls["n"] += 1
+        await asyncio.sleep(args.llm_latency)
+        return f"summary of {len(prompt)} chars"
+
+    model_router.ainvoke = fake_ainvoke
+
+    print(f"audio {args.audio_minutes:g} min, whisper RTF {args.rtf}, LLM {args.llm_latency}s/call\n")
+    print(f"{'mode':<12}{'whisper s':>11}{'wall s':>9}{'after whisper s':>17}{'LLM calls':>11}")
+    for mode in ("sequential", "streaming"):
+        calls["n"] = 0
+        result = asyncio.run(run(mode, args))
+        tail = result["wall"] - result["whisper"]
+        print(f"{mode:<12}{result['whisper']:>11.1f}{result['wall']:>9.1f}{tail:>17.1f}{calls['n']:>11}")
+    print(f"\ntarget (last map + final call): after whisper ~ {2 * args.llm_latency:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
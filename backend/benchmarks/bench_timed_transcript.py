@@ -0,0 +1,155 @@
+"""
+Cost of the {time, text} list vs utils.timed_transcript.TimedTranscript on
+long transcripts:
+    build    - parsing the stored list into the timed form
+    memory   - Python heap held by each form
+    lookup   - segment playing at a random second (linear scan of the list,
+               parsing "time" strings, vs bisect)
+    range    - text of a random 10-minute window (filter + join vs one slice)
+    storage  - JSON bytes of each form as written to the note
+    chunking - YouTube line merging with string += (old) vs one join per chunk
+
+Usage (from backend/):
+    python benchmarks/bench_timed_transcript.py --hours 10 --lookups 2000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.timed_transcript import TimedTranscript, parse_time  # noqa: E402
+from utils.youtube_transcript import merge_lines_into_chunks  # noqa: E402
+
+WORDS = ("the gradient of the loss with respect to each weight tells us which direction "
+         "to move so we take a small step against it and repeat until it converges").split()
+
+
+def whisper_segments(hours: float, seed: int = 7):
+    rng = random.Random(seed)
+    t, segments = 0.0, []
+    while t < hours * 3600:
+        duration = rng.uniform(2.0, 6.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(int(duration * 2.5)))
+        segments.append({"time": f"{t:.2f}s -> {t + duration:.2f}s", "text": text})
+        t += duration + rng.uniform(0.0, 0.5)
+    return segments
+
+
+def linear_segment_at(segments, t):
+    found = None
+    for segment in segments:
+        start, _ = parse_time(segment["time"])
+        if start > t:
+            break
+        found = segment
+    return found
+
+
+def linear_text_between(segments, start, end):
+    parts = []
+    for segment in segments:
+        s, e = parse_time(segment["time"])
+        if s >= end:
+            break
+        if e > start:
+            parts.append(segment["text"])
+    return " ".join(parts)
+
+
+def concat_merge(lines, chunk_duration=120):
+    """merge_lines_into_chunks as it was, growing each chunk with +=."""
+    chunks = []
+    current_chunk = {"start": lines[0].start, "text": ""}
+    current_duration = 0
+    for line in lines:
+        if current_duration + line.start - current_chunk["start"] >= chunk_duration:
+            chunks.append(current_chunk)
+            current_chunk = {"start": line.start, "text": line.text}
+            current_duration = 0
+        else:
+            if current_chunk["text"]:
+                current_chunk["text"] += " "
+            current_chunk["text"] += line.text
+            current_duration = line.start - current_chunk["start"]
+    if current_chunk["text"]:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def held_bytes(factory):
+    tracemalloc.start()
+    obj = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List vs TimedTranscript on long transcripts.")
+    parser.add_argument("--hours", type=float, default=10)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    segments = whisper_segments(args.hours)
+    payload = json.dumps(segments)
+    segments, list_bytes = held_bytes(lambda: json.loads(payload))
+    build_s, timed_t = timed(lambda: TimedTranscript.from_segments(segments), repeat=3)
+    _, timed_bytes = held_bytes(lambda: TimedTranscript.from_segments(segments))
+    print(f"{args.hours:g} h transcript: {len(segments)} segments, {len(timed_t.text) / 1e6:.2f} M characters\n")
+
+    rng = random.Random(1)
+    total = timed_t.ends[-1]
+    points = [rng.uniform(0, total) for _ in range(args.lookups)]
+    windows = [(s, s + 600) for s in (rng.uniform(0, total - 600) for _ in range(args.lookups // 10 or 1))]
+
+    for t in points[:50]:
+        assert linear_segment_at(segments, t)["text"] == timed_t.segment_at(t)["text"]
+    for s, e in windows[:20]:
+        assert linear_text_between(segments, s, e) == timed_t.text_between(s, e)
+
+    linear_at, _ = timed(lambda: [linear_segment_at(segments, t) for t in points])
+    bisect_at, _ = timed(lambda: [timed_t.segment_at(t) for t in points], repeat=5)
+    linear_range, _ = timed(lambda: [linear_text_between(segments, s, e) for s, e in windows])
+    slice_range, _ = timed(lambda: [timed_t.text_between(s, e) for s, e in windows], repeat=5)
+
+    stored = json.dumps(timed_t.to_dict())
+    dump_s, _ = timed(lambda: json.dumps(timed_t.to_dict()), repeat=3)
+    load_s, _ = timed(lambda: TimedTranscript.from_dict(json.loads(stored)), repeat=3)
+
+    lines = [SimpleNamespace(start=i * 3.0, duration=3.0, text=" ".join(WORDS[(i + k) % len(WORDS)] for k in range(8)))
+             for i in range(int(args.hours * 1200))]
+    assert concat_merge(lines) == merge_lines_into_chunks(lines)
+    concat_s, _ = timed(lambda: concat_merge(lines), repeat=3)
+    joined_s, _ = timed(lambda: merge_lines_into_chunks(lines), repeat=3)
+
+    n, w = len(points), len(windows)
+    print(f"{'':<34}{'list':>14}{'timed':>14}{'speedup':>10}")
+    print(f"{'build from list (ms)':<34}{'-':>14}{build_s * 1e3:>14.1f}")
+    print(f"{'heap held (MB)':<34}{list_bytes / 1e6:>14.2f}{timed_bytes / 1e6:>14.2f}{list_bytes / timed_bytes:>9.1f}x")
+    print(f"{'segment_at (us/lookup)':<34}{linear_at / n * 1e6:>14.1f}{bisect_at / n * 1e6:>14.2f}"
+          f"{linear_at / bisect_at:>9.0f}x")
+    print(f"{'10-min range text (us/window)':<34}{linear_range / w * 1e6:>14.1f}{slice_range / w * 1e6:>14.2f}"
+          f"{linear_range / slice_range:>9.0f}x")
+    print(f"{'stored JSON (MB)':<34}{len(payload) / 1e6:>14.2f}{len(stored) / 1e6:>14.2f}"
+          f"{len(payload) / len(stored):>9.1f}x")
+    print(f"{'serialize / load (ms)':<34}{'-':>14}{f'{dump_s * 1e3:.1f} / {load_s * 1e3:.1f}':>14}")
+    print(f"{f'YouTube chunking, {len(lines)} lines (ms)':<34}{concat_s * 1e3:>14.1f}{joined_s * 1e3:>14.1f}"
+          f"{concat_s / joined_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
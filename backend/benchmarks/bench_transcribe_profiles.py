@@ -0,0 +1,117 @@
+"""
+Real-time factor and word error rate of each transcription profile on a
+small local corpus. The corpus is a directory of audio/video files, each
+with a reference transcript next to it under the same name with a .txt
+extension (lecture01.mp3 + lecture01.txt). Model loading is excluded:
+each profile is warmed on the first 30 s of the first file. Each profile
+is also run once with vad=False on the first 45 s (two fixed windows) to
+check that the clips handed to faster-whisper decode.
+
+Usage (from backend/):
+    python benchmarks/bench_transcribe_profiles.py --corpus ~/asr_corpus
+    python benchmarks/bench_transcribe_profiles.py --corpus ~/asr_corpus --profiles fast,balanced
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from dataclasses import replace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MEDIA_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac", ".mp4", ".mkv", ".webm", ".mov")
+
+
+def normalize(text: str) -> list:
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return text.split()
+
+
+def word_errors(reference: list, hypothesis: list) -> int:
+    """Levenshtein distance over words (substitutions + deletions + insertions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1]
+
+
+def load_corpus(directory: str) -> list:
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        base, ext = os.path.splitext(name)
+        reference = os.path.join(directory, base + ".txt")
+        if ext.lower() in MEDIA_EXTENSIONS and os.path.exists(reference):
+            with open(reference, encoding="utf-8") as f:
+                corpus.append((os.path.join(directory, name), f.read()))
+    return corpus
+
+
+def check_no_vad(path: str, profile, language) -> None:
+    """Fixed 30 s windows (vad=False) must decode, with segments inside the clip."""
+    from services.media_summariser.process_media import SAMPLE_RATE, decode_audio, transcribe_audio
+    clip = decode_audio(path, speed=profile.speed)[:45 * SAMPLE_RATE]
+    segments = transcribe_audio(clip, language=language, profile=replace(profile, vad=False))
+    duration = len(clip) / SAMPLE_RATE
+    ends = [float(s["time"].split("->")[1].rstrip("s")) for s in segments]
+    if not any(s["text"] for s in segments) or max(ends) > duration + 1:
+        raise SystemExit(f"{profile.name} with vad=False: {len(segments)} segments, last ending at "
+                         f"{max(ends, default=0):.1f}s of a {duration:.0f}s clip")
+    print(f"{profile.name}: vad=False decoded {len(segments)} segments from {duration:.0f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTF / WER per transcription profile.")
+    parser.add_argument("--corpus", required=True, help="Directory of media files with .txt references.")
+    parser.add_argument("--profiles", default=None, help="Comma-separated profile names (default: all).")
+    parser.add_argument("--language", default=None)
+    args = parser.parse_args()
+
+    from services.media_summariser.process_media import (
+        PROFILES, SAMPLE_RATE, decode_audio, get_profile, resolve_compute_type, resolve_device, transcribe_audio,
+    )
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No media files with .txt references in {args.corpus}")
+    names = args.profiles.split(",") if args.profiles else list(PROFILES)
+    device = resolve_device()
+    print(f"{len(corpus)} files, device {device}\n")
+    print(f"{'profile':<10}{'model':<9}{'compute':<9}{'beam':>5}{'speed':>7}"
+          f"{'audio s':>9}{'wall s':>9}{'RTF':>8}{'WER':>8}")
+
+    for name in names:
+        profile = get_profile(name)
+        warm = decode_audio(corpus[0][0], speed=profile.speed)[:30 * SAMPLE_RATE]
+        transcribe_audio(warm, speed=profile.speed, language=args.language, profile=profile)
+        check_no_vad(corpus[0][0], profile, args.language)
+
+        audio_seconds = wall = 0.0
+        errors = words = 0
+        for path, reference in corpus:
+            start = time.perf_counter()
+            # decode is part of the profile (atempo), so it counts towards RTF
+            audio = decode_audio(path, speed=profile.speed)
+            segments = transcribe_audio(audio, speed=profile.speed, language=args.language, profile=profile)
+            wall += time.perf_counter() - start
+            audio_seconds += len(audio) / SAMPLE_RATE * profile.speed
+
+            ref_words = normalize(reference)
+            errors += word_errors(ref_words, normalize(" ".join(s["text"] for s in segments)))
+            words += len(ref_words)
+
+        compute = resolve_compute_type(device, profile.compute_type)
+        print(f"{name:<10}{profile.model_size:<9}{compute:<9}{profile.beam_size:>5}{profile.speed:>7g}"
+              f"{audio_seconds:>9.0f}{wall:>9.1f}{wall / audio_seconds:>8.3f}{errors / max(words, 1):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Peak RSS while saving multi-GB uploads: the streamed save_upload_to_disk
+against the old `await file.read()` + write path.
+Each case runs in a fresh process so ru_maxrss is per case.
+
+Usage (from backend/):
+    python benchmarks/bench_upload_memory.py --sizes_mb 256,1024,4096 --naive_max_mb 1024
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MB = 1024 * 1024
+
+
+class SyntheticFile:
+    """Read-only file object producing `size` bytes without holding them."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.pos = 0
+        self.block = os.urandom(MB)
+
+    def read(self, n: int = -1) -> bytes:
+        left = self.size - self.pos
+        if left <= 0:
+            return b""
+        if n < 0 or n > left:
+            n = left
+        out = b"".join([self.block] * (n // MB) + [self.block[:n % MB]])
+        self.pos += n
+        return out
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.pos = offset if whence == 0 else self.size + offset if whence == 2 else self.pos + offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self) -> None:
+        pass
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_case(mode: str, size: int) -> None:
+    from fastapi import UploadFile
+    from utils.uploads import save_upload_to_disk
+
+    upload = UploadFile(file=SyntheticFile(size), size=None, filename="synthetic.mp4")
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "streamed":
+        saved = await save_upload_to_disk(upload, ".mp4", max_bytes=size)
+        path = saved.path
+    else:
+        data = await upload.read()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp:
+            temp.write(data)
+            path = temp.name
+        del data
+    elapsed = time.perf_counter() - start
+    os.remove(path)
+    print(f"{mode:<10}{size // MB:>10}{baseline:>14.0f}{peak_rss_mb():>14.0f}{size / MB / elapsed:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of upload saving, streamed vs in-memory.")
+    parser.add_argument("--sizes_mb", default="256,1024,4096")
+    parser.add_argument("--naive_max_mb", type=int, default=1024,
+                        help="Largest size to try with the in-memory path (it needs that much RAM).")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, size = args.case.split(":")
+        asyncio.run(run_case(mode, int(size)))
+        return
+
+    print(f"{'mode':<10}{'size MB':>10}{'RSS before':>14}{'peak RSS MB':>14}{'MB/s':>10}")
+    for size_mb in (int(s) for s in args.sizes_mb.split(",")):
+        modes = ["streamed"] + (["in-memory"] if size_mb <= args.naive_max_mb else [])
+        for mode in modes:
+            subprocess.run([sys.executable, __file__, "--case", f"{mode}:{size_mb * MB}"], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Real-time factor of Whisper transcription per device / compute type, plus
+the cost of importing the media module (which no longer loads a model).
+
+RTF = transcription wall time / audio duration (lower is faster).
+
+Usage (from backend/):
+    python benchmarks/bench_whisper_rtf.py --audio lecture.mp3 --device cpu --compute_types int8,float32
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def import_time() -> float:
+    """Wall time of a cold `import services.media_summariser.process_media`."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        "import services.media_summariser.process_media; "
+        "print(time.perf_counter() - t)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper real-time factor per compute type.")
+    parser.add_argument("--audio", required=True, help="Audio file to transcribe.")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute_types", default="int8,float32")
+    parser.add_argument("--cpu_threads", type=int, default=0)
+    parser.add_argument("--batch_size", type=int, default=8)
+    args = parser.parse_args()
+
+    from services.media_summariser.process_media import get_pipeline
+
+    print(f"import process_media: {import_time() * 1000:.0f} ms\n")
+    print(f"{'compute_type':<14}{'load s':>8}{'audio s':>9}{'wall s':>9}{'RTF':>8}")
+    for compute_type in args.compute_types.split(","):
+        start = time.perf_counter()
+        pipeline = get_pipeline(args.model, args.device, compute_type, args.cpu_threads)
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        segments, info = pipeline.transcribe(args.audio, batch_size=args.batch_size)
+        for _ in segments:
+            pass
+        wall = time.perf_counter() - start
+        print(f"{compute_type:<14}{load:>8.2f}{info.duration:>9.1f}{wall:>9.2f}{wall / info.duration:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
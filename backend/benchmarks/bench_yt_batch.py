@@ -0,0 +1,141 @@
+"""
+Throughput of ingesting a course of YouTube videos:
+    sequential - one /summarize-yt pipeline after another (a client looping)
+    concurrent - every /summarize-yt pipeline at once, each with its own
+                 map batches (10 at a time, 0.5 s pause between batches)
+    batch      - services.yt_batch.run_yt_batch: shared map workers,
+                 cross-video embedding batches, insert_many
+YouTube is a stub list() that sleeps `yt_latency`; the LLM is a stub with
+`llm_latency` per call behind a provider-side cap of `llm_capacity`
+concurrent requests; embeddings use the hashing stand-in; MongoDB is the
+in-memory stand-in. The transcript cache is off so every run fetches.
+
+Usage (from backend/):
+    python benchmarks/bench_yt_batch.py --videos 50 --llm_capacity 16 --llm_latency 1.0
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("INFERENCE_POOL", "0")
+os.environ["YT_TRANSCRIPT_CACHE"] = "0"
+os.environ.setdefault("SMARTNOTES_DATA_DIR", tempfile.mkdtemp(prefix="bench_yt_batch_"))
+
+WORDS = ("quicksort picks a pivot partitions the array around it and recurses on both halves "
+         "while merge sort splits first and merges sorted runs in linear time").split()
+
+
+def install_stubs(args, llm_stats: dict):
+    from types import SimpleNamespace
+    from loadtest import stand_ins
+    stand_ins.install(mongo=True, whisper=False, embeddings=True)
+
+    import youtube_transcript_api
+
+    def fake_list(self, video_id):
+        time.sleep(args.yt_latency)
+        lines = [SimpleNamespace(start=i * 5.0, text=" ".join(WORDS[(i + k) % len(WORDS)] for k in range(14)))
+                 for i in range(int(args.video_minutes * 12))]
+        return SimpleNamespace(find_transcript=lambda languages: SimpleNamespace(fetch=lambda: lines))
+
+    youtube_transcript_api.YouTubeTranscriptApi.list = fake_list
+
+    import services.yt_batch as yt_batch
+    yt_batch.fetch_video_title = lambda url: None
+
+    from services.model_router import model_router
+
+    async def fake_ainvoke(stage, prompt, max_tokens=None, temperature=None):
+        # offered: calls sent to the provider at once; over capacity they'd be rate limited
+        llm_stats["offered"] += 1
+        llm_stats["peak_offered"] = max(llm_stats["peak_offered"], llm_stats["offered"])
+        try:
+            async with llm_stats["capacity"]:
+                llm_stats["calls"] += 1
+                await asyncio.sleep(args.llm_latency)
+                llm_stats["busy"] += args.llm_latency
+        finally:
+            llm_stats["offered"] -= 1
+        return f"{stage} summary of {len(prompt)} characters"
+
+    model_router.ainvoke = fake_ainvoke
+
+    from services.inference_pool import inference_pool
+    embed = inference_pool.embed
+
+    async def counted_embed(texts):
+        llm_stats["embed_calls"] += 1
+        return await embed(texts)
+
+    inference_pool.embed = counted_embed
+
+
+async def one_video(url: str, user_id: str) -> None:
+    """What /summarize-yt does for a URL."""
+    from database.crud import create_note
+    from database.historySchema import NoteModel
+    from services.YT_summarizer import summarize_long_transcript
+    from services.ingestion import build_embeddings
+    from utils.youtube_transcript import aget_transcripts
+
+    transcripts = await aget_transcripts(url)
+    summary = await summarize_long_transcript(transcripts)
+    embeddings = await build_embeddings(" ".join(item["text"] for item in transcripts))
+    await create_note(NoteModel(user_id=user_id, title=url, type="youtube", summary=summary,
+                                transcript=transcripts, source=url, embeddings=embeddings))
+
+
+async def run(mode: str, urls: list, llm_stats: dict, llm_capacity: int) -> None:
+    from services.yt_batch import run_yt_batch
+    llm_stats["capacity"] = asyncio.Semaphore(llm_capacity)
+    if mode == "sequential":
+        for url in urls:
+            await one_video(url, "bench")
+    elif mode == "concurrent":
+        await asyncio.gather(*(one_video(url, "bench") for url in urls))
+    else:
+        await run_yt_batch(urls, "bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs per-video YouTube ingestion throughput.")
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--video_minutes", type=float, default=30)
+    parser.add_argument("--yt_latency", type=float, default=0.3, help="Seconds per stub transcript fetch.")
+    parser.add_argument("--llm_latency", type=float, default=1.0, help="Seconds per stub LLM call.")
+    parser.add_argument("--llm_capacity", type=int, default=16, help="Concurrent LLM calls the provider allows.")
+    parser.add_argument("--modes", default="sequential,concurrent,batch")
+    args = parser.parse_args()
+
+    llm_stats = {"calls": 0, "offered": 0, "peak_offered": 0, "busy": 0.0, "embed_calls": 0}
+    install_stubs(args, llm_stats)
+    import builtins
+    quiet = builtins.print
+
+    print(f"{args.videos} videos x {args.video_minutes:g} min, LLM {args.llm_latency}s/call, "
+          f"capacity {args.llm_capacity}\n")
+    print(f"{'mode':<12}{'wall s':>9}{'videos/min':>12}{'LLM calls':>11}{'LLM util':>10}"
+          f"{'peak offered':>14}{'embed calls':>13}")
+    for mode in args.modes.split(","):
+        llm_stats.update(calls=0, peak_offered=0, busy=0.0, embed_calls=0)
+        urls = [f"https://youtu.be/{mode}-{i}" for i in range(args.videos)]
+        builtins.print = lambda *a, **k: None
+        start = time.perf_counter()
+        try:
+            asyncio.run(run(mode, urls, llm_stats, args.llm_capacity))
+        finally:
+            builtins.print = quiet
+        wall = time.perf_counter() - start
+        utilization = llm_stats["busy"] / (wall * args.llm_capacity)
+        print(f"{mode:<12}{wall:>9.1f}{args.videos / wall * 60:>12.1f}{llm_stats['calls']:>11}"
+              f"{utilization:>10.0%}{llm_stats['peak_offered']:>14}{llm_stats['embed_calls']:>13}")
+
+
+if __name__ == "__main__":
+    main()
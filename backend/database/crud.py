@@ -1,10 +1,39 @@
-from database.config import client
+import os
+import base64
+import asyncio
+from database.config import collection
 from database.historySchema import NoteModel
 from datetime import datetime
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+from database.note_storage import (
+    BLOB_FIELDS, chunks_collection, delete_note_storage, ensure_storage_indexes, load_fields, split_note,
+)
+from utils.timed_transcript import transcript_segments
 
-db = client.notesDB
-notes_collection = db.get_collection("notes")
+# === CONFIG ===
+NOTES_PAGE_SIZE = int(os.getenv("NOTES_PAGE_SIZE", "20"))
+NOTES_PAGE_MAX = int(os.getenv("NOTES_PAGE_MAX", "100"))
+NOTE_PREVIEW_CHARS = int(os.getenv("NOTE_PREVIEW_CHARS", "300"))
+
+notes_collection = collection("notes")
+
+# fields the history list needs; transcripts, page text and embeddings stay in the database
+NOTE_LIST_PROJECTION = {"title": 1, "type": 1, "source": 1, "summary": 1, "created_at": 1}
+# a single note for display; embeddings are only read by /chat
+NOTE_DETAIL_PROJECTION = {"embeddings": 0}
+# what /chat retrieves from: inline embeddings on older notes, else the chunk count
+NOTE_CHAT_PROJECTION = {"embeddings": 1, "embedding_chunks": 1, "content": 1}
+# newest first, with _id breaking ties between notes saved in the same millisecond
+NOTES_ORDER = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+async def ensure_indexes():
+    """Index behind the per-user history listing; safe to call on every startup."""
+    await notes_collection.create_index([("user_id", ASCENDING), *NOTES_ORDER], name="user_created_at")
+    await ensure_storage_indexes()
 
 # Helper to convert MongoDB document to dict
 def note_helper(note) -> dict:
@@ -14,7 +43,7 @@ def note_helper(note) -> dict:
         "title": note.get("title"),
         "type": note.get("type"),
         "summary": note.get("summary"),
-        "transcript": note.get("transcript"),
+        "transcript": transcript_segments(note),
         "media_content": note.get("media_content"),
         "pdf_content": note.get("pdf_content"),
         "chat_content": note.get("chat_content"),
@@ -24,17 +53,127 @@ def note_helper(note) -> dict:
     }
 
 
-# CREATE note
-def create_note(note: NoteModel):
+# CREATE note; embeddings go to the chunk collection and large fields to GridFS
+# (database/note_storage). Pass embedding_chunks when a ChunkWriter already
+# stored the embeddings under note_id. Returns the note as written, without
+# reading it back.
+async def create_note(note: NoteModel, note_id: ObjectId | None = None, embedding_chunks: int | None = None):
+    note_id = note_id or ObjectId()
     note_dict = note.dict(exclude_none=True)
     note_dict["created_at"] = datetime.utcnow()
+    full_note = {**note_dict, "_id": note_id}
+
+    try:
+        blocks = await split_note(note_id, note_dict, embedding_chunks)
+        if blocks:
+            await chunks_collection.insert_many(blocks, ordered=False)
+        await notes_collection.insert_one({**note_dict, "_id": note_id})
+    except Exception:
+        await delete_note_storage(note_id)
+        raise
+
+    return note_helper(full_note)
+
+# CREATE many notes with bulk inserts (batch ingestion); returns the new ids in
+# order. Pass note_ids to choose them. Chunks and blobs of notes that weren't
+# saved are removed; a BulkWriteError is re-raised after that, and the indexes
+# in its details["writeErrors"] say which notes those were.
+async def create_notes(notes: list[NoteModel], note_ids: list[ObjectId] | None = None) -> list[str]:
+    if not notes:
+        return []
+    note_ids = note_ids or [ObjectId() for _ in notes]
+    now = datetime.utcnow()
+    docs = []
+    for note, note_id in zip(notes, note_ids):
+        note_dict = note.dict(exclude_none=True)
+        note_dict["_id"] = note_id
+        note_dict["created_at"] = now
+        docs.append(note_dict)
+
+    try:
+        blocks = [block for note_blocks in await asyncio.gather(*(split_note(d["_id"], d) for d in docs))
+                  for block in note_blocks]
+        if blocks:
+            await chunks_collection.insert_many(blocks, ordered=False)
+    except Exception:
+        await asyncio.gather(*(delete_note_storage(note_id) for note_id in note_ids))
+        raise
+
+    try:
+        await notes_collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # unordered: every note not listed here was saved. A duplicate _id means
+        # the storage under that id belongs to the note already there
+        failed = {error["index"] for error in e.details.get("writeErrors", [])
+                  if not (error.get("code") == 11000 and "_id" in (error.get("keyPattern") or {}))}
+        await asyncio.gather(*(delete_note_storage(note_ids[i]) for i in sorted(failed)))
+        raise
+    except Exception:
+        await asyncio.gather(*(delete_note_storage(note_id) for note_id in note_ids))
+        raise
+    return [str(note_id) for note_id in note_ids]
+
+# Listing row: a summary preview instead of the whole note
+def note_list_helper(note) -> dict:
+    summary = note.get("summary") or ""
+    return {
+        "id": str(note["_id"]),
+        "title": note.get("title"),
+        "type": note.get("type"),
+        "source": note.get("source"),
+        "preview": summary[:NOTE_PREVIEW_CHARS],
+        "created_at": note.get("created_at"),
+    }
+
+
+def encode_cursor(note) -> str:
+    key = f"{note['created_at'].isoformat()}|{note['_id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, note_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(note_id)
+    except (ValueError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+# READ one page of a user's notes, newest first; pass next_cursor back for the page after
+async def get_notes_page(user_id: str, limit: int = NOTES_PAGE_SIZE, cursor: str | None = None) -> dict:
+    limit = max(1, min(limit, NOTES_PAGE_MAX))
+    query = {"user_id": user_id}
+    if cursor:
+        created_at, note_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": note_id}},
+        ]
+    # one extra row tells whether another page exists
+    notes = await notes_collection.find(query, NOTE_LIST_PROJECTION).sort(NOTES_ORDER).limit(limit + 1).to_list()
+    next_cursor = encode_cursor(notes[limit - 1]) if len(notes) > limit else None
+    return {"notes": [note_list_helper(note) for note in notes[:limit]], "next_cursor": next_cursor}
+
+# READ one note of a user, without embeddings
+async def get_note_by_id(note_id: str, user_id: str):
+    try:
+        _id = ObjectId(note_id)
+    except InvalidId:
+        return None
+    note = await notes_collection.find_one({"_id": _id, "user_id": user_id}, NOTE_DETAIL_PROJECTION)
+    return note_helper(await load_fields(note, BLOB_FIELDS)) if note else None
 
-    result = notes_collection.insert_one(note_dict)
-    created_note = notes_collection.find_one({"_id": result.inserted_id})
-    
-    return note_helper(created_note)
+# READ only the transcript fields of one note
+async def get_note_transcript(note_id: str, user_id: str):
+    try:
+        _id = ObjectId(note_id)
+    except InvalidId:
+        return None
+    note = await notes_collection.find_one({"_id": _id, "user_id": user_id},
+                                           {"transcript": 1, "timed_transcript": 1, "blobs": 1})
+    # a note has one of the two
+    return await load_fields(note, ("timed_transcript", "transcript")) if note else None
 
-# READ notes by user_id
-def get_notes_by_user(user_id: str):
-    notes = notes_collection.find({"user_id": user_id}).sort("created_at", -1)
-    return [note_helper(note) for note in notes]
+# READ what /chat retrieves from
+async def get_note_for_chat(note_id: str):
+    return await notes_collection.find_one({"_id": ObjectId(note_id)}, NOTE_CHAT_PROJECTION)
@@ -0,0 +1,152 @@
+"""
+zstd compression for the large text fields of a note (transcript,
+timed_transcript, pdf_content, media_content). database/note_storage
+compresses a field's JSON once it is over NOTE_COMPRESS_MIN_KB, whether the
+field then stays inline in the note (as a binary value) or goes to GridFS,
+and load_fields decompresses only the fields a read asks for.
+
+New frames use the newest dictionary trained on our own notes
+(python -m database.train_zstd_dictionary), which is what makes fields of a
+few KB compress well. Each frame records the id of its dictionary, and
+every dictionary is kept, so anything written earlier stays readable.
+"""
+import os
+import time
+import asyncio
+from typing import Dict, List
+
+import zstandard as zstd
+from bson.binary import Binary
+
+from database.config import collection
+
+# === CONFIG ===
+NOTE_COMPRESSION = os.getenv("NOTE_COMPRESSION", "1") == "1"  # 0: new writes stay plain JSON
+NOTE_COMPRESS_MIN_BYTES = int(os.getenv("NOTE_COMPRESS_MIN_KB", "2")) * 1024
+NOTE_ZSTD_LEVEL = int(os.getenv("NOTE_ZSTD_LEVEL", "3"))
+NOTE_ZSTD_DICT_KB = int(os.getenv("NOTE_ZSTD_DICT_KB", "112"))
+# fields at least this big are (de)compressed in a worker thread so the event
+# loop keeps serving requests; zstd releases the GIL while it works
+NOTE_CODEC_THREAD_MIN_BYTES = int(os.getenv("NOTE_CODEC_THREAD_MIN_KB", "256")) * 1024
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# BSON binary subtype for compressed values kept inline (user-defined range)
+ZSTD_SUBTYPE = 0x80
+
+dictionaries_collection = collection("zstd_dictionaries")
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, bytes) and value[:4] == ZSTD_MAGIC
+
+
+def inline_value(frame: bytes) -> Binary:
+    return Binary(frame, ZSTD_SUBTYPE)
+
+
+def train_dictionary(samples: List[bytes], size_kb: int = NOTE_ZSTD_DICT_KB) -> bytes:
+    """A zstd dictionary from sample field JSON; its id is random, so ids don't collide."""
+    return zstd.train_dictionary(size_kb * 1024, samples, level=NOTE_ZSTD_LEVEL).as_bytes()
+
+
+class FieldCodec:
+    """
+    Compresses with the newest stored dictionary (plain zstd until one is
+    trained) and decompresses with whichever dictionary a frame names.
+    Dictionaries are read on first use, and again when a frame names one
+    trained after that.
+    """
+
+    def __init__(self, level: int = NOTE_ZSTD_LEVEL):
+        self.level = level
+        self.dict_id = 0
+        self._dictionaries: Dict[int, zstd.ZstdCompressionDict] = {}
+        self._compressor = zstd.ZstdCompressor(level=level)
+        self._decompressors: Dict[int, zstd.ZstdDecompressor] = {0: zstd.ZstdDecompressor()}
+        self._loaded = False
+
+        self.encoded = 0
+        self.encoded_bytes = 0
+        self.compressed_bytes = 0
+        self.encode_seconds = 0.0
+        self.decoded = 0
+        self.decoded_bytes = 0
+        self.decode_seconds = 0.0
+
+    async def load(self) -> None:
+        """Read the stored dictionaries; the newest one compresses new writes."""
+        newest = None
+        async for doc in dictionaries_collection.find({}).sort("created_at", 1):
+            newest = self.add_dictionary(bytes(doc["data"]))
+        if newest is not None:
+            self.use(newest)
+        self._loaded = True
+
+    def add_dictionary(self, data: bytes) -> int:
+        dictionary = zstd.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=self.level)
+        dict_id = dictionary.dict_id()
+        self._dictionaries[dict_id] = dictionary
+        self._decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=dictionary)
+        return dict_id
+
+    def use(self, dict_id: int) -> None:
+        dictionary = self._dictionaries.get(dict_id) if dict_id else None
+        self._compressor = zstd.ZstdCompressor(level=self.level, dict_data=dictionary)
+        self.dict_id = dict_id if dictionary else 0
+
+    async def compress(self, data: bytes) -> bytes:
+        if not self._loaded:
+            await self.load()
+        start = time.perf_counter()
+        if len(data) >= NOTE_CODEC_THREAD_MIN_BYTES:
+            # a ZstdCompressor isn't safe to share between threads; use one for this call
+            compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._dictionaries.get(self.dict_id))
+            frame = await asyncio.to_thread(compressor.compress, data)
+        else:
+            frame = self._compressor.compress(data)
+        self.encode_seconds += time.perf_counter() - start
+        self.encoded += 1
+        self.encoded_bytes += len(data)
+        self.compressed_bytes += len(frame)
+        return frame
+
+    async def decompress(self, frame: bytes) -> bytes:
+        dict_id = zstd.get_frame_parameters(frame).dict_id
+        if dict_id not in self._decompressors:
+            await self.load()  # trained since this process last read them
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            raise ValueError(f"zstd dictionary {dict_id} is not stored")
+        start = time.perf_counter()
+        if len(frame) >= NOTE_CODEC_THREAD_MIN_BYTES // 4:
+            # compressed size; the text it expands to is several times larger
+            decompressor = self._thread_decompressor(dict_id)
+            data = await asyncio.to_thread(decompressor.decompress, frame)
+        else:
+            data = decompressor.decompress(frame)
+        self.decode_seconds += time.perf_counter() - start
+        self.decoded += 1
+        self.decoded_bytes += len(data)
+        return data
+
+    def _thread_decompressor(self, dict_id: int) -> zstd.ZstdDecompressor:
+        dictionary = self._dictionaries.get(dict_id)
+        return zstd.ZstdDecompressor(dict_data=dictionary) if dictionary else zstd.ZstdDecompressor()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": NOTE_COMPRESSION,
+            "dictionary_id": self.dict_id,
+            "dictionaries": len(self._dictionaries),
+            "encoded": self.encoded,
+            "encoded_mb": round(self.encoded_bytes / 1e6, 3),
+            "compressed_mb": round(self.compressed_bytes / 1e6, 3),
+            "ratio": round(self.encoded_bytes / self.compressed_bytes, 2) if self.compressed_bytes else None,
+            "encode_mb_s": round(self.encoded_bytes / 1e6 / self.encode_seconds, 1) if self.encode_seconds else None,
+            "decoded": self.decoded,
+            "decode_mb_s": round(self.decoded_bytes / 1e6 / self.decode_seconds, 1) if self.decode_seconds else None,
+        }
+
+
+field_codec = FieldCodec()
@@ -8,6 +8,8 @@ class NoteModel(BaseModel):
     type: str | None
     summary: str
     transcript: Optional[list[Dict[str, Any]] ] = None
+    # packed, time-indexed form of transcript (utils.timed_transcript); replaces it when set
+    timed_transcript: Optional[Dict[str, Any]] = None
     media_content: Optional[list[Dict[str, Any]] ] = None
     pdf_content: Optional[list[str]] = None
     source: str
@@ -17,3 +19,15 @@ class NoteModel(BaseModel):
 class NoteResponseModel(NoteModel):
     id: str
     created_at: datetime
+
+class NoteListItemModel(BaseModel):
+    id: str
+    title: str | None
+    type: str | None
+    source: str | None
+    preview: str
+    created_at: datetime
+
+class NotePageModel(BaseModel):
+    notes: List[NoteListItemModel]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,355 @@
+"""
+In-process MongoDB backend (MONGO_BACKEND=memory): collections, cursors and
+GridFS buckets kept in dicts, with the subset of the pymongo API the app
+uses. The async classes wait MONGO_MEMORY_LATENCY_MS per operation while
+holding one of the client's pooled connections, so round trips and pool
+sizing show up in benchmarks the way they do against a real server.
+Nothing is persisted; a fresh client starts empty.
+"""
+import io
+import os
+import types
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# === CONFIG ===
+# round trip each async operation waits, like the network to Atlas would
+MONGO_MEMORY_LATENCY_MS = float(os.getenv("MONGO_MEMORY_LATENCY_MS", "0"))
+
+
+# ---- synchronous API ----
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+def _project(doc: Dict[str, Any], projection) -> Dict[str, Any]:
+    if not projection:
+        return dict(doc)
+    if any(projection.values()):
+        return {k: v for k, v in doc.items() if k == "_id" or projection.get(k)}
+    return {k: v for k, v in doc.items() if k not in projection}
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, expected in (query or {}).items():
+        if key == "$or":
+            if not any(_matches(doc, clause) for clause in expected):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(expected, dict):
+            for op, operand in expected.items():
+                if op == "$lt" and not (value is not None and value < operand):
+                    return False
+                if op == "$gt" and not (value is not None and value > operand):
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$exists" and (key in doc) != bool(operand):
+                    return False
+        elif value != expected:
+            return False
+    return True
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = docs
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        # stable sorts, least significant key first
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: d.get(field), reverse=order < 0)
+        return self
+
+    def limit(self, n: int):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class InMemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def insert_one(self, doc: Dict[str, Any]) -> InsertOneResult:
+        with self._lock:
+            doc.setdefault("_id", ObjectId())
+            if doc["_id"] in self._docs:
+                raise DuplicateKeyError(f"E11000 duplicate key error _id: {doc['_id']}", 11000,
+                                        {"keyPattern": {"_id": 1}, "keyValue": {"_id": doc["_id"]}})
+            self._docs[doc["_id"]] = dict(doc)
+            return InsertOneResult(doc["_id"])
+
+    def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True) -> InsertManyResult:
+        # failures are reported the way the server does: by index, after the
+        # rest of an unordered batch has gone in
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            try:
+                inserted.append(self.insert_one(doc).inserted_id)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e), "op": doc, **e.details})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted)})
+        return InsertManyResult(inserted)
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None, projection=None):
+        with self._lock:
+            for doc in self._docs.values():
+                if _matches(doc, query or {}):
+                    return _project(doc, projection)
+        return None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection=None) -> InMemoryCursor:
+        with self._lock:
+            return InMemoryCursor([_project(d, projection) for d in self._docs.values() if _matches(d, query or {})])
+
+    def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        with self._lock:
+            for doc in self._docs.values():
+                if _matches(doc, query):
+                    doc.update(update.get("$set", {}))
+                    for key in update.get("$unset", {}):
+                        doc.pop(key, None)
+                    return
+
+    def delete_many(self, query: Dict[str, Any]) -> None:
+        with self._lock:
+            for _id in [_id for _id, doc in self._docs.items() if _matches(doc, query)]:
+                del self._docs[_id]
+
+    def create_index(self, keys, **kwargs) -> str:
+        return "_".join(f"{k}_{d}" for k, d in keys) if isinstance(keys, list) else str(keys)
+
+
+class InMemoryGridFSBucket:
+    """gridfs.GridFSBucket over a dict kept on the database."""
+
+    def __init__(self, db, bucket_name: str = "fs", **kwargs):
+        self._files = db._buckets.setdefault(bucket_name, {})
+
+    def upload_from_stream(self, filename: str, source, metadata=None) -> ObjectId:
+        file_id = ObjectId()
+        data = source if isinstance(source, bytes) else source.read()
+        self._files[file_id] = types.SimpleNamespace(_id=file_id, filename=filename, metadata=metadata or {},
+                                                     length=len(data), data=data)
+        return file_id
+
+    def open_download_stream(self, file_id):
+        if file_id not in self._files:
+            raise KeyError(f"no file with id {file_id}")
+        return io.BytesIO(self._files[file_id].data)
+
+    def find(self, query: Optional[Dict[str, Any]] = None):
+        def flat(f):
+            return {"_id": f._id, "filename": f.filename, **{f"metadata.{k}": v for k, v in f.metadata.items()}}
+        return [f for f in list(self._files.values()) if _matches(flat(f), query or {})]
+
+    def delete(self, file_id) -> None:
+        self._files.pop(file_id, None)
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, InMemoryCollection] = {}
+        self._buckets: Dict[str, Dict[Any, Any]] = {}
+
+    def get_collection(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        return self.get_collection(name)
+
+
+class InMemoryClient:
+    def __init__(self):
+        self._databases: Dict[str, InMemoryDatabase] = {}
+        self.admin = types.SimpleNamespace(command=lambda *a, **k: {"ok": 1})
+
+    def __getattr__(self, name: str) -> InMemoryDatabase:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase()
+        return self._databases[name]
+
+
+# ---- async API ----
+
+
+
+class AsyncInMemoryCursor:
+    def __init__(self, client: "AsyncInMemoryClient", cursor: InMemoryCursor):
+        self._client = client
+        self._cursor = cursor
+
+    def sort(self, key, direction: int = 1):
+        self._cursor.sort(key, direction)
+        return self
+
+    def limit(self, n: int):
+        self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        async with self._client.connection():
+            docs = list(self._cursor)
+        return docs[:length] if length else docs
+
+    async def __aiter__(self):
+        for doc in await self.to_list():
+            yield doc
+
+
+class AsyncInMemoryCollection:
+    """AsyncCollection over an InMemoryCollection; every call is one round trip on a pooled connection."""
+
+    def __init__(self, client: "AsyncInMemoryClient", collection: InMemoryCollection):
+        self._client = client
+        self._sync = collection
+        self.name = collection.name
+
+    async def _call(self, method: str, *args, **kwargs):
+        async with self._client.connection():
+            return getattr(self._sync, method)(*args, **kwargs)
+
+    async def insert_one(self, doc, **kwargs):
+        return await self._call("insert_one", doc)
+
+    async def insert_many(self, docs, ordered: bool = True, **kwargs):
+        return await self._call("insert_many", docs, ordered)
+
+    async def find_one(self, query=None, projection=None, **kwargs):
+        return await self._call("find_one", query, projection)
+
+    def find(self, query=None, projection=None, **kwargs) -> AsyncInMemoryCursor:
+        return AsyncInMemoryCursor(self._client, self._sync.find(query, projection))
+
+    async def update_one(self, query, update, **kwargs):
+        return await self._call("update_one", query, update)
+
+    async def delete_many(self, query, **kwargs):
+        return await self._call("delete_many", query)
+
+    async def create_index(self, keys, **kwargs):
+        return await self._call("create_index", keys, **kwargs)
+
+    async def bulk_write(self, requests, ordered: bool = True, **kwargs):
+        # UpdateOne / InsertOne keep their arguments in private attributes
+        async with self._client.connection():
+            for request in requests:
+                if hasattr(request, "_filter"):
+                    self._sync.update_one(request._filter, request._doc)
+                else:
+                    self._sync.insert_one(request._doc)
+        return types.SimpleNamespace(acknowledged=True)
+
+
+class AsyncInMemoryDatabase:
+    def __init__(self, client: "AsyncInMemoryClient", db: InMemoryDatabase):
+        self._client = client
+        self._sync = db
+        self._buckets = db._buckets
+
+    def get_collection(self, name: str) -> AsyncInMemoryCollection:
+        return AsyncInMemoryCollection(self._client, self._sync.get_collection(name))
+
+    def __getattr__(self, name: str) -> AsyncInMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+
+class AsyncInMemoryGridFSBucket:
+    """gridfs.AsyncGridFSBucket counterpart of InMemoryGridFSBucket."""
+
+    def __init__(self, db: AsyncInMemoryDatabase, bucket_name: str = "fs", **kwargs):
+        self._client = db._client
+        self._sync = InMemoryGridFSBucket(db, bucket_name)
+
+    async def upload_from_stream(self, filename: str, source, metadata=None) -> ObjectId:
+        async with self._client.connection():
+            return self._sync.upload_from_stream(filename, source, metadata)
+
+    async def open_download_stream(self, file_id):
+        async with self._client.connection():
+            data = self._sync.open_download_stream(file_id).read()
+
+        async def read(size: int = -1) -> bytes:
+            return data
+
+        return types.SimpleNamespace(_id=file_id, length=len(data), read=read)
+
+    async def find(self, query: Optional[Dict[str, Any]] = None):
+        async with self._client.connection():
+            files = self._sync.find(query)
+        for file in files:
+            yield file
+
+    async def delete(self, file_id) -> None:
+        async with self._client.connection():
+            self._sync.delete(file_id)
+
+
+class AsyncInMemoryClient:
+    """
+    AsyncMongoClient stand-in: operations wait `latency_ms` while holding one
+    of `max_pool_size` connections, so pool sizing and round trips show up
+    in throughput the way they do against a real server.
+    """
+
+    def __init__(self, latency_ms: float = MONGO_MEMORY_LATENCY_MS, max_pool_size: int = 100):
+        self._sync = InMemoryClient()
+        self._latency = latency_ms / 1000
+        self._max_pool_size = max_pool_size
+        self._pools: Dict[Any, asyncio.Semaphore] = {}
+        self.admin = types.SimpleNamespace(command=self._command)
+
+    async def _command(self, *args, **kwargs):
+        async with self.connection():
+            return {"ok": 1}
+
+    @asynccontextmanager
+    async def connection(self):
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = asyncio.Semaphore(self._max_pool_size)
+        async with pool:
+            if self._latency:
+                await asyncio.sleep(self._latency)
+            yield
+
+    def __getattr__(self, name: str) -> AsyncInMemoryDatabase:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return AsyncInMemoryDatabase(self, getattr(self._sync, name))
+
+    def get_database(self, name: str) -> AsyncInMemoryDatabase:
+        return getattr(self, name)
+
+    async def close(self) -> None:
+        pass
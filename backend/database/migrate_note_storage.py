@@ -0,0 +1,118 @@
+"""
+Move embeddings and large fields of notes saved before database/note_storage
+out of their documents: embeddings into note_chunks, and transcript /
+timed_transcript / pdf_content / media_content compressed
+(database/field_codec), into the note_blobs GridFS bucket when still
+oversized. Notes are processed in _id order and each is rewritten only after
+its chunks and blobs are stored, so the tool can be stopped and re-run.
+Each batch is written with one insert_many for the chunks and one
+bulk_write for the notes.
+
+Usage (from backend/):
+    python -m database.migrate_note_storage --dry-run
+    python -m database.migrate_note_storage --batch 100 [--limit 1000]
+"""
+import time
+import asyncio
+import argparse
+
+import bson
+from pymongo import UpdateOne
+
+from database.crud import notes_collection
+from database.note_storage import (
+    BLOB_FIELDS, chunks_collection, delete_note_storage, pack_fields, split_note,
+)
+from database.field_codec import is_compressed
+
+PENDING = {"storage": {"$exists": False}}
+
+
+async def slim_size(note) -> int:
+    """BSON size the note would have after migration, without writing anything."""
+    doc = {k: v for k, v in note.items() if k != "embeddings"}
+    await pack_fields(doc)
+    return len(bson.encode(doc))
+
+
+async def prepare_note(note):
+    """Store one note's chunks and blobs; returns its chunk blocks and note update."""
+    note_id = note["_id"]
+    # leftovers of an interrupted run
+    await delete_note_storage(note_id)
+
+    doc = dict(note)
+    blocks = await split_note(note_id, doc)
+    expected = sum(1 for r in note.get("embeddings") or [] if isinstance(r, dict) and "embedding" in r)
+    if sum(block["count"] for block in blocks) != expected:
+        await delete_note_storage(note_id)
+        raise RuntimeError(f"chunk count mismatch for note {note_id}")
+
+    moved = [field for field in ("embeddings", *BLOB_FIELDS) if field in note and field not in doc]
+    packed = [field for field in BLOB_FIELDS if is_compressed(doc.get(field))]
+    update = {"$set": {k: doc[k] for k in ("embedding_chunks", "blobs", "storage", *packed) if k in doc}}
+    if moved:
+        update["$unset"] = {field: "" for field in moved}
+    return blocks, UpdateOne({"_id": note_id, **PENDING}, update), len(bson.encode(doc))
+
+
+async def migrate_batch(notes):
+    """
+    Chunks of the whole batch in one insert_many, then every note rewritten
+    in one bulk_write; a note is only rewritten once its data is stored.
+    """
+    prepared = await asyncio.gather(*(prepare_note(note) for note in notes), return_exceptions=True)
+    blocks, updates, sizes, failed = [], [], {}, []
+    for note, result in zip(notes, prepared):
+        if isinstance(result, Exception):
+            failed.append((note["_id"], result))
+            continue
+        blocks.extend(result[0])
+        updates.append(result[1])
+        sizes[note["_id"]] = result[2]
+    if blocks:
+        await chunks_collection.insert_many(blocks, ordered=False)
+    if updates:
+        await notes_collection.bulk_write(updates, ordered=False)
+    return sizes, failed
+
+
+async def run(args):
+    started = time.perf_counter()
+    done = failed = bytes_before = bytes_after = 0
+    last_id = None
+    while not args.limit or done + failed < args.limit:
+        query = dict(PENDING, **({"_id": {"$gt": last_id}} if last_id else {}))
+        size = min(args.batch, args.limit - done - failed) if args.limit else args.batch
+        notes = await notes_collection.find(query).sort("_id", 1).limit(size).to_list()
+        if not notes:
+            break
+        last_id = notes[-1]["_id"]
+        before = {note["_id"]: len(bson.encode(note)) for note in notes}
+        if args.dry_run:
+            sizes, errors = {note["_id"]: await slim_size(note) for note in notes}, []
+        else:
+            sizes, errors = await migrate_batch(notes)
+        for note_id, error in errors:
+            print(f"⚠ Note {note_id}: {str(error)}")
+        done += len(sizes)
+        failed += len(errors)
+        bytes_before += sum(before[note_id] for note_id in sizes)
+        bytes_after += sum(sizes.values())
+        print(f"  {done} notes {'checked' if args.dry_run else 'migrated'}, {failed} failed")
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ {'Would migrate' if args.dry_run else 'Migrated'} {done} notes in {elapsed:.1f}s "
+          f"({failed} failed): note documents {bytes_before / 1e6:.1f} MB -> {bytes_after / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move note embeddings and large fields to chunk/blob storage.")
+    parser.add_argument("--batch", type=int, default=100, help="Notes read and written per round.")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many notes (0: all).")
+    parser.add_argument("--dry-run", action="store_true", help="Report sizes without writing.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
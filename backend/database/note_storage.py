@@ -0,0 +1,209 @@
+"""
+Storage for the bulky parts of a note, kept out of the note document:
+
+    notes          title, summary, source, ... plus references below
+    note_chunks    embedding chunks, one document per block of up to
+                   NOTE_CHUNK_BLOCK_SIZE chunks: texts and float32 vectors
+                   packed in one binary field
+    note_blobs     GridFS bucket; transcript / timed_transcript / pdf_content /
+                   media_content when their stored form is larger than
+                   NOTE_INLINE_MAX_KB (smaller ones stay inline)
+
+Those four fields are stored as zstd-compressed JSON once they are over
+NOTE_COMPRESS_MIN_KB, inline or in GridFS (database/field_codec), and are
+decompressed by load_fields only when a read asks for them.
+
+The note records `embedding_chunks` (how many were stored) and `blobs`
+({field: file id}), so listing, detail, transcript and chat reads each
+fetch only what they use, and a long source no longer runs into the 16 MB
+document limit. Notes saved before this layout keep their inline fields
+and are read as before until migrated (database/migrate_note_storage.py).
+"""
+import os
+import json
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from pymongo import ASCENDING
+
+from database.config import bucket, collection
+from database.field_codec import NOTE_COMPRESS_MIN_BYTES, NOTE_COMPRESSION, field_codec, inline_value, is_compressed
+
+# === CONFIG ===
+NOTE_CHUNK_BLOCK_SIZE = int(os.getenv("NOTE_CHUNK_BLOCK_SIZE", "64"))
+NOTE_INLINE_MAX_BYTES = int(os.getenv("NOTE_INLINE_MAX_KB", "64")) * 1024
+
+BLOB_FIELDS = ("transcript", "timed_transcript", "pdf_content", "media_content")
+# set on notes written in this layout; older notes don't have it
+STORAGE_VERSION = 2
+
+chunks_collection = collection("note_chunks")
+blob_bucket = bucket("note_blobs")
+
+
+async def ensure_storage_indexes():
+    await chunks_collection.create_index([("note_id", ASCENDING), ("seq", ASCENDING)], name="note_seq", unique=True)
+
+
+# ---- embedding chunks ----
+
+def _as_vector(raw) -> List[float]:
+    # notes imported from extended JSON carry {"$numberDouble": "..."} values
+    return [float(v["$numberDouble"]) if isinstance(v, dict) else float(v) for v in raw]
+
+
+def chunk_blocks(note_id: ObjectId, records: List[Dict[str, Any]], first_seq: int = 0) -> List[Dict[str, Any]]:
+    """Block documents for embedding records ({"text", "embedding"})."""
+    blocks = []
+    for start in range(0, len(records), NOTE_CHUNK_BLOCK_SIZE):
+        block = records[start:start + NOTE_CHUNK_BLOCK_SIZE]
+        vectors = np.asarray([_as_vector(r["embedding"]) for r in block], dtype=np.float32)
+        blocks.append({
+            "note_id": note_id,
+            "seq": first_seq + len(blocks),
+            "count": len(block),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "texts": [r.get("text", "") for r in block],
+            "vectors": Binary(vectors.tobytes()),
+        })
+    return blocks
+
+
+class ChunkWriter:
+    """Writes embedding records as they are produced (streaming_pipeline's embeddings_sink)."""
+
+    def __init__(self, note_id: ObjectId):
+        self.note_id = note_id
+        self.pending: List[Dict[str, Any]] = []
+        self.blocks = 0
+        self.count = 0
+
+    async def add(self, records: List[Dict[str, Any]]) -> None:
+        self.pending.extend(records)
+        if len(self.pending) >= NOTE_CHUNK_BLOCK_SIZE:
+            await self._write(len(self.pending) - len(self.pending) % NOTE_CHUNK_BLOCK_SIZE)
+
+    async def close(self) -> int:
+        if self.pending:
+            await self._write(len(self.pending))
+        return self.count
+
+    async def _write(self, n: int) -> None:
+        records, self.pending = self.pending[:n], self.pending[n:]
+        blocks = chunk_blocks(self.note_id, records, first_seq=self.blocks)
+        self.blocks += len(blocks)
+        await chunks_collection.insert_many(blocks, ordered=False)
+        self.count += len(records)
+
+
+async def load_embeddings(note: Dict[str, Any]) -> Tuple[List[str], Optional[np.ndarray]]:
+    """Chunk texts and an (n, dim) float32 matrix; from inline embeddings on older notes."""
+    if note.get("embedding_chunks"):
+        texts, matrices = [], []
+        async for block in chunks_collection.find({"note_id": note["_id"]}).sort("seq", 1):
+            texts.extend(block["texts"])
+            matrices.append(np.frombuffer(block["vectors"], dtype=np.float32).reshape(block["count"], block["dim"]))
+        return texts, (np.vstack(matrices) if matrices else None)
+
+    records = [r for r in note.get("embeddings") or [] if isinstance(r, dict) and "embedding" in r]
+    if not records:
+        return [], None
+    vectors = [_as_vector(r["embedding"]) for r in records]
+    dim = len(vectors[0])
+    kept = [(r.get("text", ""), v) for r, v in zip(records, vectors) if len(v) == dim]
+    return [t for t, _ in kept], np.asarray([v for _, v in kept], dtype=np.float32)
+
+
+# ---- large fields ----
+
+async def save_blob(note_id: ObjectId, field: str, data: bytes) -> ObjectId:
+    encoding = "json+zstd" if is_compressed(data) else "json"
+    return await blob_bucket.upload_from_stream(f"{note_id}/{field}", data,
+                                                metadata={"note_id": note_id, "field": field, "encoding": encoding})
+
+
+def encode_field(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+async def pack_field(value) -> bytes:
+    """Stored form of a field: its JSON, zstd-compressed when over NOTE_COMPRESS_MIN_KB."""
+    data = encode_field(value)
+    if NOTE_COMPRESSION and len(data) > NOTE_COMPRESS_MIN_BYTES:
+        return await field_codec.compress(data)
+    return data
+
+
+async def unpack_field(data: bytes):
+    if is_compressed(data):
+        data = await field_codec.decompress(data)
+    return json.loads(data)
+
+
+async def pack_fields(doc: Dict[str, Any]) -> Dict[str, bytes]:
+    """Compress BLOB_FIELDS of doc in place; removes and returns the ones still over the inline limit."""
+    large = {}
+    for field in BLOB_FIELDS:
+        if doc.get(field) is None:
+            continue
+        data = await pack_field(doc[field])
+        if len(data) > NOTE_INLINE_MAX_BYTES:
+            large[field] = data
+            del doc[field]
+        elif is_compressed(data):
+            doc[field] = inline_value(data)
+    return large
+
+
+async def offload_fields(note_id: ObjectId, doc: Dict[str, Any]) -> Dict[str, ObjectId]:
+    """pack_fields, then the large ones to GridFS; returns their file ids."""
+    large = await pack_fields(doc)
+    file_ids = await asyncio.gather(*(save_blob(note_id, field, data) for field, data in large.items()))
+    return dict(zip(large, file_ids))
+
+
+async def load_field(file_id: ObjectId):
+    stream = await blob_bucket.open_download_stream(file_id)
+    return await unpack_field(await stream.read())
+
+
+async def load_fields(note: Dict[str, Any], fields: Iterable[str] = BLOB_FIELDS) -> Dict[str, Any]:
+    """Fill in the requested fields that were moved to GridFS or compressed inline."""
+    blobs = note.get("blobs") or {}
+    wanted = [field for field in fields if field in blobs and field not in note]
+    packed = [field for field in fields if is_compressed(note.get(field))]
+    values = await asyncio.gather(*(load_field(blobs[f]) for f in wanted),
+                                  *(unpack_field(note[f]) for f in packed))
+    for field, value in zip(wanted + packed, values):
+        note[field] = value
+    return note
+
+
+# ---- whole notes ----
+
+async def split_note(note_id: ObjectId, doc: Dict[str, Any],
+                     embedding_chunks: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Slim doc down for the notes collection in place: large fields go to
+    GridFS now, and the returned chunk blocks are for the caller to insert
+    (one insert_many for a whole batch). embedding_chunks is for chunks
+    already written by a ChunkWriter.
+    """
+    records = doc.pop("embeddings", None) or []
+    blocks = chunk_blocks(note_id, records) if records else []
+    if records or embedding_chunks:
+        doc["embedding_chunks"] = len(records) or embedding_chunks
+    blobs = await offload_fields(note_id, doc)
+    if blobs:
+        doc["blobs"] = blobs
+    doc["storage"] = STORAGE_VERSION
+    return blocks
+
+
+async def delete_note_storage(note_id: ObjectId) -> None:
+    await chunks_collection.delete_many({"note_id": note_id})
+    async for file in blob_bucket.find({"metadata.note_id": note_id}):
+        await blob_bucket.delete(file._id)
@@ -0,0 +1,94 @@
+"""
+Train a zstd dictionary on the large text fields of recent notes and store
+it in the zstd_dictionaries collection; new writes use it once the API
+process next loads dictionaries (on restart). Every tenth note is held out
+and reported with and without the dictionary, so a dictionary that doesn't
+help can be left unsaved (--dry-run).
+
+Usage (from backend/):
+    python -m database.train_zstd_dictionary --notes 1000 --dry-run
+    python -m database.train_zstd_dictionary --notes 1000 [--size_kb 112]
+"""
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+import zstandard as zstd
+from bson.binary import Binary
+
+from database.crud import notes_collection
+from database.field_codec import NOTE_ZSTD_DICT_KB, NOTE_ZSTD_LEVEL, dictionaries_collection, train_dictionary
+from database.note_storage import BLOB_FIELDS, encode_field, load_fields
+
+# training works on samples of a few KB, the size where a dictionary matters most
+SAMPLE_BYTES = 8 * 1024
+
+
+def split_samples(data: bytes):
+    return [data[i:i + SAMPLE_BYTES] for i in range(0, len(data), SAMPLE_BYTES)]
+
+
+def measure(compressor: zstd.ZstdCompressor, decompressor: zstd.ZstdDecompressor, fields):
+    raw = packed = 0
+    encode_s = decode_s = 0.0
+    for data in fields:
+        start = time.perf_counter()
+        frame = compressor.compress(data)
+        encode_s += time.perf_counter() - start
+        start = time.perf_counter()
+        decompressor.decompress(frame)
+        decode_s += time.perf_counter() - start
+        raw += len(data)
+        packed += len(frame)
+    return raw / packed, raw / 1e6 / encode_s, raw / 1e6 / decode_s
+
+
+async def run(args):
+    projection = {field: 1 for field in (*BLOB_FIELDS, "blobs")}
+    notes = await notes_collection.find({}, projection).sort("_id", -1).limit(args.notes).to_list()
+    train, held_out = [], []
+    for i, note in enumerate(notes):
+        await load_fields(note)
+        fields = [encode_field(note[f]) for f in BLOB_FIELDS if note.get(f) is not None]
+        (held_out if i % 10 == 9 else train).extend(fields)
+    samples = [sample for data in train for sample in split_samples(data)]
+    if len(samples) < 100:
+        print(f"⚠ Only {len(samples)} samples from {len(notes)} notes; not enough to train a dictionary")
+        return
+
+    start = time.perf_counter()
+    data = train_dictionary(samples, args.size_kb)
+    dictionary = zstd.ZstdCompressionDict(data)
+    print(f"✓ Trained dictionary {dictionary.dict_id()} ({len(data) / 1024:.0f} KB) on {len(samples)} samples "
+          f"from {len(notes)} notes in {time.perf_counter() - start:.1f}s")
+
+    held_out = held_out or train
+    print(f"\n{'held-out fields':<18}{'ratio':>8}{'encode MB/s':>13}{'decode MB/s':>13}")
+    for label, compressor, decompressor in (
+        ("plain zstd", zstd.ZstdCompressor(level=NOTE_ZSTD_LEVEL), zstd.ZstdDecompressor()),
+        ("with dictionary", zstd.ZstdCompressor(level=NOTE_ZSTD_LEVEL, dict_data=dictionary),
+         zstd.ZstdDecompressor(dict_data=dictionary)),
+    ):
+        ratio, encode_mb_s, decode_mb_s = measure(compressor, decompressor, held_out)
+        print(f"{label:<18}{ratio:>8.2f}{encode_mb_s:>13.0f}{decode_mb_s:>13.0f}")
+
+    if args.dry_run:
+        return
+    await dictionaries_collection.insert_one({
+        "_id": dictionary.dict_id(), "data": Binary(data), "samples": len(samples),
+        "level": NOTE_ZSTD_LEVEL, "created_at": datetime.utcnow(),
+    })
+    print(f"\n✓ Stored dictionary {dictionary.dict_id()}; restart the API to compress new notes with it")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the zstd dictionary for note field compression.")
+    parser.add_argument("--notes", type=int, default=1000, help="Most recent notes to sample.")
+    parser.add_argument("--size_kb", type=int, default=NOTE_ZSTD_DICT_KB)
+    parser.add_argument("--dry-run", action="store_true", help="Report the held-out ratios without storing.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Load generator for the SmartNotes API.
+Drives /summarize-yt, /summarize-pdf, /chat and /notes/ with a weighted
+mix and reports throughput and p50/p95/p99 latency per endpoint.
+
+Usage (from backend/):
+    python loadtest/loadgen.py --base_url http://127.0.0.1:8000 --duration 60 --concurrency 16
+"""
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+WORDS = (
+    "gradient descent minimizes the loss function by moving parameters against the gradient "
+    "learning rate controls the step size while momentum smooths noisy updates and regularization "
+    "prevents overfitting on the training data the validation set measures generalization"
+).split()
+
+QUESTIONS = [
+    "What does the learning rate control?",
+    "How does momentum help gradient descent?",
+    "What is the purpose of regularization?",
+    "Why do we use a validation set?",
+]
+
+
+def synthetic_transcript(minutes: int) -> List[Dict[str, str]]:
+    rng = random.Random(minutes)
+    return [
+        {"time": f"{m * 2}:00", "text": " ".join(rng.choice(WORDS) for _ in range(250))}
+        for m in range(minutes // 2 or 1)
+    ]
+
+
+def synthetic_pdf(pages: int, words_per_page: int = 300) -> bytes:
+    """Build a minimal valid multi-page PDF with Helvetica text, no dependencies."""
+    rng = random.Random(pages)
+    objects: List[bytes] = []
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        lines = []
+        words = [rng.choice(WORDS) for _ in range(words_per_page)]
+        for row in range(0, len(words), 12):
+            lines.append(" ".join(words[row:row + 12]))
+        text_ops = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = text_ops.encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {page_ids[i] + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.note_ids: List[str] = []
+        self.users = [f"loadtest-user-{i}" for i in range(args.users)]
+        self.pdf_bytes = synthetic_pdf(args.pdf_pages)
+        self.transcript = synthetic_transcript(args.transcript_minutes)
+
+    async def _timed(self, name: str, request) -> dict:
+        start = time.perf_counter()
+        try:
+            response = await request
+            elapsed = time.perf_counter() - start
+            data = response.json()
+            failed = response.status_code >= 400 or (isinstance(data, dict) and "error" in data)
+        except Exception:
+            elapsed = time.perf_counter() - start
+            data, failed = {}, True
+        self.latencies[name].append(elapsed)
+        if failed:
+            self.errors[name] += 1
+        return data if isinstance(data, dict) else {"items": data}
+
+    async def summarize_yt(self, client: httpx.AsyncClient):
+        data = await self._timed("/summarize-yt", client.post("/summarize-yt", json={
+            "user_id": random.choice(self.users),
+            "title": "Load test lecture",
+            "type": "youtube",
+            "url": "https://www.youtube.com/watch?v=loadtest",
+            "transcript": self.transcript,
+        }))
+        note_id = (data.get("note") or {}).get("id")
+        if note_id:
+            self.note_ids.append(note_id)
+
+    async def summarize_pdf(self, client: httpx.AsyncClient):
+        data = await self._timed("/summarize-pdf", client.post(
+            "/summarize-pdf",
+            files={"file": ("loadtest.pdf", self.pdf_bytes, "application/pdf")},
+            data={"user_id": random.choice(self.users), "type": "PDF"},
+        ))
+        note_id = (data.get("note") or {}).get("id")
+        if note_id:
+            self.note_ids.append(note_id)
+
+    async def chat(self, client: httpx.AsyncClient):
+        if not self.note_ids:
+            return await self.summarize_yt(client)
+        await self._timed("/chat", client.post("/chat", json={
+            "message": random.choice(QUESTIONS),
+            "summary": "",
+            "note_id": random.choice(self.note_ids),
+        }))
+
+    async def notes(self, client: httpx.AsyncClient):
+        await self._timed("/notes/", client.get("/notes/", params={"user_id": random.choice(self.users)}))
+
+    async def run(self) -> float:
+        args = self.args
+        actions = [self.summarize_yt, self.summarize_pdf, self.chat, self.notes]
+        weights = [args.w_yt, args.w_pdf, args.w_chat, args.w_notes]
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            # seed a few notes so chat has something to retrieve from
+            await asyncio.gather(*[self.summarize_yt(client) for _ in range(min(args.users, args.concurrency))])
+            self.latencies.clear()
+            self.errors.clear()
+
+            stop_at = time.perf_counter() + args.duration
+            started = time.perf_counter()
+
+            async def worker():
+                while time.perf_counter() < stop_at:
+                    action = random.choices(actions, weights=weights)[0]
+                    await action(client)
+
+            await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+            return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> None:
+        print(f"\nDuration {elapsed:.1f}s, concurrency {self.args.concurrency}\n")
+        print(f"{'endpoint':<16}{'requests':>9}{'errors':>8}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        total = 0
+        for name in ("/summarize-yt", "/summarize-pdf", "/chat", "/notes/"):
+            samples = self.latencies.get(name)
+            if not samples:
+                continue
+            total += len(samples)
+            print(f"{name:<16}{len(samples):>9}{self.errors[name]:>8}{len(samples) / elapsed:>8.2f}"
+                  f"{percentile(samples, 50) * 1000:>10.1f}{percentile(samples, 95) * 1000:>10.1f}"
+                  f"{percentile(samples, 99) * 1000:>10.1f}")
+        print(f"{'total':<16}{total:>9}{sum(self.errors.values()):>8}{total / elapsed:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the SmartNotes API.")
+    parser.add_argument("--base_url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--transcript_minutes", type=int, default=30)
+    parser.add_argument("--pdf_pages", type=int, default=20)
+    parser.add_argument("--w_yt", type=float, default=1, help="Relative weight of /summarize-yt.")
+    parser.add_argument("--w_pdf", type=float, default=1, help="Relative weight of /summarize-pdf.")
+    parser.add_argument("--w_chat", type=float, default=4, help="Relative weight of /chat.")
+    parser.add_argument("--w_notes", type=float, default=4, help="Relative weight of /notes/.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    generator = LoadGenerator(args)
+    elapsed = asyncio.run(generator.run())
+    generator.report(elapsed)
+
+
+if __name__ == "__main__":
+    main()
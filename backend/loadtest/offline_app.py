@@ -0,0 +1,47 @@
+"""
+Run the real FastAPI app fully offline: Groq calls go to the local stub
+server and Mongo, Whisper and the embedding model are replaced by the
+in-process stand-ins from loadtest/stand_ins.py.
+
+Usage (from backend/):
+    python loadtest/offline_app.py --port 8000 --groq_url http://127.0.0.1:9100
+"""
+import os
+import sys
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the SmartNotes API with offline stand-ins.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--groq_url", default="http://127.0.0.1:9100")
+    parser.add_argument("--real_mongo", action="store_true", help="Use the configured MongoDB instead of the stand-in.")
+    parser.add_argument("--real_whisper", action="store_true", help="Load faster-whisper instead of the stand-in.")
+    parser.add_argument("--real_embeddings", action="store_true", help="Load the HuggingFace embedding model.")
+    args = parser.parse_args()
+
+    # must be set before main (and the model router) read their configuration
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "stub"
+    os.environ["GROQ_BASE_URL"] = args.groq_url
+    os.environ["GROQ_API_BASE"] = args.groq_url
+    os.environ["INFERENCE_WORKER_SETUP"] = "loadtest.stand_ins:install_from_env"
+
+    from loadtest import stand_ins
+    stand_ins.install(
+        mongo=not args.real_mongo,
+        whisper=not args.real_whisper,
+        embeddings=not args.real_embeddings,
+    )
+
+    import uvicorn
+    from main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+One-shot offline load test: starts the Groq stub and the API with local
+stand-ins, runs the load generator against it, then shuts both down.
+Unrecognised arguments are passed through to loadgen.py.
+
+Usage (from backend/):
+    python loadtest/run_offline.py --stub_latency pareto --stub_rate_limit_rate 0.02 --duration 60
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def wait_until_up(url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline load test end to end.")
+    parser.add_argument("--api_port", type=int, default=8800)
+    parser.add_argument("--stub_port", type=int, default=9100)
+    parser.add_argument("--stub_latency", choices=["fixed", "lognormal", "pareto"], default="lognormal")
+    parser.add_argument("--stub_latency_ms", type=float, default=300)
+    parser.add_argument("--stub_error_rate", type=float, default=0.0)
+    parser.add_argument("--stub_rate_limit_rate", type=float, default=0.0)
+    args, loadgen_args = parser.parse_known_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    processes = []
+    try:
+        processes.append(subprocess.Popen([
+            sys.executable, os.path.join(HERE, "stub_groq.py"),
+            "--port", str(args.stub_port),
+            "--latency", args.stub_latency,
+            "--latency_ms", str(args.stub_latency_ms),
+            "--error_rate", str(args.stub_error_rate),
+            "--rate_limit_rate", str(args.stub_rate_limit_rate),
+        ]))
+        wait_until_up(f"{stub_url}/stats")
+
+        processes.append(subprocess.Popen([
+            sys.executable, os.path.join(HERE, "offline_app.py"),
+            "--port", str(args.api_port),
+            "--groq_url", stub_url,
+        ]))
+        wait_until_up(f"{api_url}/docs")
+
+        subprocess.run([
+            sys.executable, os.path.join(HERE, "loadgen.py"),
+            "--base_url", api_url,
+            *loadgen_args,
+        ], check=True)
+
+        print("\nStub:", httpx.get(f"{stub_url}/stats").json())
+        print("Routing:", httpx.get(f"{api_url}/metrics/model-routing").json().get("resilience"))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Local stand-ins used by the offline load-test harness.
+They replace faster-whisper and the HuggingFace embedding model with
+in-process fakes that keep the same call surface the backend uses, and
+switch MongoDB to the in-process backend (database/memory_backend), so the
+real FastAPI app can run on a CPU-only box with no network.
+"""
+import os
+import sys
+import time
+import types
+import hashlib
+from collections import namedtuple
+from typing import List
+
+# === MongoDB ===
+# the in-memory classes live in database/memory_backend; re-exported for existing callers
+from database.memory_backend import (  # noqa: F401
+    AsyncInMemoryClient, AsyncInMemoryCollection, AsyncInMemoryCursor, AsyncInMemoryDatabase,
+    AsyncInMemoryGridFSBucket, InMemoryClient, InMemoryCollection, InMemoryCursor, InMemoryDatabase,
+    InMemoryGridFSBucket,
+)
+
+
+# === faster-whisper ===
+Segment = namedtuple("Segment", ["start", "end", "text"])
+TranscriptionInfo = namedtuple("TranscriptionInfo", ["language", "duration"])
+
+# pretend every upload byte is 1/16000 s of audio and transcribe at this real-time factor
+STUB_WHISPER_RTF = float(os.getenv("STUB_WHISPER_RTF", "0.02"))
+# spin in Python (holding the GIL) instead of sleeping, to model CPU-bound inference
+STUB_WHISPER_CPU = os.getenv("STUB_WHISPER_CPU", "0") == "1"
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(i * i for i in range(1000))
+
+
+class StubWhisperModel:
+    def __init__(self, model_size_or_path: str = "small", device: str = "cpu", compute_type: str = "default",
+                 cpu_threads: int = 0, num_workers: int = 1, **kwargs):
+        self.model = types.SimpleNamespace(device=device)
+        self.model_size = model_size_or_path
+
+
+class StubBatchedInferencePipeline:
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **kwargs):
+        if isinstance(audio, str):
+            size = os.path.getsize(audio)
+        else:
+            size = len(audio)
+        duration = max(1.0, size / 16000)
+        (_busy if STUB_WHISPER_CPU else time.sleep)(duration * STUB_WHISPER_RTF)
+
+        def segments():
+            start = 0.0
+            index = 0
+            while start < duration:
+                end = min(duration, start + 5.0)
+                yield Segment(start, end, f"stub segment {index} about the uploaded lecture")
+                start = end
+                index += 1
+
+        return segments(), TranscriptionInfo("en", duration)
+
+
+# === Embeddings ===
+class HashingEmbeddings:
+    """Deterministic bag-of-words hashing vectors with the MiniLM dimension."""
+
+    def __init__(self, model_name: str = "stub", dimensions: int = 384, **kwargs):
+        self.model_name = model_name
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        vec = [0.0] * self.dimensions
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0 if digest[4] & 1 else -1.0
+        return vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+def install(mongo: bool = True, whisper: bool = True, embeddings: bool = True) -> None:
+    """Register the stand-ins in sys.modules; call before importing main."""
+    # spawned inference workers re-install the same set via install_from_env
+    os.environ["STAND_INS"] = ",".join(
+        name for name, on in (("mongo", mongo), ("whisper", whisper), ("embeddings", embeddings)) if on
+    )
+    if mongo:
+        # read when database.config first builds the client
+        os.environ["MONGO_BACKEND"] = "memory"
+        if "database.config" in sys.modules:
+            sys.modules["database.config"].MONGO_BACKEND = "memory"
+
+    if whisper:
+        fw = types.ModuleType("faster_whisper")
+        fw.WhisperModel = StubWhisperModel
+        fw.BatchedInferencePipeline = StubBatchedInferencePipeline
+        sys.modules["faster_whisper"] = fw
+
+    if embeddings:
+        hf = types.ModuleType("langchain_huggingface")
+        hf.HuggingFaceEmbeddings = HashingEmbeddings
+        sys.modules["langchain_huggingface"] = hf
+
+
+def install_from_env() -> None:
+    """INFERENCE_WORKER_SETUP hook: repeat the parent's install() in a worker process."""
+    chosen = os.environ.get("STAND_INS", "").split(",")
+    install(mongo="mongo" in chosen, whisper="whisper" in chosen, embeddings="embeddings" in chosen)
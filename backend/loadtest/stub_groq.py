@@ -0,0 +1,176 @@
+"""
+Offline stand-in for the Groq (OpenAI-compatible) chat completions API.
+Serves /openai/v1/chat/completions, streaming included, with configurable
+latency distributions, 5xx error rates and 429 rate limiting, so the
+backend can be load tested without spending Groq quota.
+
+Usage (from backend/):
+    python loadtest/stub_groq.py --port 9100 --latency pareto --latency_ms 300
+    export GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_BASE=http://127.0.0.1:9100 GROQ_API_KEY=stub
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class StubConfig:
+    latency: str = "lognormal"      # fixed | lognormal | pareto
+    latency_ms: float = 300.0       # median / fixed latency to the first token
+    sigma: float = 0.5              # lognormal spread
+    tail_prob: float = 0.05         # pareto: share of calls in the tail
+    alpha: float = 1.5              # pareto tail shape
+    error_rate: float = 0.0         # share of calls answered with a 500
+    rate_limit_rate: float = 0.0    # share of calls answered with a 429
+    tokens_per_second: float = 500.0
+    completion_words: int = 120
+
+
+config = StubConfig()
+stats = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0}
+app = FastAPI()
+
+
+def sample_latency() -> float:
+    base = config.latency_ms / 1000
+    if config.latency == "fixed":
+        return base
+    latency = random.lognormvariate(0, config.sigma) * base
+    if config.latency == "pareto" and random.random() < config.tail_prob:
+        latency *= random.paretovariate(config.alpha) * 5
+    return latency
+
+
+def completion_text(messages: list) -> str:
+    """Deterministic filler built from the prompt so replies vary per input."""
+    prompt = " ".join(str(m.get("content", "")) for m in messages)
+    words = [w for w in prompt.split() if w.isalpha()][:400] or ["summary"]
+    out = ["## Summary", ""]
+    for i in range(config.completion_words):
+        out.append(words[(i * 7) % len(words)])
+    return " ".join(out)
+
+
+def usage(messages: list, text: str) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+    completion_tokens = len(text.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.get("/openai/v1/models")
+def list_models():
+    return {"object": "list", "data": []}
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    model = body.get("model", "stub")
+    messages = body.get("messages", [])
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        await asyncio.sleep(0.005)
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": "1"},
+            content={"error": {"message": f"Rate limit reached for model `{model}`",
+                               "type": "tokens", "code": "rate_limit_exceeded"}},
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse(status_code=500, content={"error": {"message": "stub internal error",
+                                                                "type": "internal_server_error"}})
+
+    await asyncio.sleep(sample_latency())
+    text = completion_text(messages)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "logprobs": None,
+                "finish_reason": "stop",
+            }],
+            "usage": usage(messages, text),
+        }
+
+    stats["streamed"] += 1
+
+    async def events():
+        def chunk(delta: dict, finish_reason=None, extra=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+            }
+            if extra:
+                payload.update(extra)
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        for word in text.split(" "):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk({"content": word + " "})
+        yield chunk({}, "stop", {"x_groq": {"id": completion_id, "usage": usage(messages, text)}})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq-compatible chat completions stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", choices=["fixed", "lognormal", "pareto"], default=config.latency)
+    parser.add_argument("--latency_ms", type=float, default=config.latency_ms)
+    parser.add_argument("--sigma", type=float, default=config.sigma)
+    parser.add_argument("--tail_prob", type=float, default=config.tail_prob)
+    parser.add_argument("--alpha", type=float, default=config.alpha)
+    parser.add_argument("--error_rate", type=float, default=config.error_rate)
+    parser.add_argument("--rate_limit_rate", type=float, default=config.rate_limit_rate)
+    parser.add_argument("--tokens_per_second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--completion_words", type=int, default=config.completion_words)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for field in config.__dataclass_fields__:
+        setattr(config, field, getattr(args, field))
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,85 @@
-from fastapi import FastAPI, Query, HTTPException, Body, Response
+from fastapi import FastAPI, Query, HTTPException, Body, Response, Request
 from fastapi import UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import asynccontextmanager
 import os
-from groq import Groq
-from bson.objectid import ObjectId
+import json
+import uuid
+import shutil
+import asyncio
 
 from youtube_transcript_api._errors import IpBlocked, NoTranscriptFound
-from utils.youtube_transcript import get_transcripts
+from utils.youtube_transcript import aget_transcripts, arun_fetcher, expand_playlist, extract_videoID
+from utils.youtube_cache import youtube_cache_stats
+from utils.timed_transcript import compact_transcript, load_timed_transcript
 from services.YT_summarizer import summarize_long_transcript
-from services.PDF_summarizer import summarize_long_pdf
-from services.Media_summarizer import summarize_long_transcript as summarize_media_transcript
-from services.media_summariser.process_media import process_media_file
 from services.media_summariser.ragvideo2 import generate_reply
 
-from database.historySchema import NoteModel, NoteResponseModel
-from database.crud import create_note, get_notes_by_user
+from database.historySchema import NoteModel, NotePageModel, NoteResponseModel
+from database.crud import (
+    NOTES_PAGE_MAX, NOTES_PAGE_SIZE, create_note, ensure_indexes, get_note_by_id, get_note_for_chat,
+    get_note_transcript, get_notes_page,
+)
+from database.note_storage import load_embeddings
+from database.field_codec import field_codec
+from database.config import MONGO_BACKEND, close_client, ping
+
+from services.inference_pool import inference_pool
+from services.semantic_cache import chat_cache
+from services.model_router import model_router
+from services.jobs import JOBS_UPLOAD_DIR, job_runner, public_job
+from services.ingestion import build_embeddings, ingest_media, ingest_pdf
+from services.yt_batch import YT_BATCH_MAX_VIDEOS
+from services.media_summariser.transcript_cache import transcript_cache
+from services.media_summariser.process_media import PROFILES, get_profile
+from utils.uploads import (
+    MAX_MEDIA_UPLOAD_BYTES, MAX_PDF_UPLOAD_BYTES, PDF_IN_MEMORY_MAX_BYTES, UploadTooLarge,
+    check_upload_size, read_upload_to_memory, save_upload_to_disk,
+)
+
+
+# Seconds between job state checks on the SSE progress stream
+JOB_EVENTS_INTERVAL = float(os.getenv("JOB_EVENTS_INTERVAL", "1"))
+# Seconds /health/ready waits for the MongoDB ping before reporting not ready
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "2"))
+
+MEDIA_EXTENSIONS = [
+    ".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac",
+    ".mp4", ".avi", ".mov", ".mkv", ".webm"
+]
+
+
+# Index creation runs off the startup path; /health/ready retries it until it succeeds
+database_status = {"indexes": False}
+
+
+async def prepare_database() -> None:
+    try:
+        await ensure_indexes()
+        database_status["indexes"] = True
+        print(f"✓ MongoDB ({MONGO_BACKEND}) indexes ready")
+    except Exception as e:
+        print(f"⚠ Could not create note indexes: {str(e)}")
 
-from services.media_summariser.embed import create_embeddings
 
-import tempfile
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the MongoDB client is built on first use and connects on its first operation,
+    # so startup doesn't wait on the network
+    indexes_task = asyncio.create_task(prepare_database())
+    inference_pool.start()
+    await job_runner.start()
+    yield
+    indexes_task.cancel()
+    await job_runner.stop()
+    inference_pool.shutdown()
+    await close_client()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -33,6 +90,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints whose end-to-end latency is reported per model routing policy
+LLM_ROUTES = {
+    "/summarize-yt", "/summarize-media", "/summarize-pdf",
+    "/summarize-flashcard", "/prompts", "/chat",
+}
+
+
+# Per-route upload caps, enforced from Content-Length before the body is read
+UPLOAD_LIMITS = {
+    "/summarize-media": MAX_MEDIA_UPLOAD_BYTES,
+    "/jobs/summarize-media": MAX_MEDIA_UPLOAD_BYTES,
+    "/summarize-pdf": MAX_PDF_UPLOAD_BYTES,
+}
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    limit = UPLOAD_LIMITS.get(request.url.path)
+    content_length = request.headers.get("content-length")
+    if limit and content_length and content_length.isdigit():
+        try:
+            check_upload_size(int(content_length), limit)
+        except UploadTooLarge as e:
+            return JSONResponse(status_code=413, content={"error": str(e)})
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def track_llm_route_latency(request: Request, call_next):
+    if request.url.path not in LLM_ROUTES:
+        return await call_next(request)
+    async with model_router.track_request(request.url.path):
+        return await call_next(request)
+
 
 # Request Schemas
 class YouTubeRequest(BaseModel):
@@ -52,6 +143,13 @@ class SummarizeRequest(BaseModel):
     transcript: Optional[List[TranscriptItem]] = None
 
 
+class BatchSummarizeRequest(BaseModel):
+    user_id: str
+    urls: List[str] = []
+    playlist_url: Optional[str] = None
+    type: str = "youtube"
+
+
 class FlashcardRequest(BaseModel):
     summary: str
 
@@ -62,13 +160,26 @@ class ChatRequest(BaseModel):
     videoId: str
 
 
+def validate_media_upload(file: UploadFile, profile: Optional[str] = None) -> Optional[str]:
+    if not file.filename:
+        return "File name is required"
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in MEDIA_EXTENSIONS:
+        return f"Unsupported file format: {file_ext}. Supported formats: {', '.join(MEDIA_EXTENSIONS)}"
+    try:
+        get_profile(profile)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
 # --------------------------
 # YouTube Transcript API route for viewPage component transcript displaying
 # --------------------------
 @app.get("/transcript/")
-def transcript_api(url: str):
+async def transcript_api(url: str):
     try:
-        transcripts = get_transcripts(url)
+        transcripts = await aget_transcripts(url)
         return {"transcript": transcripts}
     except IpBlocked:
         return {"error": "Your IP is blocked by YouTube. Try again later or from a different network."}
@@ -87,7 +198,7 @@ async def summarize_youtube_and_save(req: SummarizeRequest):
         if req.transcript:
             transcripts = [item.dict() for item in req.transcript]
         elif req.url:
-            transcripts = get_transcripts(req.url)
+            transcripts = await aget_transcripts(req.url)
         else:
             return {"error": "Provide either a transcript or a URL"}
 
@@ -95,30 +206,19 @@ async def summarize_youtube_and_save(req: SummarizeRequest):
 
         summary = await summarize_long_transcript(transcripts)
 
-        embedding_reference = None
-        embeddings = None
-        try:
-            embeddings = create_embeddings(text_for_embedding)
-            if embeddings:
-                import uuid
-                embedding_reference = f"yt_{uuid.uuid4().hex[:8]}"
-                print(f"✓ Embeddings created successfully with reference: {embedding_reference}")
-            else:
-                print("⚠ Embeddings returned None, proceeding without embedding storage")
-        except Exception as embedding_error:
-            print(f"⚠ Error creating embeddings: {str(embedding_error)}")
+        embeddings = await build_embeddings(text_for_embedding)
 
         note_data = NoteModel(
             user_id=req.user_id,
             title=req.title,
             type=req.type,
             summary=summary,
-            transcript=transcripts,
+            **compact_transcript(transcripts, clock=True),
             source=req.url or "uploaded transcript",
             embeddings=embeddings
         )
 
-        saved_note = create_note(note_data)
+        saved_note = await create_note(note_data)
 
         # Avoid returning potentially large embeddings payload to the frontend.
         response_note = dict(saved_note)
@@ -127,7 +227,7 @@ async def summarize_youtube_and_save(req: SummarizeRequest):
         return {
             "summary": summary,
             "note": response_note,
-            "embeddings_status": "success" if embedding_reference else "skipped",
+            "embeddings_status": "success" if embeddings else "skipped",
             "id": saved_note.get("_id")
         }
 
@@ -142,76 +242,22 @@ async def summarize_youtube_and_save(req: SummarizeRequest):
 async def summarize_media_and_save(
         file: UploadFile = File(...),
         user_id: str = Form(...),
-        type: str = Form("media")
+        type: str = Form("media"),
+        profile: Optional[str] = Form(None)
 ):
-    import tempfile
     temp_file_path = None
     try:
-        if not file.filename:
-            return {"error": "File name is required"}
-
+        error = validate_media_upload(file, profile)
+        if error:
+            return {"error": error}
         file_ext = os.path.splitext(file.filename)[1].lower()
-        allowed_extensions = [
-            ".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac",
-            ".mp4", ".avi", ".mov", ".mkv", ".webm"
-        ]
-
-        if file_ext not in allowed_extensions:
-            return {"error": f"Unsupported file format: {file_ext}. Supported formats: {', '.join(allowed_extensions)}"}
-
-        # Save uploaded file temporarily
-        file_bytes = await file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-            temp_file.write(file_bytes)
-            temp_file_path = temp_file.name
-
-        print(f"Processing media file: {file.filename}")
-
-        transcripts = await process_media_file(temp_file_path, file.filename)
-
-        if not transcripts or len(transcripts) == 0:
-            return {"error": "Failed to transcribe the media file. Please ensure the file contains audio."}
-
-        else:
-            print("Transcript length is : ", len(transcripts))
-            text_for_embedding = " ".join([item["text"] for item in transcripts])
-
-        # Summarize transcript
-        summary = await summarize_media_transcript(transcripts)
-
-        embedding_reference = None
-        embeddings = None
-        try:
-            embeddings = create_embeddings(text_for_embedding)
-            if embeddings:
-                import uuid
-                embedding_reference = f"yt_{uuid.uuid4().hex[:8]}"
-                print(f"✓ Embeddings created successfully with reference: {embedding_reference}")
-            else:
-                print("⚠ Embeddings returned None, proceeding without embedding storage")
-        except Exception as embedding_error:
-            print(f"⚠ Error creating embeddings: {str(embedding_error)}")
 
-        note_data = NoteModel(
-            user_id=user_id,
-            title=file.filename,
-            type=type,
-            summary=summary,
-            transcript=transcripts,
-            source="Uploaded media",
-            embeddings=embeddings
-        )
+        # Stream the upload to a temp file without holding it in memory
+        upload = await save_upload_to_disk(file, file_ext, MAX_MEDIA_UPLOAD_BYTES)
+        temp_file_path = upload.path
 
-        saved_note = create_note(note_data)
-        response_note = dict(saved_note)
-        response_note.pop("embeddings", None)
-
-        return {
-            "summary": summary,
-            "note": response_note,
-            "embeddings_status": "success" if embedding_reference else "skipped",
-            "id": saved_note.get("_id")
-        }
+        return await ingest_media(temp_file_path, file.filename, user_id, type,
+                                  content_hash=upload.sha256, profile=profile)
 
     except ValueError as e:
         return {"error": str(e)}
@@ -227,6 +273,111 @@ async def summarize_media_and_save(
                 pass
 
 
+# --------------------------
+# Background jobs: submit media, poll status, stream progress
+# --------------------------
+@app.post("/jobs/summarize-media")
+async def submit_media_job(
+        file: UploadFile = File(...),
+        user_id: str = Form(...),
+        type: str = Form("media"),
+        profile: Optional[str] = Form(None)
+):
+    try:
+        error = validate_media_upload(file, profile)
+        if error:
+            return {"error": error}
+        file_ext = os.path.splitext(file.filename)[1].lower()
+
+        # Keep the upload in the durable data dir so a restarted worker can still find it
+        upload = await save_upload_to_disk(file, file_ext, MAX_MEDIA_UPLOAD_BYTES)
+        job_id = uuid.uuid4().hex
+        os.makedirs(JOBS_UPLOAD_DIR, exist_ok=True)
+        job_path = os.path.join(JOBS_UPLOAD_DIR, f"{job_id}{file_ext}")
+        shutil.move(upload.path, job_path)
+
+        job_runner.submit("media", {
+            "path": job_path,
+            "filename": file.filename,
+            "user_id": user_id,
+            "type": type,
+            "sha256": upload.sha256,
+            "profile": profile,
+        }, job_id=job_id)
+        return {"job_id": job_id, "status": "queued"}
+
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        print(f"Error submitting media job: {str(e)}")
+        return {"error": f"Failed to submit media file: {str(e)}"}
+
+
+# --------------------------
+# Batch YouTube ingestion (a course: list of URLs and/or a playlist) as one job
+# --------------------------
+@app.post("/jobs/summarize-yt-batch")
+async def submit_yt_batch_job(req: BatchSummarizeRequest):
+    try:
+        urls = list(req.urls)
+        if req.playlist_url:
+            urls += await arun_fetcher(expand_playlist, req.playlist_url)
+        urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+        if not urls:
+            return {"error": "Provide urls or a playlist_url"}
+        if len(urls) > YT_BATCH_MAX_VIDEOS:
+            return {"error": f"Too many videos: {len(urls)} (limit {YT_BATCH_MAX_VIDEOS})"}
+        invalid = []
+        for url in urls:
+            try:
+                extract_videoID(url)
+            except ValueError:
+                invalid.append(url)
+        if invalid:
+            return {"error": "Unsupported URL format", "urls": invalid}
+
+        job_id = job_runner.submit("yt_batch", {"urls": urls, "user_id": req.user_id, "type": req.type})
+        return {"job_id": job_id, "status": "queued", "videos": len(urls)}
+
+    except Exception as e:
+        print(f"Error submitting YouTube batch: {str(e)}")
+        return {"error": f"Failed to submit batch: {str(e)}"}
+
+
+@app.get("/jobs/metrics")
+def jobs_metrics():
+    return job_runner.metrics()
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_runner.queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_job(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    if not job_runner.queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            job = public_job(job_runner.queue.get(job_id))
+            state = (job["status"], job["stage"], job["progress"], job["updated_at"])
+            if state != last:
+                last = state
+                yield f"data: {json.dumps(job, default=str)}\n\n"
+            if job["status"] in ("done", "failed"):
+                return
+            await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
 # --------------------------
 # Summarize & Save Note PDF
 # --------------------------
@@ -237,24 +388,18 @@ async def summarize_PDF_and_save(
         type: str = Form("PDF")
 ):
     try:
-
-        from langchain_community.document_loaders import PyPDFLoader
+        if not file.filename:
+            return {"error": "File name is required"}
         temp_pdf_path = None
         try:
-            if not file.filename:
-                return {"error": "File name is required"}
-            pdf_bytes = await file.read()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-                temp_pdf.write(pdf_bytes)
-                temp_pdf_path = temp_pdf.name
-            print("path of pdf :", temp_pdf_path)
-            pdf_name = file.filename
-            loader = PyPDFLoader(temp_pdf_path)
-            pdf_docs = loader.load()
-            pdf_text_only = [doc.page_content for doc in pdf_docs]
-
-            clean_text = "".join(pdf_text_only)
-            clean_text = clean_text.replace("\n", " ")
+            if file.size is not None and file.size <= PDF_IN_MEMORY_MAX_BYTES:
+                upload = await read_upload_to_memory(file, MAX_PDF_UPLOAD_BYTES)
+                source = upload.data
+            else:
+                upload = await save_upload_to_disk(file, ".pdf", MAX_PDF_UPLOAD_BYTES)
+                temp_pdf_path = source = upload.path
+                print("path of pdf :", temp_pdf_path)
+            return await ingest_pdf(source, file.filename, user_id, type)
         finally:
             if temp_pdf_path and os.path.exists(temp_pdf_path):
                 try:
@@ -262,42 +407,6 @@ async def summarize_PDF_and_save(
                 except OSError:
                     pass
 
-        summary = await summarize_long_pdf(pdf_docs)
-
-        embedding_reference = None
-        embeddings = None
-        try:
-            embeddings = create_embeddings(clean_text)
-            if embeddings:
-                import uuid
-                embedding_reference = f"yt_{uuid.uuid4().hex[:8]}"
-                print(f"✓ Embeddings created successfully with reference: {embedding_reference}")
-            else:
-                print("⚠ Embeddings returned None, proceeding without embedding storage")
-        except Exception as embedding_error:
-            print(f"⚠ Error creating embeddings: {str(embedding_error)}")
-
-        note_data = NoteModel(
-            user_id=user_id,
-            title=pdf_name,
-            type=type,
-            summary=summary,
-            pdf_content=pdf_text_only,
-            source="Uploaded PDF",
-            embeddings=embeddings
-        )
-
-        saved_note = create_note(note_data)
-        response_note = dict(saved_note)
-        response_note.pop("embeddings", None)
-
-        return {
-            "summary": summary,
-            "note": response_note,
-            "embeddings_status": "success" if embedding_reference else "skipped",
-            "id": saved_note.get("_id")
-        }
-
     except Exception as e:
         return {"error": str(e)}
 
@@ -305,22 +414,65 @@ async def summarize_PDF_and_save(
 # --------------------------
 # Get Notes by User
 # --------------------------
-@app.get("/notes/", response_model=List[NoteResponseModel])
-def get_user_notes(user_id: str = Query(..., description="ID of the logged-in user")):
+@app.get("/notes/", response_model=NotePageModel)
+async def get_user_notes(user_id: str = Query(..., description="ID of the logged-in user"),
+                         limit: int = Query(NOTES_PAGE_SIZE, ge=1, le=NOTES_PAGE_MAX),
+                         cursor: Optional[str] = Query(None, description="next_cursor of the previous page")):
     """
-    Fetch all saved notes for a specific user
+    One page of a user's notes, newest first: titles and summary previews
+    only. Use /notes/{note_id} for the full note.
     """
     try:
-        notes = get_notes_by_user(user_id)  # returns list of dicts
-        # Return as list of NoteResponseModel for FastAPI serialization
-        response_notes = [
-            NoteResponseModel(**note) for note in notes
-        ]
-        return response_notes
+        return await get_notes_page(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/notes/{note_id}", response_model=NoteResponseModel, response_model_exclude={"embeddings"})
+async def get_user_note(note_id: str, user_id: str = Query(..., description="ID of the logged-in user")):
+    try:
+        note = await get_note_by_id(note_id, user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return note
+
+
+# --------------------------
+# Timestamp lookup and time-range slices of a note's transcript
+# (chat citations, re-summarizing part of a video)
+# --------------------------
+@app.get("/notes/{note_id}/transcript")
+async def get_note_transcript_range(note_id: str,
+                                    user_id: str = Query(..., description="ID of the logged-in user"),
+                                    at: Optional[float] = Query(None, description="Segment playing at this second"),
+                                    start: Optional[float] = Query(None, description="Range start, seconds"),
+                                    end: Optional[float] = Query(None, description="Range end, seconds")):
+    try:
+        note = await get_note_transcript(note_id, user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    timed = load_timed_transcript(note)
+    if timed is None:
+        raise HTTPException(status_code=404, detail="This note has no timed transcript")
+    if at is not None:
+        return {"segment": timed.segment_at(at)}
+    if start is None and end is None:
+        return {"segments": [timed.segment(i) for i in range(len(timed))]}
+    part = timed.slice(start or 0.0, end if end is not None else float("inf"))
+    return {
+        "start": part.starts[0] if len(part) else None,
+        "end": part.ends[-1] if len(part) else None,
+        "text": part.text_range(0, len(part)),
+        "segments": [part.segment(i) for i in range(len(part))],
+    }
+
+
 # --------------------------
 # Generate Flashcard Bullet Points from Summary
 # --------------------------
@@ -334,8 +486,6 @@ async def summarize_for_flashcard(req: FlashcardRequest):
         if not groq_api_key:
             return {"error": "Groq API key not configured"}
 
-        client = Groq(api_key=groq_api_key)
-
         prompt = f"""
 Extract exactly 6 key bullet points from the following summary. 
 Each bullet point should be concise (max 15 words) and capture the main idea.
@@ -347,14 +497,9 @@ Summary:
 Bullet Points:
 """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500,
-            temperature=0.7
+        bullet_points_text = await model_router.ainvoke(
+            "flashcards", prompt, max_tokens=500, temperature=0.7
         )
-
-        bullet_points_text = response.choices[0].message.content
         if not bullet_points_text:
             return {"status": "error", "error": "No response from Groq"}
 
@@ -398,8 +543,6 @@ async def generate_prompts(request: dict = Body(...)):
         if not groq_api_key:
             return {"prompts": []}
 
-        client = Groq(api_key=groq_api_key)
-
         prompt = f"""Based on this summary strictly, generate 3 good questions a user might ask about the content, dont include anything outside the summary.
 Return only the questions, one per line, very short, without numbering or bullet points.
 
@@ -409,14 +552,9 @@ Summary:
 Questions:
 """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300,
-            temperature=0.7
+        questions_text = await model_router.ainvoke(
+            "prompts", prompt, max_tokens=300, temperature=0.7
         )
-
-        questions_text = response.choices[0].message.content
         if not questions_text:
             return {"prompts": []}
 
@@ -441,8 +579,6 @@ Questions:
 @app.post("/chat")
 async def chat_with_rag(request: dict = Body(...)):
     try:
-        from database.crud import notes_collection
-        from langchain_huggingface import HuggingFaceEmbeddings
         import numpy as np
 
         message = request.get("message", "").strip()
@@ -460,76 +596,57 @@ async def chat_with_rag(request: dict = Body(...)):
         if not groq_api_key:
             return {"reply": "⚠️ API key not configured."}
 
-        # Initialize embedding model
-        embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        print("Model loaded")
-
-        question_embedding = embedding_model.embed_query(message)
+        # Embed the question with the model already loaded in the inference pool
+        embedded = await inference_pool.embed([message])
+        if not embedded:
+            return {"reply": "❌ Error: could not embed the question."}
+        question_embedding = embedded[0]["embedding"]
         print("Question embeddings generated")
 
+        # Serve paraphrases of already answered questions from the semantic cache
+        if note_id:
+            cached = chat_cache.lookup(note_id, question_embedding)
+            if cached:
+                print(f"Semantic cache hit (similarity {cached['similarity']:.4f})")
+                return {
+                    "reply": cached["answer"],
+                    "context_source": "semantic_cache"
+                }
+
         # Retrieve embeddings from MongoDB
         context_text = ""
         retrieval_method = None
 
         if note_id:
             try:
-                note = notes_collection.find_one({"_id": ObjectId(note_id)})
+                note = await get_note_for_chat(note_id)
                 print(f"Note found: {note is not None}")
 
-                if note and note.get("embeddings"):
-                    embeddings_list = note["embeddings"]
-                    print(f"Found {len(embeddings_list)} embedding chunks")
-
-                    # Compute similarity scores
-                    scores = []
-                    for emb_item in embeddings_list:
-                        if isinstance(emb_item, dict) and "embedding" in emb_item:
-                            # Extract the embedding from MongoDB's extended JSON format
-                            raw_embedding = emb_item["embedding"]
-
-                            # Handle MongoDB's $numberDouble format
-                            if isinstance(raw_embedding, list):
-                                # Extract numeric values from $numberDouble wrappers
-                                stored_embedding = np.array([
-                                    float(val["$numberDouble"]) if isinstance(val, dict) and "$numberDouble" in val
-                                    else float(val) #type: ignore
-                                    for val in raw_embedding
-                                ], dtype=np.float32)
-
-                                print(f"Converted embedding shape: {stored_embedding.shape}")
-                            else:
-                                stored_embedding = np.array(raw_embedding)
-
-                            question_vec = np.array(question_embedding)
-
-                            # Ensure both vectors have the same dimension
-                            if len(stored_embedding) != len(question_vec):
-                                print(
-                                    f"⚠️ Dimension mismatch: stored={len(stored_embedding)}, question={len(question_vec)}")
-                                continue
-
-                            # Cosine similarity
-                            similarity = np.dot(stored_embedding, question_vec) / (
-                                    np.linalg.norm(stored_embedding) * np.linalg.norm(question_vec) + 1e-8
-                            )
-
-                            text_chunk = emb_item.get("text", "").strip()
-                            if text_chunk:  # Only add non-empty chunks
-                                scores.append((similarity, text_chunk))
-                                print(f"Similarity: {similarity:.4f}")
-
-                    if scores:
-                        # Sort by similarity and get top-3 chunks
-                        scores.sort(reverse=True, key=lambda x: x[0])
-                        top_chunks = [text for _, text in scores[:3]]
-                        context_text = "\n\n".join(top_chunks)
-                        retrieval_method = "embeddings"
-                        print(f"Retrieved {len(top_chunks)} chunks via embeddings")
-                        print(f"Top similarity score: {scores[0][0]:.4f}")
+                texts, stored_embeddings = await load_embeddings(note) if note else ([], None)
+                if texts:
+                    print(f"Found {len(texts)} embedding chunks")
+                    question_vec = np.asarray(question_embedding, dtype=np.float32)
+
+                    # Ensure both vectors have the same dimension
+                    if stored_embeddings.shape[1] != len(question_vec):
+                        print(f"⚠️ Dimension mismatch: stored={stored_embeddings.shape[1]}, question={len(question_vec)}")
                     else:
-                        print("No valid embeddings found after processing")
+                        # Cosine similarity against every chunk at once
+                        similarities = stored_embeddings @ question_vec / (
+                                np.linalg.norm(stored_embeddings, axis=1) * np.linalg.norm(question_vec) + 1e-8
+                        )
+                        # Only non-empty chunks, best first
+                        scores = [(float(similarities[i]), texts[i].strip())
+                                  for i in np.argsort(-similarities) if texts[i].strip()]
+
+                        if scores:
+                            top_chunks = [text for _, text in scores[:3]]
+                            context_text = "\n\n".join(top_chunks)
+                            retrieval_method = "embeddings"
+                            print(f"Retrieved {len(top_chunks)} chunks via embeddings")
+                            print(f"Top similarity score: {scores[0][0]:.4f}")
+                        else:
+                            print("No valid embeddings found after processing")
 
                 # Fallback to summary if embeddings didn't work
                 if not context_text and summary:
@@ -568,21 +685,17 @@ Question: {message}
 Answer:
 """
 
-        client = Groq(api_key=groq_api_key)
-
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": rag_prompt}],
-            max_tokens=1000,
-            temperature=0.7
+        reply = await model_router.ainvoke(
+            "chat", rag_prompt, max_tokens=1000, temperature=0.7
         )
-
-        reply = response.choices[0].message.content
         if not reply:
             reply = "⚠️ No response generated."
 
         print(f"Response generated using {retrieval_method}")
 
+        if note_id and reply != "⚠️ No response generated.":
+            chat_cache.store(note_id, message, question_embedding, reply.strip())
+
         return {
             "reply": reply.strip(),
             "context_source": retrieval_method  # Optional: helps with debugging
@@ -592,4 +705,78 @@ Answer:
         print(f"Error in chat endpoint: {str(e)}")
         import traceback
         traceback.print_exc()
-        return {"reply": f"❌ Error: {str(e)}"}
\ No newline at end of file
+        return {"reply": f"❌ Error: {str(e)}"}
+
+# --------------------------
+# Semantic chat cache statistics
+# --------------------------
+@app.get("/chat/cache-stats")
+def chat_cache_stats():
+    return chat_cache.stats()
+
+
+# --------------------------
+# Readiness: 503 until MongoDB answers a ping
+# --------------------------
+@app.get("/health/ready")
+async def readiness():
+    try:
+        await asyncio.wait_for(ping(), READY_TIMEOUT)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={
+            "status": "unavailable", "mongo": MONGO_BACKEND, "error": str(e) or type(e).__name__,
+        })
+    if not database_status["indexes"]:
+        await prepare_database()
+    return {"status": "ready", "mongo": MONGO_BACKEND, "indexes": database_status["indexes"]}
+
+
+# --------------------------
+# Model routing policy and per-stage latency report
+# --------------------------
+@app.get("/metrics/model-routing")
+def model_routing_report():
+    return model_router.report()
+
+
+# --------------------------
+# Transcription profiles selectable per upload
+# --------------------------
+@app.get("/transcription-profiles")
+def transcription_profiles():
+    return {
+        "default": get_profile().name,
+        "profiles": {name: vars(profile) for name, profile in PROFILES.items()},
+    }
+
+
+# --------------------------
+# Inference process pool load, crashes and per-kind timings
+# --------------------------
+@app.get("/metrics/inference-pool")
+def inference_pool_report():
+    return inference_pool.metrics()
+
+
+# --------------------------
+# Transcript cache size and hit rate
+# --------------------------
+@app.get("/metrics/transcript-cache")
+def transcript_cache_report():
+    return transcript_cache.stats()
+
+
+# --------------------------
+# YouTube transcript cache: hits and upstream fetches avoided
+# --------------------------
+@app.get("/metrics/youtube-transcript-cache")
+def youtube_transcript_cache_report():
+    return youtube_cache_stats()
+
+
+# --------------------------
+# Note field compression: ratio and encode/decode throughput
+# --------------------------
+@app.get("/metrics/note-compression")
+def note_compression_report():
+    return field_codec.stats()
@@ -11,7 +11,7 @@ from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 
 
 DEFAULT_PERSIST_DIR = "./vectorstores"
-DEFAULT_MODEL = "llama-3.1-70b-versatile"  # Alternatives: "llama-3.1-8b-instant", "mixtral-8x7b-32768"
+DEFAULT_MODEL = os.getenv("GROQ_STRONG_MODEL", "llama-3.3-70b-versatile")  # Alternatives: "llama-3.1-8b-instant"
 
 
 def _resolve_embeddings():
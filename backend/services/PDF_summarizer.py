@@ -1,26 +1,21 @@
-import os
 import asyncio
 import nest_asyncio
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
-from pydantic import SecretStr
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.output_parsers import StrOutputParser
 import re 
 
+from services.model_router import model_router
+from services.llm_resilience import SUMMARY_DEADLINE, SUMMARY_FINAL_RESERVE, deadline_scope, reduce_summaries
+
 nest_asyncio.apply()
 load_dotenv()
 
 # === CONFIG ===
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-MODEL_NAME = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 CHUNK_SIZE = 7000
 CHUNK_OVERLAP = 200
 MAX_PARALLEL = 10   
 
-llm = ChatGroq(model=MODEL_NAME, api_key=SecretStr(GROQ_API_KEY) if GROQ_API_KEY else None)
-
 prompt_template = """
 You are an expert summarizer. Summarize the following tutorial or educational transcript clearly and accurately.
 
@@ -55,42 +50,46 @@ def clean_transcript_text(full_text: str) -> str:
     return cleaned
 
 def clean_pdf_text(text):
+    # repeated headers/footers are already dropped at extraction (utils.pdf_boilerplate);
+    # only lines that are nothing but a page number go here, numbers in the body stay
+    text = re.sub(r"^\s*\d+\s*$", "", text, flags=re.MULTILINE)
     text = re.sub(r"\n+", " ", text)
     text = re.sub(r" {2,}", " ", text)
     text = re.sub(r"-\s+", "", text)  
     text = re.sub(r"Page \d+ of \d+", "", text)
-    text = re.sub(r"\d+\s?\n?", "", text) 
     text = text.strip()
     return text
 
+def clean_pdf_chunk_text(text: str) -> str:
+    # line-based rules first; clean_transcript_text collapses the newlines they need
+    return clean_transcript_text(clean_pdf_text(text))
+
 def chunk_content(pdf_docs , chunk_size=CHUNK_SIZE):
     raw_text = " ".join([doc.page_content for doc in pdf_docs]) 
-    cleaned_text = clean_pdf_text(clean_transcript_text(raw_text))
+    cleaned_text = clean_pdf_chunk_text(raw_text)
     splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=CHUNK_OVERLAP)
     docs = splitter.create_documents([cleaned_text])
     return [doc.page_content for doc in docs]
 
-# creating summarization chain 
-summarization_chain = prompt | llm | StrOutputParser()
-
-async def safe_summarize(text: str) -> str:
+# each call is routed to the model configured for its stage (map / reduce / final)
+async def safe_summarize(text: str, stage: str = "final") -> str:
     try:
         if not text.strip():
             return "No content found."
-        return await summarization_chain.ainvoke({"text": text})
+        return await model_router.ainvoke(stage, prompt.format(text=text))
     except Exception as e:
         msg = str(e)
         return f"Failed to summarize: {msg}"
 
 # batch processing for speedup of summarization
 # i am sending a chunks of transcripts in a batch of 10 so they summarize parallaly 
-async def summarize_chunks(chunks: list[str]):
+async def summarize_chunks(chunks: list[str], stage: str = "map"):
     results = []
     sem = asyncio.Semaphore(MAX_PARALLEL)
     # sending a chunk for summarization 
     async def worker(chunk):
         async with sem:
-            return await safe_summarize(chunk)
+            return await safe_summarize(chunk, stage)
 
     for i in range(0, len(chunks), MAX_PARALLEL):
         batch = chunks[i:i+MAX_PARALLEL]  # batch will store first 10 chunks, then next 10 chunks and so on 
@@ -102,22 +101,21 @@ async def summarize_chunks(chunks: list[str]):
 
     return results
 
-async def summarize_long_pdf(pdf_docs: list) -> str:
-    chunks = chunk_content(pdf_docs)
-    print(f" {len(chunks)} chunks created from PDF content.")
+async def reduce_chunk_summaries(chunk_summaries: list[str], deadline: float = SUMMARY_DEADLINE) -> str:
+    """Compress map-stage summaries until they fit one call, then write the final summary."""
+    return await reduce_summaries(chunk_summaries, summarize_chunks, safe_summarize, deadline)
 
-    if not chunks:
-        return "No content found."
+async def summarize_long_pdf(pdf_docs: list, deadline: float = SUMMARY_DEADLINE) -> str:
+    # one deadline covers the whole map-reduce; map is cut off early
+    # enough to leave the reduce and final pass their reserved share
+    with deadline_scope(deadline):
+        chunks = chunk_content(pdf_docs)
+        print(f" {len(chunks)} chunks created from PDF content.")
 
-    chunk_summaries = await summarize_chunks(chunks)
+        if not chunks:
+            return "No content found."
 
-    while chunk_summaries and len(" ".join(chunk_summaries).split()) > 6000:
-        grouped = [
-            " ".join(chunk_summaries[i:i+3])
-            for i in range(0, len(chunk_summaries), 3)
-        ]
-        print(f"🔁 Compressing summaries into {len(grouped)} groups...")
-        chunk_summaries = await summarize_chunks(grouped)
+        with deadline_scope(deadline * (1 - SUMMARY_FINAL_RESERVE)):
+            chunk_summaries = await summarize_chunks(chunks)
 
-    final_summary = await safe_summarize(" ".join(chunk_summaries))
-    return final_summary.strip()
+        return await reduce_chunk_summaries(chunk_summaries, deadline)
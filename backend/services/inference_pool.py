@@ -0,0 +1,322 @@
+"""
+Managed process pool for CPU/GPU-heavy stages (transcription, PDF parsing,
+embedding), kept off the FastAPI event loop and out of its GIL.
+
+- workers are spawned processes that warm their models once (INFERENCE_WARM)
+- pending work is bounded (INFERENCE_MAX_PENDING); callers wait for a slot
+- a crashed worker (OOM, segfault) breaks the pool; it is rebuilt and the
+  task retried up to INFERENCE_RETRIES times
+- generators (streamed transcription) forward items through a manager queue
+- embedding vectors come back through shared memory instead of pickled lists
+"""
+import os
+import time
+import queue
+import asyncio
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# === CONFIG ===
+INFERENCE_POOL_ENABLED = os.getenv("INFERENCE_POOL", "1") == "1"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "32"))
+INFERENCE_RETRIES = int(os.getenv("INFERENCE_RETRIES", "1"))
+# recycle a worker after this many tasks (0 = never); bounds slow leaks at the cost of a reload
+INFERENCE_MAX_TASKS_PER_CHILD = int(os.getenv("INFERENCE_MAX_TASKS_PER_CHILD", "0"))
+# models loaded when a worker starts: whisper, embeddings
+INFERENCE_WARM = [m for m in os.getenv("INFERENCE_WARM", "whisper,embeddings").split(",") if m]
+# optional "module:function" run first in every worker (e.g. to install test doubles)
+INFERENCE_WORKER_SETUP = os.getenv("INFERENCE_WORKER_SETUP", "")
+STREAM_ITEM_QUEUE_SIZE = int(os.getenv("INFERENCE_STREAM_QUEUE_SIZE", "64"))
+
+
+@dataclass
+class SharedArray:
+    """Picklable handle to a NumPy array in a shared memory block."""
+    name: str
+    shape: tuple
+    dtype: str
+
+    @classmethod
+    def publish(cls, array: np.ndarray) -> "SharedArray":
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        handle = cls(block.name, array.shape, array.dtype.str)
+        block.close()
+        # ownership passes to whoever calls take(); don't let this process's tracker unlink it
+        resource_tracker.unregister(block._name, "shared_memory")  # type: ignore[attr-defined]
+        return handle
+
+    def read(self) -> np.ndarray:
+        """Copy the array out, leaving the block for other readers."""
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+
+    def release(self) -> None:
+        block = shared_memory.SharedMemory(name=self.name)
+        block.close()
+        block.unlink()
+
+    def take(self) -> np.ndarray:
+        """Copy the array out and free the block; call exactly once."""
+        try:
+            return self.read()
+        finally:
+            self.release()
+
+
+# ---- functions that run inside worker processes ----
+
+def _init_worker(setup: str, warm: List[str]) -> None:
+    if setup:
+        module, _, function = setup.partition(":")
+        getattr(importlib.import_module(module), function)()
+    # warming is best effort: an exception here would break the whole pool
+    # (every kind of task, not just the one whose model failed), and each
+    # model loads again on first use anyway
+    if "whisper" in warm:
+        try:
+            from services.media_summariser.process_media import get_pipeline, get_profile
+            profile = get_profile()
+            get_pipeline(profile.model_size, compute_type=profile.compute_type)
+        except Exception as e:
+            print(f"⚠ Inference worker could not warm Whisper: {e}")
+    if "embeddings" in warm:
+        try:
+            from services.media_summariser.embed import get_embedding_model
+            get_embedding_model()
+        except Exception as e:
+            print(f"⚠ Inference worker could not warm the embedding model: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _drain_generator(function: Callable[..., Iterator], args: tuple, items, cancel) -> None:
+    """Run a generator in the worker and push its items to the parent."""
+    def put(message) -> bool:
+        while not cancel.is_set():
+            try:
+                items.put(message, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for item in function(*args):
+            if not put(("item", item)):
+                return
+    except BaseException as e:
+        put(("error", e))
+        return
+    put(("done", None))
+
+
+def _embed_to_shared(texts: List[str]):
+    from services.media_summariser.embed import embed_texts
+    records = embed_texts(texts)
+    vectors = np.asarray([r["embedding"] for r in records], dtype=np.float32)
+    return [r["text"] for r in records], SharedArray.publish(vectors)
+
+
+class KindStats:
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_seconds": round(self.seconds / self.completed, 3) if self.completed else None,
+        }
+
+
+class InferencePool:
+    def __init__(self, workers: int = INFERENCE_WORKERS, enabled: bool = INFERENCE_POOL_ENABLED):
+        self.workers = workers
+        self.enabled = enabled
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(INFERENCE_MAX_PENDING)
+        self._kinds: Dict[str, KindStats] = {}
+        self.restarts = 0
+        self.in_flight = 0  # approximate; updated from several threads
+
+    def _context(self):
+        return multiprocessing.get_context("spawn")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._context(),
+                    initializer=_init_worker,
+                    initargs=(INFERENCE_WORKER_SETUP, INFERENCE_WARM),
+                    max_tasks_per_child=INFERENCE_MAX_TASKS_PER_CHILD or None,
+                )
+            return self._executor
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.restarts += 1
+                print(f"⚠ Inference worker crashed; pool restarted ({self.restarts} so far)")
+
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._context().Manager()
+            return self._manager
+
+    def start(self) -> None:
+        """Spawn and warm every worker in the background."""
+        if not self.enabled:
+            return
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_ping)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+    def _stats(self, kind: str) -> KindStats:
+        if kind not in self._kinds:
+            self._kinds[kind] = KindStats()
+        return self._kinds[kind]
+
+    def call(self, kind: str, function: Callable, *args) -> Any:
+        """Blocking: run `function(*args)` in a worker, retrying on a crashed pool."""
+        if not self.enabled:
+            return function(*args)
+        stats = self._stats(kind)
+        with self._slots:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                for attempt in range(INFERENCE_RETRIES + 1):
+                    executor = self._get_executor()
+                    try:
+                        result = executor.submit(function, *args).result()
+                        break
+                    except BrokenProcessPool:
+                        self._reset(executor)
+                        if attempt == INFERENCE_RETRIES:
+                            raise
+                stats.completed += 1
+                stats.seconds += time.perf_counter() - start
+                return result
+            except BaseException:
+                stats.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def run(self, kind: str, function: Callable, *args) -> Any:
+        """Run `function(*args)` in a worker without blocking the event loop."""
+        return await asyncio.to_thread(self.call, kind, function, *args)
+
+    def iterate(self, kind: str, function: Callable[..., Iterator], *args) -> Iterator:
+        """
+        Blocking generator: run a generator function in a worker and yield its
+        items here as they are produced. A crash before the first item is
+        retried; closing this generator stops the worker-side one.
+        """
+        if not self.enabled:
+            yield from function(*args)
+            return
+        stats = self._stats(kind)
+        manager = self._get_manager()
+        yielded = False
+        with self._slots:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                for attempt in range(INFERENCE_RETRIES + 1):
+                    items = manager.Queue(STREAM_ITEM_QUEUE_SIZE)
+                    cancel = manager.Event()
+                    executor = self._get_executor()
+                    future = executor.submit(_drain_generator, function, args, items, cancel)
+                    try:
+                        while True:
+                            try:
+                                tag, value = items.get(timeout=0.5)
+                            except queue.Empty:
+                                if future.done():
+                                    future.result()  # raises if the worker died
+                                    tag, value = items.get_nowait() if not items.empty() else ("done", None)
+                                else:
+                                    continue
+                            if tag == "item":
+                                yielded = True
+                                yield value
+                            elif tag == "error":
+                                raise value
+                            else:
+                                break
+                        break
+                    except BrokenProcessPool:
+                        self._reset(executor)
+                        if yielded or attempt == INFERENCE_RETRIES:
+                            raise
+                    finally:
+                        cancel.set()
+                stats.completed += 1
+                stats.seconds += time.perf_counter() - start
+            except GeneratorExit:
+                # the consumer stopped early; not a failure
+                raise
+            except BaseException:
+                stats.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def embed(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Embed chunk texts in a worker; vectors come back through shared memory."""
+        if not texts:
+            return []
+        if not self.enabled:
+            from services.media_summariser.embed import embed_texts
+            return await asyncio.to_thread(embed_texts, texts)
+        kept, handle = await self.run("embed", _embed_to_shared, texts)
+        vectors = handle.take()
+        return [{"text": t, "embedding": v.tolist()} for t, v in zip(kept, vectors)]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "max_pending": INFERENCE_MAX_PENDING,
+            "restarts": self.restarts,
+            "kinds": {kind: stats.snapshot() for kind, stats in self._kinds.items()},
+        }
+
+
+inference_pool = InferencePool()
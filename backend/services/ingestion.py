@@ -0,0 +1,210 @@
+"""
+Media ingestion pipeline shared by the synchronous /summarize-media route and
+the background job worker: transcribe -> summarize -> embed -> save.
+PDF ingestion streams pages through the same pipeline: extract -> summarize
+-> embed -> save.
+Each step runs inside `stage(name)`, which the job runner uses to apply its
+per-stage concurrency caps and to record progress.
+"""
+import os
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+from bson.objectid import ObjectId
+
+from database.historySchema import NoteModel
+from database.crud import create_note
+from database.note_storage import ChunkWriter, delete_note_storage
+from utils.timed_transcript import compact_transcript
+from services.Media_summarizer import summarize_long_transcript as summarize_media_transcript
+from services.PDF_summarizer import (
+    clean_pdf_chunk_text, clean_pdf_text, reduce_chunk_summaries as reduce_pdf_summaries,
+    safe_summarize as summarize_pdf_chunk,
+)
+from services.media_summariser.process_media import cached_media_segments, process_media_file
+from services.media_summariser.embed import create_chunks, wrap_into_document
+from services.inference_pool import inference_pool
+from services.media_summariser.streaming import run_streaming_pipeline
+from services.jobs import JobContext, job_runner
+from utils.pdf_loader import stream_pdf_pages
+
+# === CONFIG ===
+# summarize and embed while Whisper is still transcribing
+MEDIA_STREAMING = os.getenv("MEDIA_STREAMING", "1") == "1"
+# keep every page's text on the note as pdf_content; off by default because
+# it makes memory (and the note document) grow with the size of the PDF
+PDF_STORE_PAGES = os.getenv("PDF_STORE_PAGES", "0") == "1"
+
+
+@asynccontextmanager
+async def _no_stage(name: str, progress: Optional[float] = None):
+    yield
+
+
+async def build_embeddings(text: str):
+    """
+    Embed note text in the inference pool; failures are logged and the note
+    is saved without them. Chunking is cheap and stays in this process.
+    """
+    try:
+        if not text or not text.strip():
+            print("⚠ Empty text provided for embedding")
+            return None
+        chunks = create_chunks(wrap_into_document(text))
+        embeddings = await inference_pool.embed([c.page_content for c in chunks])
+        if embeddings:
+            print(f"✓ Embeddings created successfully with reference: yt_{uuid.uuid4().hex[:8]}")
+            return embeddings
+        print("⚠ Embeddings returned None, proceeding without embedding storage")
+    except Exception as embedding_error:
+        print(f"⚠ Error creating embeddings: {str(embedding_error)}")
+    return None
+
+
+async def _transcribe_then_summarize(file_path: str, filename: str, stage,
+                                     content_hash: Optional[str], profile: Optional[str]):
+    async with stage("transcribe", 0.05):
+        transcripts = await process_media_file(file_path, filename, content_hash=content_hash, profile=profile)
+    if not transcripts:
+        return transcripts, None, None
+    text_for_embedding = " ".join([item["text"] for item in transcripts])
+
+    async with stage("summarize", 0.5):
+        summary = await summarize_media_transcript(transcripts)
+
+    async with stage("embed", 0.8):
+        embeddings = await build_embeddings(text_for_embedding)
+    return transcripts, summary, embeddings
+
+
+async def ingest_media(file_path: str, filename: str, user_id: str,
+                       type: str = "media", stage=_no_stage,
+                       content_hash: Optional[str] = None,
+                       progress: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+                       profile: Optional[str] = None) -> Dict[str, Any]:
+    """Run the full media pipeline on a saved upload and return the route response."""
+    print(f"Processing media file: {filename}")
+
+    if MEDIA_STREAMING:
+        report = (lambda counters: progress(0.05, counters)) if progress else None
+        result = await run_streaming_pipeline(
+            cached_media_segments(file_path, filename, content_hash, None, profile),
+            stage=stage, report=report
+        )
+        transcripts, summary, embeddings = result.transcript, result.summary, result.embeddings
+    else:
+        transcripts, summary, embeddings = await _transcribe_then_summarize(
+            file_path, filename, stage, content_hash, profile
+        )
+
+    if not transcripts:
+        raise ValueError("Failed to transcribe the media file. Please ensure the file contains audio.")
+    print("Transcript length is : ", len(transcripts))
+
+    async with stage("save", 0.95):
+        note_data = NoteModel(
+            user_id=user_id,
+            title=filename,
+            type=type,
+            summary=summary,
+            **compact_transcript(transcripts),
+            source="Uploaded media",
+            embeddings=embeddings
+        )
+        saved_note = await create_note(note_data)
+
+    response_note = dict(saved_note)
+    response_note.pop("embeddings", None)
+    return {
+        "summary": summary,
+        "note": response_note,
+        "embeddings_status": "success" if embeddings else "skipped",
+        "id": saved_note.get("_id")
+    }
+
+
+def _cleaned_pages(pages: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    # page-number lines can only be spotted while the page still has its line breaks
+    try:
+        for page in pages:
+            yield {"page": page["page"], "text": clean_pdf_text(page["text"])}
+    finally:
+        pages.close()
+
+
+async def ingest_pdf(source: Union[bytes, str], filename: str, user_id: str,
+                     type: str = "PDF", stage=_no_stage,
+                     progress: Optional[Callable[[float, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Stream a PDF (bytes or a path) page by page into summarization and
+    embedding and save the note. Pages are dropped once chunked unless
+    PDF_STORE_PAGES is set.
+    """
+    print(f"Processing PDF: {filename}")
+    report = (lambda counters: progress(0.05, counters)) if progress else None
+    # embedded chunks go straight to the chunk collection instead of piling up here
+    chunk_writer = ChunkWriter(ObjectId())
+
+    try:
+        result = await run_streaming_pipeline(
+            _cleaned_pages(stream_pdf_pages(source)),
+            stage=stage, report=report,
+            clean=clean_pdf_chunk_text, map_summarize=summarize_pdf_chunk, reduce=reduce_pdf_summaries,
+            keep_items=PDF_STORE_PAGES, unit="pages", source_stage="extract", embeddings_sink=chunk_writer.add,
+        )
+
+        async with stage("save", 0.95):
+            embedding_chunks = await chunk_writer.close()
+            note_data = NoteModel(
+                user_id=user_id,
+                title=filename,
+                type=type,
+                summary=result.summary,
+                pdf_content=[page["text"] for page in result.transcript] or None,
+                source="Uploaded PDF",
+            )
+            saved_note = await create_note(note_data, chunk_writer.note_id, embedding_chunks)
+    except BaseException:
+        await delete_note_storage(chunk_writer.note_id)
+        raise
+
+    response_note = dict(saved_note)
+    response_note.pop("embeddings", None)
+    return {
+        "summary": result.summary,
+        "note": response_note,
+        "embeddings_status": "success" if embedding_chunks else "skipped",
+        "id": saved_note.get("_id")
+    }
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def run_media_job(job: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    payload = job["payload"]
+    path = payload["path"]
+    if not os.path.exists(path):
+        raise ValueError("Uploaded media is no longer available")
+    try:
+        result = await ingest_media(path, payload["filename"], payload["user_id"],
+                                    payload.get("type", "media"), stage=ctx.stage,
+                                    content_hash=payload.get("sha256"), progress=ctx.progress,
+                                    profile=payload.get("profile"))
+    except asyncio.CancelledError:
+        # shutting down: the job is requeued on the next start and needs its upload
+        raise
+    except Exception:
+        _discard(path)
+        raise
+    _discard(path)
+    return result
+
+
+job_runner.register("media", run_media_job)
@@ -0,0 +1,377 @@
+"""
+Durable background jobs for long-running ingestion.
+Jobs are stored in a local SQLite queue, so anything queued or running when
+a worker dies is picked up again. A running job holds a lease that its
+worker renews while the job runs; only jobs whose lease has run out are
+requeued, so a job is never handed to a second worker while the first is
+still alive. A small pool of async workers runs the jobs. Each pipeline
+stage takes a per-stage semaphore, so GPU and CPU heavy steps stay within
+their concurrency caps however many jobs are in flight.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import threading
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.kv_store import DATA_DIR
+
+# === CONFIG ===
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOBS_UPLOAD_DIR = os.getenv("JOBS_UPLOAD_DIR", os.path.join(DATA_DIR, "uploads"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# a running job whose worker hasn't renewed its lease for this long is requeued;
+# workers renew every JOB_HEARTBEAT_INTERVAL seconds
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", str(JOB_LEASE_SECONDS / 3)))
+
+# concurrency caps per stage; stages not listed are unbounded
+STAGE_LIMITS = {
+    "transcribe": int(os.getenv("JOB_GPU_CONCURRENCY", "1")),
+    "embed": int(os.getenv("JOB_CPU_CONCURRENCY", "2")),
+    "summarize": int(os.getenv("JOB_LLM_CONCURRENCY", "4")),
+}
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    """SQLite-backed job table; every method is a short transaction."""
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    detail TEXT,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # tables created before leases existed
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("worker_id", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for key in ("payload", "result", "detail"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def claim_next(self, worker_id: str, lease: float = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running under `worker_id`'s lease and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?, "
+                    "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease, now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_dict(row)
+        job["status"] = "running"
+        job["attempts"] += 1
+        job["worker_id"] = worker_id
+        return job
+
+    def update(self, job_id: str, owner: Optional[str] = None, **fields: Any) -> bool:
+        """
+        Set columns of a job. With `owner`, only while that worker still holds
+        the job; returns False when it doesn't (the lease ran out and the job
+        was requeued).
+        """
+        for key in ("result", "detail"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], default=str)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        where, params = "id = ?", [job_id]
+        if owner is not None:
+            where, params = where + " AND status = 'running' AND worker_id = ?", params + [owner]
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE jobs SET {columns} WHERE {where}", (*fields.values(), *params))
+        return cursor.rowcount > 0
+
+    def renew(self, job_id: str, worker_id: str, lease: float = JOB_LEASE_SECONDS) -> bool:
+        """Extend a running job's lease; False if `worker_id` no longer holds it."""
+        return self.update(job_id, owner=worker_id, lease_expires_at=time.time() + lease)
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Hand a job back to the queue (worker shutting down) so it needn't wait for its lease to run out."""
+        return self.update(job_id, owner=worker_id, status="queued", worker_id=None, lease_expires_at=None)
+
+    def recover(self, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Requeue running jobs whose lease has run out (their worker died or
+        hung); give up on ones that keep dying. Jobs with a live lease are
+        left with their worker.
+        """
+        now = time.time()
+        # rows claimed before leases existed have none and count as expired
+        expired = "status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker crashed too many times', worker_id = NULL, "
+                f"lease_expires_at = NULL, updated_at = ? WHERE {expired} AND attempts >= ?",
+                (now, now, max_attempts),
+            )
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, updated_at = ? "
+                f"WHERE {expired}",
+                (now, now),
+            )
+        return cursor.rowcount
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class StageStats:
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.seconds = 0.0
+        self.finished_at: deque = deque(maxlen=1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        last_minute = sum(1 for t in self.finished_at if now - t <= 60)
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_seconds": round(self.seconds / self.completed, 3) if self.completed else None,
+            "per_minute": last_minute,
+        }
+
+
+JobHandler = Callable[[Dict[str, Any], "JobContext"], Awaitable[Dict[str, Any]]]
+
+
+class JobContext:
+    """Handed to handlers so they can report stages and progress."""
+
+    def __init__(self, runner: "JobRunner", job: Dict[str, Any]):
+        self.runner = runner
+        self.job = job
+
+    def progress(self, progress: float, detail: Optional[Dict[str, Any]] = None) -> None:
+        fields: Dict[str, Any] = {"progress": round(progress, 4)}
+        if detail is not None:
+            fields["detail"] = detail
+        self.runner.queue.update(self.job["id"], **fields)
+
+    @asynccontextmanager
+    async def stage(self, name: str, progress: Optional[float] = None):
+        """Run a pipeline stage under its concurrency cap and record its throughput."""
+        stats = self.runner.stage_stats(name)
+        semaphore = self.runner.semaphores.get(name)
+        stats.waiting += 1
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+
+        fields: Dict[str, Any] = {"stage": name}
+        if progress is not None:
+            fields["progress"] = progress
+        self.runner.queue.update(self.job["id"], **fields)
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+            stats.completed += 1
+            stats.seconds += time.perf_counter() - start
+            stats.finished_at.append(time.time())
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            if semaphore is not None:
+                semaphore.release()
+
+
+class JobRunner:
+    def __init__(self, queue: JobQueue, workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        # names this process's claims; several API processes can share one queue
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self.semaphores = {name: asyncio.Semaphore(limit) for name, limit in STAGE_LIMITS.items() if limit > 0}
+        self._stages: Dict[str, StageStats] = {}
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def stage_stats(self, name: str) -> StageStats:
+        if name not in self._stages:
+            self._stages[name] = StageStats(STAGE_LIMITS.get(name))
+        return self._stages[name]
+
+    def submit(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        job_id = self.queue.enqueue(kind, payload, job_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self) -> None:
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Requeued {recovered} job(s) whose worker stopped renewing its lease")
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _reaper(self) -> None:
+        """Requeue jobs of workers that died (in any process sharing the queue) while this one runs."""
+        assert self._wakeup is not None
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 2)
+            recovered = self.queue.recover()
+            if recovered:
+                print(f"⚠ Requeued {recovered} job(s) with an expired lease")
+                self._wakeup.set()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            if not self.queue.renew(job_id, self.worker_id):
+                print(f"⚠ Job {job_id} lease lost; its result will not be recorded by this worker")
+                return
+
+    async def _worker(self, index: int) -> None:
+        assert self._wakeup is not None
+        while True:
+            job = self.queue.claim_next(self.worker_id)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self.queue.update(job["id"], status="failed", error=f"No handler for job kind {job['kind']}")
+            return
+        print(f"▶ Job {job['id']} ({job['kind']}) attempt {job['attempts']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            result = await handler(job, JobContext(self, job))
+            if self.queue.update(job["id"], owner=self.worker_id, status="done", stage="done", progress=1.0,
+                                 result=result, error=None, lease_expires_at=None):
+                print(f"✓ Job {job['id']} done")
+        except asyncio.CancelledError:
+            # shutting down: hand it straight back to the queue for the next start
+            self.queue.release(job["id"], self.worker_id)
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.update(job["id"], owner=self.worker_id, status="failed", error=str(e), lease_expires_at=None)
+            print(f"⚠ Job {job['id']} failed: {e}")
+        finally:
+            heartbeat.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.depth(),
+            "workers": self.workers,
+            "stages": {name: stats.snapshot() for name, stats in self._stages.items()},
+        }
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields safe to return to clients (payload holds server paths)."""
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "detail": job["detail"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+job_runner = JobRunner(JobQueue())
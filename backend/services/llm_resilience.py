@@ -0,0 +1,283 @@
+"""
+Deadlines, retries and hedged requests for LLM calls.
+A request-level deadline is kept in a context variable so it follows the
+map-reduce fan-out into every task; each call is additionally capped by a
+per-call timeout, retried with jittered backoff, and optionally hedged with
+a duplicate request once it has been outstanding longer than the recent p95.
+"""
+import os
+import time
+import random
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# === CONFIG ===
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# 0 disables the limiter
+GROQ_CALLS_PER_MINUTE = int(os.getenv("GROQ_CALLS_PER_MINUTE", "0"))
+SUMMARY_DEADLINE = float(os.getenv("SUMMARY_DEADLINE", "300"))
+# share of the summary deadline kept back for the final reduce
+SUMMARY_FINAL_RESERVE = float(os.getenv("SUMMARY_FINAL_RESERVE", "0.25"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request-level deadline leaves no time for another call."""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Bound everything inside the block to `seconds` from now.
+    Nested scopes can only tighten the enclosing deadline, never extend it.
+    """
+    if seconds is None:
+        yield
+        return
+    candidate = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(candidate if current is None else min(current, candidate))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for Groq 429s, whichever client layer raised them."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+
+
+class AsyncRateLimiter:
+    """Sliding one-minute window limiter for async callers (see embed.RateLimiter)."""
+
+    def __init__(self, calls_per_minute: int):
+        self.calls_per_minute = calls_per_minute
+        self.calls: deque = deque()
+        self.lock = asyncio.Lock()
+
+    def _trim(self, now: float) -> None:
+        while self.calls and now - self.calls[0] >= 60:
+            self.calls.popleft()
+
+    async def acquire(self) -> None:
+        if self.calls_per_minute <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._trim(now)
+                if len(self.calls) < self.calls_per_minute:
+                    self.calls.append(now)
+                    return
+                await asyncio.sleep(60 - (now - self.calls[0]))
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now (used for hedges)."""
+        if self.calls_per_minute <= 0:
+            return True
+        now = time.monotonic()
+        self._trim(now)
+        if len(self.calls) < self.calls_per_minute:
+            self.calls.append(now)
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Recent successful call latencies per key, used to derive the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+rate_limiter = AsyncRateLimiter(GROQ_CALLS_PER_MINUTE)
+latency_tracker = LatencyTracker()
+hedge_stats = {"calls": 0, "hedged": 0, "hedge_won": 0, "retries": 0, "timeouts": 0}
+
+
+def _attempt_timeout(timeout: float) -> float:
+    left = remaining_time()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(timeout, left)
+
+
+async def _hedged(factory: Callable[[], Awaitable[T]], key: str,
+                  limiter: AsyncRateLimiter, tracker: LatencyTracker) -> T:
+    primary = asyncio.ensure_future(factory())
+    backup = None
+    try:
+        delay = tracker.percentile(key, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES)
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not limiter.try_acquire():
+            return await primary
+
+        hedge_stats["hedged"] += 1
+        backup = asyncio.ensure_future(factory())
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        hedge_stats["hedge_won"] += 1
+                    return task.result()
+        # both copies failed: surface the primary's error
+        return primary.result()
+    finally:
+        for task in (primary, backup):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def resilient_call(factory: Callable[[], Awaitable[T]],
+                         key: str,
+                         timeout: float = LLM_CALL_TIMEOUT,
+                         retries: int = LLM_MAX_RETRIES,
+                         hedge: bool = LLM_HEDGE,
+                         retry_rate_limits: bool = True,
+                         limiter: Optional[AsyncRateLimiter] = None,
+                         tracker: Optional[LatencyTracker] = None) -> T:
+    """
+    Run `factory()` under the per-call timeout and the request deadline.
+    Retryable failures are retried up to `retries` times with full-jitter
+    exponential backoff; 429s propagate immediately when
+    `retry_rate_limits` is False so the caller can switch models instead.
+    """
+    limiter = limiter or rate_limiter
+    tracker = tracker or latency_tracker
+    hedge_stats["calls"] += 1
+    attempt = 0
+    while True:
+        attempt_timeout = _attempt_timeout(timeout)
+        await limiter.acquire()
+        start = time.monotonic()
+        try:
+            if hedge:
+                result = await asyncio.wait_for(_hedged(factory, key, limiter, tracker), attempt_timeout)
+            else:
+                result = await asyncio.wait_for(factory(), attempt_timeout)
+            tracker.record(key, time.monotonic() - start)
+            return result
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                hedge_stats["timeouts"] += 1
+            if is_rate_limited(e) and not retry_rate_limits:
+                raise
+            if attempt >= retries or not is_retryable(e):
+                raise
+
+        attempt += 1
+        hedge_stats["retries"] += 1
+        backoff = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+        left = remaining_time()
+        if left is not None and backoff >= left:
+            raise DeadlineExceeded("request deadline exceeded while backing off")
+        await asyncio.sleep(backoff)
+
+
+# map-stage summaries are compressed in groups until they fit one final call
+REDUCE_MAX_WORDS = 6000
+REDUCE_GROUP_SIZE = 3
+
+
+async def reduce_summaries(chunk_summaries: List[str],
+                           summarize_chunks: Callable[..., Awaitable[List[str]]],
+                           summarize: Callable[..., Awaitable[str]],
+                           deadline: float = SUMMARY_DEADLINE) -> str:
+    """
+    Compress map-stage summaries until they fit one call, then write the
+    final summary. Within an enclosing deadline (the map stage has already
+    used part of it) the reduce rounds stop at what is left minus the
+    final pass's SUMMARY_FINAL_RESERVE share, so the final call keeps it.
+    A group whose reduce call fails keeps its text, and the rounds stop
+    once time runs out or a round gets nothing done, so the final pass
+    always gets the most compressed content there is.
+    """
+    failed = lambda summary: summary.startswith("Failed to summarize")
+    # chunks that failed at the map stage are left out
+    summaries = [s for s in chunk_summaries if not failed(s)]
+    if not summaries:
+        return chunk_summaries[0] if chunk_summaries else "No content found."
+
+    with deadline_scope(deadline):
+        with deadline_scope(remaining_time() * (1 - SUMMARY_FINAL_RESERVE)):
+            words = len(" ".join(summaries).split())
+            while words > REDUCE_MAX_WORDS:
+                left = remaining_time()
+                if left is not None and left <= 0:
+                    print("⚠ Reduce time used up; finishing with the summaries so far")
+                    break
+                grouped = [
+                    " ".join(summaries[i:i + REDUCE_GROUP_SIZE])
+                    for i in range(0, len(summaries), REDUCE_GROUP_SIZE)
+                ]
+                print(f"🔁 Compressing summaries into {len(grouped)} groups...")
+                reduced = await summarize_chunks(grouped, stage="reduce")
+                if all(failed(r) for r in reduced):
+                    print("⚠ Every reduce call failed; finishing with the summaries so far")
+                    break
+                summaries = [group if failed(r) else r for r, group in zip(reduced, grouped)]
+                shorter = len(" ".join(summaries).split())
+                if shorter >= words:
+                    break  # nothing left that a reduce round can shrink
+                words = shorter
+
+        final_summary = await summarize(" ".join(summaries), stage="final")
+        if failed(final_summary):
+            # still better than saving the error as the note's summary
+            print(f"⚠ Final summary failed; keeping the reduced summaries ({final_summary})")
+            return "\n\n".join(summaries)
+        return final_summary.strip()
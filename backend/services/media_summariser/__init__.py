@@ -1,7 +1,7 @@
 """
 Media summarizer module for processing audio and video files.
 """
-from .process_media import process_media_file, transcribe_audio, convert_video_to_audio
+from .process_media import process_media_file, transcribe_audio, convert_video_to_audio, decode_audio
 
-__all__ = ['process_media_file', 'transcribe_audio', 'convert_video_to_audio']
+__all__ = ['process_media_file', 'transcribe_audio', 'convert_video_to_audio', 'decode_audio']
 
@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 import time
 import threading
 import json
+from functools import lru_cache
 from typing import List,Dict,Any
 
 # ...existing code...
@@ -66,8 +67,10 @@ def create_chunks(documents):
     return splitter.split_documents(documents)
 
 
-# Step 4: Embedding model
+# Step 4: Embedding model (loaded once per process)
+@lru_cache(maxsize=1)
 def get_embedding_model():
+    print("Loading embedding model...")
     return HuggingFaceEmbeddings(
         model_name="sentence-transformers/all-MiniLM-L6-v2"
     )
@@ -81,6 +84,37 @@ def build_and_save_faiss(chunks, embedding_model, save_path="vectorstore/txt_fai
     return db
 
 
+def embed_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """Embed already-chunked texts into {'text', 'embedding'} records, skipping failures."""
+    embedding_model = get_embedding_model()
+
+    vectors = None
+    try:
+        # Preferred API: embed_documents
+        vectors = embedding_model.embed_documents(texts)
+    except Exception:
+        # Fallback: call embed_query per item
+        vectors = []
+        for t in texts:
+            try:
+                v = embedding_model.embed_query(t)
+            except Exception:
+                v = None
+            vectors.append(v)
+
+    # Build serializable list
+    serializable = []
+    for t, v in zip(texts, vectors):
+        if v is None:
+            continue
+        # Ensure floats (e.g., numpy types) are converted
+        serializable.append({
+            "text": t,
+            "embedding": [float(x) for x in v]
+        })
+    return serializable
+
+
 # Step 6: Main function
 def create_embeddings(text: str):
     """
@@ -107,37 +141,8 @@ def create_embeddings(text: str):
             print("⚠ No chunks created for embedding")
             return None
 
-        # Step 4: Get embedding model
-        print("Loading embedding model...")
-        embedding_model = get_embedding_model()
-
-        # Step 5: Compute embeddings for each chunk
-        texts = [c.page_content for c in chunks]
-        vectors = None
-        try:
-            # Preferred API: embed_documents
-            vectors = embedding_model.embed_documents(texts)
-        except Exception:
-            # Fallback: call embed_query per item
-            vectors = []
-            for t in texts:
-                try:
-                    v = embedding_model.embed_query(t)
-                except Exception:
-                    v = None
-                vectors.append(v)
-
-        # Build serializable list
-        serializable = []
-        for t, v in zip(texts, vectors):
-            if v is None:
-                continue
-            # Ensure floats (e.g., numpy types) are converted
-            vec_list = [float(x) for x in v]
-            serializable.append({
-                "text": t,
-                "embedding": vec_list
-            })
+        # Steps 4-5: Compute embeddings for each chunk
+        serializable = embed_texts([c.page_content for c in chunks])
 
         if len(serializable) == 0:
             print("⚠ Embedding computation produced no vectors")
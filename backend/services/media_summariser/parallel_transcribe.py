@@ -0,0 +1,182 @@
+"""
+Parallel transcription of long media on CPU.
+Decoded audio is split at silence boundaries found by voice activity
+detection (or into fixed stretches when the profile turns VAD off), the
+ranges are transcribed across a pool of worker processes (each with its
+own Whisper model and thread budget), and the results are stitched back in
+order with global timestamps.
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.inference_pool import INFERENCE_POOL_ENABLED, INFERENCE_WORKERS
+from .process_media import SAMPLE_RATE, TranscriptionProfile, _fixed_windows, get_pipeline
+
+# === CONFIG ===
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+# 0 splits the cores evenly between every transcribe worker on the machine:
+# this pool's, in each of the INFERENCE_WORKERS processes that can run one
+TRANSCRIBE_THREADS_PER_WORKER = int(os.getenv("TRANSCRIBE_THREADS_PER_WORKER", "0"))
+TRANSCRIBE_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "120"))
+TRANSCRIBE_MP_START = os.getenv("TRANSCRIBE_MP_START", "spawn")
+# silence shorter than this never becomes a cut point
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "500"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def split_at_silence(audio: np.ndarray,
+                     target_seconds: float = TRANSCRIBE_SEGMENT_SECONDS,
+                     sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Group VAD speech regions into (start, end) sample ranges of roughly
+    `target_seconds` each. Cuts only fall inside silences, and long silent
+    stretches between groups are skipped entirely.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    speech = get_speech_timestamps(
+        audio,
+        VadOptions(min_silence_duration_ms=VAD_MIN_SILENCE_MS, max_speech_duration_s=target_seconds),
+        sampling_rate=sample_rate,
+    )
+    if not speech:
+        return []
+
+    target = int(target_seconds * sample_rate)
+    ranges: List[Tuple[int, int]] = []
+    group_start, group_end = speech[0]["start"], speech[0]["end"]
+    for region in speech[1:]:
+        if region["end"] - group_start > target:
+            ranges.append((group_start, group_end))
+            group_start = region["start"]
+        group_end = region["end"]
+    ranges.append((group_start, group_end))
+    return ranges
+
+
+def split_fixed(audio: np.ndarray, target_seconds: float = TRANSCRIBE_SEGMENT_SECONDS,
+                sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """(start, end) sample ranges of `target_seconds` (rounded to 30 s windows) covering all the audio."""
+    step = max(1, int(target_seconds // 30)) * 30 * sample_rate
+    return [(start, min(start + step, len(audio))) for start in range(0, len(audio), step)]
+
+
+def _threads_per_worker(workers: int) -> int:
+    if TRANSCRIBE_THREADS_PER_WORKER > 0:
+        return TRANSCRIBE_THREADS_PER_WORKER
+    # with the inference pool on, each of its workers may be running its own
+    # transcribe pool at the same time
+    processes = workers * (INFERENCE_WORKERS if INFERENCE_POOL_ENABLED else 1)
+    return max(1, (os.cpu_count() or 1) // processes)
+
+
+def _init_worker(model_size: Optional[str], compute_type: Optional[str], cpu_threads: int) -> None:
+    # warm the model once per process so tasks only pay for inference
+    get_pipeline(model_size, "cpu", compute_type, cpu_threads)
+
+
+def _transcribe_range(index: int, audio: np.ndarray, offset: float,
+                      model_size: Optional[str], compute_type: Optional[str], cpu_threads: int,
+                      batch_size: int, language: Optional[str],
+                      beam_size: int = 5, word_timestamps: bool = False,
+                      vad: bool = True) -> Tuple[int, List[Tuple[float, float, str]]]:
+    pipeline = get_pipeline(model_size, "cpu", compute_type, cpu_threads)
+    options: Dict[str, Any] = {} if vad else {"vad_filter": False, "clip_timestamps": _fixed_windows(audio)}
+    segments, _ = pipeline.transcribe(audio, batch_size=batch_size, beam_size=beam_size, language=language,
+                                      word_timestamps=word_timestamps, **options)
+    return index, [(s.start + offset, s.end + offset, s.text.strip()) for s in segments]
+
+
+def _get_pool(workers: int, model_size: Optional[str], compute_type: Optional[str]) -> ProcessPoolExecutor:
+    global _pool, _pool_key
+    key = (workers, model_size, compute_type)
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(TRANSCRIBE_MP_START),
+                initializer=_init_worker,
+                initargs=(model_size, compute_type, _threads_per_worker(workers)),
+            )
+            _pool_key = key
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+def iter_transcribe_parallel(audio: np.ndarray,
+                             workers: int = TRANSCRIBE_WORKERS,
+                             speed: float = 1.0,
+                             batch_size: Optional[int] = None,
+                             model_size: Optional[str] = None,
+                             compute_type: Optional[str] = None,
+                             language: Optional[str] = None,
+                             segment_seconds: float = TRANSCRIBE_SEGMENT_SECONDS,
+                             profile: Optional[TranscriptionProfile] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Transcribe decoded 16 kHz audio across `workers` processes, yielding
+    segments in the same shape as transcribe_audio, in time order, as soon
+    as each range (and every range before it) is done. A profile supplies
+    model, compute type, batch and beam size, word timestamps and VAD; with
+    VAD off the audio is cut into fixed ranges and every second of it is
+    transcribed, as transcribe_audio does.
+    """
+    if profile is not None:
+        model_size = model_size or profile.model_size
+        compute_type = compute_type or profile.compute_type
+        batch_size = batch_size or profile.batch_size
+    batch_size = batch_size or 8
+    beam_size = profile.beam_size if profile else 5
+    word_timestamps = profile.word_timestamps if profile else False
+    vad = profile.vad if profile else True
+
+    ranges = split_at_silence(audio, segment_seconds) if vad else split_fixed(audio, segment_seconds)
+    print(f"{'VAD' if vad else 'Fixed windows'} split audio into {len(ranges)} ranges for {workers} workers")
+    if not ranges:
+        return
+
+    cpu_threads = _threads_per_worker(workers)
+    pool = _get_pool(workers, model_size, compute_type)
+    futures = [
+        pool.submit(_transcribe_range, i, audio[start:end], start / SAMPLE_RATE,
+                    model_size, compute_type, cpu_threads, batch_size, language, beam_size, word_timestamps, vad)
+        for i, (start, end) in enumerate(ranges)
+    ]
+    try:
+        for future in futures:
+            _, segments = future.result()
+            for start, end, text in segments:
+                yield {
+                    "time": f"{start * speed:.2f}s -> {end * speed:.2f}s",
+                    "text": text
+                }
+    except BrokenProcessPool:
+        # a worker died (e.g. OOM); drop the pool so the next call starts fresh
+        _reset_pool()
+        raise
+    finally:
+        # consumer stopped early: don't leave the remaining ranges queued
+        for future in futures:
+            future.cancel()
+
+
+def transcribe_parallel(audio: np.ndarray, **kwargs) -> List[Dict[str, Any]]:
+    """List form of iter_transcribe_parallel; takes the same arguments."""
+    return list(iter_transcribe_parallel(audio, **kwargs))
@@ -3,32 +3,140 @@ Media processing service for audio/video transcription and summarization.
 Handles file uploads, video-to-audio conversion, and transcription.
 """
 import os
-import tempfile
-import gc
-import torch
-from typing import List, Dict, Any
-from faster_whisper import WhisperModel, BatchedInferencePipeline
+import shutil
+import threading
+from dataclasses import dataclass, replace
+from typing import List, Dict, Any, Iterator, Optional, Union
+import numpy as np
 from dotenv import load_dotenv
 import subprocess
 import asyncio
 
+from services.inference_pool import inference_pool
+from .transcript_cache import get_cached_transcript, hash_file, store_transcript, transcript_cache_key
+
 load_dotenv()
 
-WHISPER_MODEL = WhisperModel("small", device="cuda", compute_type="float32",cpu_threads=0,num_workers=1)
-if not torch.cuda.is_available():
-    raise RuntimeError("GPU not being used — aborting.")
-PIPELINE = BatchedInferencePipeline(model=WHISPER_MODEL)
-print(WHISPER_MODEL.model.device)
+# === CONFIG ===
+# the model is built on first use, so importing this module (and main.py)
+# needs neither a GPU nor the model weights
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")              # auto | cpu | cuda
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "auto")  # auto | int8 | int8_float16 | float16 | float32
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 lets CTranslate2 decide
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+# audio is played this much faster into Whisper; timestamps are scaled back
+MEDIA_SPEED_FACTOR = float(os.getenv("MEDIA_SPEED_FACTOR", "2.0"))
+SAMPLE_RATE = 16000
+# single: one pipeline call; parallel: VAD split across a process pool;
+# auto: parallel for long audio when transcribing on CPU
+TRANSCRIBE_MODE = os.getenv("TRANSCRIBE_MODE", "auto")
+TRANSCRIBE_PARALLEL_MIN_SECONDS = float(os.getenv("TRANSCRIBE_PARALLEL_MIN_SECONDS", "600"))
+TRANSCRIBE_PROFILE = os.getenv("TRANSCRIBE_PROFILE", "balanced")
+
+
+@dataclass(frozen=True)
+class TranscriptionProfile:
+    """Speed/quality trade-off for one transcription; picked per request by name."""
+    name: str
+    model_size: str
+    compute_type: str     # as WHISPER_COMPUTE_TYPE; auto picks per device
+    beam_size: int
+    batch_size: int
+    word_timestamps: bool
+    speed: float          # atempo factor applied while decoding
+    vad: bool             # skip silence; off transcribes fixed 30 s windows
+
+    @property
+    def variant(self) -> str:
+        """Settings besides model/compute/speed that change the transcript (cache key part)."""
+        return f"b{self.beam_size}{'-w' if self.word_timestamps else ''}{'' if self.vad else '-novad'}"
+
+
+# balanced follows the WHISPER_* / MEDIA_SPEED_FACTOR settings
+PROFILES = {
+    "fast": TranscriptionProfile("fast", "base", "int8", beam_size=1, batch_size=16,
+                                 word_timestamps=False, speed=2.0, vad=True),
+    "balanced": TranscriptionProfile("balanced", WHISPER_MODEL_SIZE, WHISPER_COMPUTE_TYPE, beam_size=5,
+                                     batch_size=8, word_timestamps=False, speed=MEDIA_SPEED_FACTOR, vad=True),
+    "accurate": TranscriptionProfile("accurate", "medium", WHISPER_COMPUTE_TYPE, beam_size=5, batch_size=8,
+                                     word_timestamps=False, speed=1.0, vad=True),
+}
+
+
+def get_profile(name: Optional[str] = None) -> TranscriptionProfile:
+    """Look a profile up by name (default TRANSCRIBE_PROFILE); ValueError if unknown."""
+    name = (name or TRANSCRIBE_PROFILE).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown transcription profile: {name}. Available: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+_pipelines: Dict[tuple, Any] = {}
+_pipelines_lock = threading.Lock()
+
+
+def resolve_device(device: str = WHISPER_DEVICE) -> str:
+    if device != "auto":
+        return device
+    try:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def resolve_compute_type(device: str, compute_type: str = WHISPER_COMPUTE_TYPE) -> str:
+    if compute_type != "auto":
+        return compute_type
+    return "float16" if device == "cuda" else "int8"
+
+
+def get_pipeline(model_size: str | None = None,
+                 device: str | None = None,
+                 compute_type: str | None = None,
+                 cpu_threads: int | None = None):
+    """
+    Return a BatchedInferencePipeline for the requested settings, loading
+    the Whisper model the first time each combination is asked for.
+    """
+    model_size = model_size or WHISPER_MODEL_SIZE
+    device = resolve_device(device or WHISPER_DEVICE)
+    compute_type = resolve_compute_type(device, compute_type or WHISPER_COMPUTE_TYPE)
+    cpu_threads = WHISPER_CPU_THREADS if cpu_threads is None else cpu_threads
+    key = (model_size, device, compute_type, cpu_threads)
+
+    pipeline = _pipelines.get(key)
+    if pipeline is not None:
+        return pipeline
+
+    with _pipelines_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            from faster_whisper import WhisperModel, BatchedInferencePipeline
 
+            print(f"Loading Whisper '{model_size}' on {device} ({compute_type}, cpu_threads={cpu_threads})...")
+            model = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=WHISPER_NUM_WORKERS
+            )
+            pipeline = BatchedInferencePipeline(model=model)
+            _pipelines[key] = pipeline
+            print(model.model.device)
+    return pipeline
 
-def convert_video_to_audio(input_file: str, output_file: str, speed: float = 2.0) -> bool:
+
+def convert_video_to_audio(input_file: str, output_file: str, speed: float = MEDIA_SPEED_FACTOR) -> bool:
     """
     Convert an MP4 file to MP3 using ffmpeg.
     
     Args:
         input_file: Path to input video file
         output_file: Path to output audio file
-        speed: Audio speed multiplier (default 1.25)
+        speed: Audio speed multiplier (default MEDIA_SPEED_FACTOR)
     
     Returns:
         True if successful, False otherwise
@@ -38,7 +146,7 @@ def convert_video_to_audio(input_file: str, output_file: str, speed: float = 2.0
             "ffmpeg",
             "-i", input_file,
             "-vn",  # No video
-            "-filter:a", f"atempo={speed}",  # Speed up the audio
+            "-filter:a", _atempo_filter(speed),  # Speed up the audio
             "-acodec", "libmp3lame",  # MP3 codec
             "-b:a", "192k",  # Audio bitrate
             "-y",  # Overwrite output file if exists
@@ -54,82 +162,253 @@ def convert_video_to_audio(input_file: str, output_file: str, speed: float = 2.0
         return False
 
 
-def transcribe_audio(audio_path: str, batch_size: int = 8) -> List[Dict[str, Any]]:
+def _atempo_filter(speed: float) -> str:
+    """atempo only accepts 0.5-2.0 per stage on older ffmpeg builds, so chain stages."""
+    stages = []
+    while speed > 2.0:
+        stages.append(2.0)
+        speed /= 2.0
+    while speed < 0.5:
+        stages.append(0.5)
+        speed /= 0.5
+    stages.append(speed)
+    return ",".join(f"atempo={s:g}" for s in stages)
+
+
+def decode_audio(input_file: str, speed: float = MEDIA_SPEED_FACTOR,
+                 sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any audio/video file to mono float32 PCM at `sample_rate` through
+    an ffmpeg pipe, straight into a NumPy buffer with no intermediate file.
+
+    Raises:
+        FileNotFoundError: ffmpeg is not installed
+        RuntimeError: ffmpeg failed to decode the input
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", input_file,
+        "-vn",  # No video
+        "-ac", "1",
+        "-ar", str(sample_rate),
+    ]
+    if speed != 1.0:
+        command += ["-filter:a", _atempo_filter(speed)]
+    command += ["-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    buffer = bytearray()
+    try:
+        while True:
+            chunk = process.stdout.read(1 << 20)  # type: ignore
+            if not chunk:
+                break
+            buffer += chunk
+        stderr = process.stderr.read()  # type: ignore
+    finally:
+        process.stdout.close()  # type: ignore
+        process.stderr.close()  # type: ignore
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode media: {stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(buffer, dtype=np.float32)
+
+
+def _fixed_windows(audio: np.ndarray, seconds: int = 30) -> List[Dict[str, float]]:
+    # the batched pipeline needs explicit clips when VAD is off; it takes them
+    # in seconds and multiplies by the sampling rate itself
+    duration = len(audio) / SAMPLE_RATE
+    return [{"start": float(start), "end": min(float(start + seconds), duration)}
+            for start in range(0, int(np.ceil(duration)), seconds) if start < duration]
+
+
+def iter_transcribe_audio(audio: Union[str, np.ndarray], batch_size: Optional[int] = None,
+                          speed: float = 1.0, language: Optional[str] = None,
+                          profile: Optional[TranscriptionProfile] = None) -> Iterator[Dict[str, Any]]:
+    """Yield transcript segments as Whisper decodes them instead of waiting for the whole file."""
+    profile = profile or get_profile()
+    options: Dict[str, Any] = {}
+    if not profile.vad and isinstance(audio, np.ndarray):
+        options["vad_filter"] = False
+        options["clip_timestamps"] = _fixed_windows(audio)
     try:
         
-        # Transcribe
-        segments, info = PIPELINE.transcribe(
-            audio_path, 
-            batch_size=batch_size, 
-            word_timestamps=True
+        # Transcribe (segments is lazy; inference runs as it is iterated)
+        segments, info = get_pipeline(profile.model_size, compute_type=profile.compute_type).transcribe(
+            audio, 
+            batch_size=batch_size or profile.batch_size, 
+            beam_size=profile.beam_size,
+            word_timestamps=profile.word_timestamps,
+            language=language,
+            **options
         )
         
-        return [
-            {
-                "time": f"{s.start:.2f}s -> {s.end:.2f}s",
+        # map timestamps of sped-up audio back onto the original media
+        for s in segments:
+            yield {
+                "time": f"{s.start * speed:.2f}s -> {s.end * speed:.2f}s",
                 "text": s.text.strip()
             }
-            for s in segments
-        ]
     
     except Exception as e:
         print(f"Error during transcription: {e}")
         raise
 
 
-async def process_media_file(file_path: str, filename: str) -> List[Dict[str, Any]]:
+def transcribe_audio(audio: Union[str, np.ndarray], batch_size: Optional[int] = None,
+                     speed: float = 1.0, language: Optional[str] = None,
+                     profile: Optional[TranscriptionProfile] = None) -> List[Dict[str, Any]]:
+    return list(iter_transcribe_audio(audio, batch_size, speed, language, profile))
+
+
+def _use_parallel(audio: Union[str, np.ndarray]) -> bool:
+    from .parallel_transcribe import TRANSCRIBE_WORKERS
+
+    if not isinstance(audio, np.ndarray) or TRANSCRIBE_MODE == "single":
+        return False
+    if TRANSCRIBE_MODE == "parallel":
+        return True
+    return (
+        TRANSCRIBE_WORKERS > 1
+        and resolve_device() == "cpu"
+        and len(audio) / SAMPLE_RATE >= TRANSCRIBE_PARALLEL_MIN_SECONDS
+    )
+
+
+def _media_settings(filename: str, profile: Optional[str] = None) -> tuple:
+    """The profile a file is transcribed with, and whether ffmpeg decodes it."""
+    settings = get_profile(profile)
+    # Determine file type
+    file_ext = os.path.splitext(filename)[1].lower()
+    is_video = file_ext in ['.mp4', '.avi', '.mov', '.mkv', '.webm']
+    is_audio = file_ext in ['.mp3', '.wav', '.m4a', '.ogg', '.flac', '.aac']
+
+    if not (is_video or is_audio):
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+    # Without ffmpeg, audio falls back to Whisper's own decoder at normal speed
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg and is_video:
+        raise Exception("ffmpeg not found. Please install ffmpeg.")
+    if not has_ffmpeg:
+        settings = replace(settings, speed=1.0, vad=True)
+    return settings, has_ffmpeg
+
+
+def _lookup_transcript(file_path: str, filename: str, content_hash: Optional[str],
+                       language: Optional[str], profile: Optional[str]) -> tuple:
+    settings, _ = _media_settings(filename, profile)
+    cache_key = transcript_cache_key(
+        content_hash or hash_file(file_path),
+        settings.model_size,
+        resolve_compute_type(resolve_device(), settings.compute_type),
+        settings.speed,
+        language,
+        settings.variant,
+    )
+    return cache_key, get_cached_transcript(cache_key)
+
+
+def iter_media_segments(file_path: str, filename: str,
+                        language: Optional[str] = None,
+                        profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Blocking generator that runs in the inference pool: decode and transcribe
+    a media file, yielding transcript segments as Whisper produces them.
+    The transcript cache is checked and filled by the callers in the API
+    process (process_media_file, cached_media_segments), where its counters
+    are reported.
+    """
+    settings, has_ffmpeg = _media_settings(filename, profile)
+    speed = settings.speed
+
+    # Decode straight to 16 kHz PCM
+    if has_ffmpeg:
+        try:
+            audio = decode_audio(file_path, speed=speed)
+        except RuntimeError as e:
+            raise Exception(f"Failed to convert video to audio: {e}")
+        print(f"Audio decoded: {len(audio) / SAMPLE_RATE:.1f}s of {SAMPLE_RATE} Hz PCM")
+    else:
+        audio = file_path
+    # Transcribe audio (this is a blocking operation)
+    if _use_parallel(audio):
+        from .parallel_transcribe import iter_transcribe_parallel
+        segments = iter_transcribe_parallel(audio, speed=speed, language=language, profile=settings)  # type: ignore
+    else:
+        segments = iter_transcribe_audio(audio, speed=speed, language=language, profile=settings)
+
+    count = 0
+    for segment in segments:
+        count += 1
+        yield segment
+    print(f"Transcript generated : {count} segments")
+
+
+def transcribe_media_sync(file_path: str, filename: str,
+                          language: Optional[str] = None,
+                          profile: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Blocking, picklable form of iter_media_segments for the inference pool."""
+    return list(iter_media_segments(file_path, filename, language, profile))
+
+
+def cached_media_segments(file_path: str, filename: str,
+                          content_hash: Optional[str] = None,
+                          language: Optional[str] = None,
+                          profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Blocking generator for the streaming pipeline: replays a cached
+    transcript, or streams iter_media_segments from the inference pool and
+    caches the run once it has been fully consumed.
+    """
+    cache_key, cached = _lookup_transcript(file_path, filename, content_hash, language, profile)
+    if cached is not None:
+        print(f"Transcript cache hit: {len(cached)} segments")
+        yield from cached
+        return
+
+    segments = inference_pool.iterate("transcribe", iter_media_segments, file_path, filename, language, profile)
+    transcript = []
+    try:
+        for segment in segments:
+            transcript.append(segment)
+            yield segment
+    finally:
+        segments.close()
+    store_transcript(cache_key, transcript)
+
+
+async def process_media_file(file_path: str, filename: str,
+                             content_hash: Optional[str] = None,
+                             language: Optional[str] = None,
+                             profile: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Process a media file (audio or video) and return transcript.
-    Runs blocking operations in a thread pool to avoid blocking the event loop.
+    ffmpeg and Whisper run in the inference process pool (or a thread when
+    the pool is disabled) so the event loop and its GIL stay free.
     
     Args:
         file_path: Path to the uploaded file
         filename: Original filename
+        content_hash: SHA-256 of the file bytes if already known (uploads
+            hash while streaming); computed here otherwise
+        language: Whisper language code, None to auto-detect
+        profile: Transcription profile name (fast / balanced / accurate),
+            None for TRANSCRIBE_PROFILE
     
     Returns:
         List of transcript segments
     """
-    temp_audio_path = None
-    
-    def _process_sync():
-        """Synchronous processing function to run in thread pool"""
-        nonlocal temp_audio_path
-        
-        # Determine file type
-        file_ext = os.path.splitext(filename)[1].lower()
-        is_video = file_ext in ['.mp4', '.avi', '.mov', '.mkv', '.webm']
-        is_audio = file_ext in ['.mp3', '.wav', '.m4a', '.ogg', '.flac', '.aac']
-        
-        if not (is_video or is_audio):
-            raise ValueError(f"Unsupported file format: {file_ext}")
-        
-        # If video, convert to audio first
-        if is_video:
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-                temp_audio_path = tmp.name
-            success = convert_video_to_audio(file_path, temp_audio_path)
-            if not success:
-                raise Exception("Failed to convert video to audio")
-            audio_path = temp_audio_path
-        else:
-            audio_path = file_path
-        print("Audio Path generated : ", audio_path)
-        # Transcribe audio (this is a blocking operation)
-        transcript = transcribe_audio(audio_path)
-        print("Transcript generated : ", transcript)
-        return transcript
-    
-    try:
-        # Run blocking operations in thread pool
-        loop = asyncio.get_event_loop()
-        transcript = await loop.run_in_executor(None, _process_sync)
-        return transcript
-    
-    finally:
-        # Clean up temporary audio file if created
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            try:
-                os.remove(temp_audio_path)
-            except OSError:
-                pass
+    cache_key, cached = await asyncio.to_thread(
+        _lookup_transcript, file_path, filename, content_hash, language, profile
+    )
+    if cached is not None:
+        print(f"Transcript cache hit: {len(cached)} segments")
+        return cached
 
+    transcript = await inference_pool.run(
+        "transcribe", transcribe_media_sync, file_path, filename, language, profile
+    )
+    await asyncio.to_thread(store_transcript, cache_key, transcript)
+    return transcript
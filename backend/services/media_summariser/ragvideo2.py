@@ -31,7 +31,7 @@ load_dotenv()
 
 # === Wrap Groq Chat API into LangChain-compatible class ===
 class GroqLLM(LLM):
-    model: str = "llama-3.3-70b-versatile"
+    model: str = os.getenv("GROQ_STRONG_MODEL", "llama-3.3-70b-versatile")
     temperature: float = 0.6
     _client: Groq = PrivateAttr()
 
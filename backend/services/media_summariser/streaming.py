@@ -0,0 +1,255 @@
+"""
+Streaming media pipeline: transcript segments flow out of Whisper through
+bounded queues into chunk assembly, map-stage summarization and embedding
+while transcription is still running. Only the final reduce waits for the
+end of the audio, so end-to-end time approaches Whisper time plus one reduce.
+
+    Whisper thread --segments--> assembler --chunks--> map workers (LLM)
+                                           \\--chunks--> embed worker (batched)
+    ... end of audio ... --> reduce + final summary
+
+The same pipeline ingests PDFs page by page (services.ingestion.ingest_pdf)
+with the PDF summarizer's cleaning, prompts and reduce plugged in.
+"""
+import os
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from services.Media_summarizer import (
+    CHUNK_OVERLAP, CHUNK_SIZE, MAX_PARALLEL, clean_transcript_text,
+    reduce_chunk_summaries, safe_summarize,
+)
+from services.llm_resilience import SUMMARY_DEADLINE
+from services.inference_pool import inference_pool
+from utils.timed_transcript import parse_time
+
+# === CONFIG ===
+# max items buffered between stages; a full queue pauses the stage feeding it
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_CHUNK_SIZE = 800
+EMBED_CHUNK_OVERLAP = 150
+# minimum seconds between progress reports
+STREAM_REPORT_INTERVAL = float(os.getenv("STREAM_REPORT_INTERVAL", "2"))
+
+_DONE = object()
+
+
+@asynccontextmanager
+async def _no_stage(name: str, progress: Optional[float] = None):
+    yield
+
+
+@dataclass
+class StreamResult:
+    transcript: List[Dict[str, Any]]
+    summary: str
+    embeddings: Optional[List[Dict[str, Any]]]
+
+
+class IncrementalSplitter:
+    """
+    Feed text piece by piece and get back finished chunks. Only the tail
+    that may still grow is kept, so chunk boundaries (and overlaps) come
+    out as the whole-text splitter would produce them, give or take the
+    point where a segment happened to end.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.chunk_size = chunk_size
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.parts: List[str] = []
+        self.length = 0
+
+    def feed(self, text: str) -> List[str]:
+        if not text:
+            return []
+        self.parts.append(text)
+        self.length += len(text) + 1
+        if self.length < 2 * self.chunk_size:
+            return []
+        chunks = self.splitter.split_text(" ".join(self.parts))
+        tail = chunks.pop()
+        self.parts, self.length = [tail], len(tail)
+        return chunks
+
+    def flush(self) -> List[str]:
+        text = " ".join(self.parts).strip()
+        self.parts, self.length = [], 0
+        return self.splitter.split_text(text) if text else []
+
+
+def _parse_end(segment: Dict[str, Any]) -> Optional[float]:
+    try:
+        return parse_time(segment["time"])[1]
+    except (KeyError, ValueError):
+        return None
+
+
+async def run_streaming_pipeline(segments: Iterable[Dict[str, Any]],
+                                 stage=_no_stage,
+                                 report: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                 deadline: float = SUMMARY_DEADLINE,
+                                 *,
+                                 clean: Callable[[str], str] = clean_transcript_text,
+                                 map_summarize: Callable[[str, str], Awaitable[str]] = safe_summarize,
+                                 reduce: Callable[[List[str], float], Awaitable[str]] = reduce_chunk_summaries,
+                                 keep_items: bool = True,
+                                 unit: str = "segments",
+                                 source_stage: str = "transcribe",
+                                 embeddings_sink: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+                                 ) -> StreamResult:
+    """
+    Consume a blocking iterator of {"text": ...} items (transcript segments
+    from cached_media_segments, PDF pages) and return the items, summary and
+    embeddings. `stage` is the job runner's stage context manager; `report`
+    receives progress counters.
+
+    With keep_items=False the items are dropped once chunked, and with an
+    `embeddings_sink` each embedded batch is handed over instead of being
+    collected, so memory no longer grows with the length of the input.
+    """
+    loop = asyncio.get_running_loop()
+    segment_queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+    map_queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+    embed_queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+    stop = threading.Event()
+
+    transcript: List[Dict[str, Any]] = []
+    map_results: Dict[int, str] = {}
+    embeddings: List[Dict[str, Any]] = []
+    counters = {unit: 0, "chunks": 0, "chunks_summarized": 0, "chunks_embedded": 0}
+    if unit == "segments":
+        counters["transcribed_seconds"] = 0.0
+    last_report = [0.0]
+
+    def maybe_report(force: bool = False) -> None:
+        now = time.monotonic()
+        if report and (force or now - last_report[0] >= STREAM_REPORT_INTERVAL):
+            last_report[0] = now
+            report(dict(counters))
+
+    def put_from_thread(item) -> bool:
+        # bounded put that gives up once the pipeline has been torn down
+        while not stop.is_set():
+            future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(segment_queue.put(item), 0.5), loop)
+            try:
+                future.result()
+                return True
+            except TimeoutError:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for segment in segments:
+                if not put_from_thread(segment):
+                    return
+        except BaseException as e:
+            put_from_thread(e)
+            return
+        finally:
+            # stops Whisper (or cancels queued parallel ranges) if we quit early
+            close = getattr(segments, "close", None)
+            if close:
+                close()
+        put_from_thread(_DONE)
+
+    async def transcribe() -> None:
+        async with stage(source_stage, 0.05):
+            await loop.run_in_executor(None, produce)
+
+    async def assemble() -> None:
+        summary_splitter = IncrementalSplitter(CHUNK_SIZE, CHUNK_OVERLAP)
+        embed_splitter = IncrementalSplitter(EMBED_CHUNK_SIZE, EMBED_CHUNK_OVERLAP)
+
+        async def emit(summary_chunks: List[str], embed_chunks: List[str]) -> None:
+            for chunk in summary_chunks:
+                await map_queue.put((counters["chunks"], chunk))
+                counters["chunks"] += 1
+            for chunk in embed_chunks:
+                await embed_queue.put(chunk)
+
+        try:
+            while True:
+                item = await segment_queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                if keep_items:
+                    transcript.append(item)
+                counters[unit] += 1
+                if "transcribed_seconds" in counters:
+                    counters["transcribed_seconds"] = _parse_end(item) or counters["transcribed_seconds"]
+                maybe_report()
+                await emit(summary_splitter.feed(clean(item["text"])),
+                           embed_splitter.feed(item["text"]))
+            await emit(summary_splitter.flush(), embed_splitter.flush())
+        finally:
+            for _ in range(MAX_PARALLEL):
+                await map_queue.put(_DONE)
+            await embed_queue.put(_DONE)
+
+    async def summarize_worker() -> None:
+        while True:
+            item = await map_queue.get()
+            if item is _DONE:
+                return
+            index, chunk = item
+            map_results[index] = await map_summarize(chunk, "map")
+            counters["chunks_summarized"] += 1
+
+    async def embed_worker() -> None:
+        finished = False
+        while not finished:
+            batch = []
+            item = await embed_queue.get()
+            while item is not _DONE:
+                batch.append(item)
+                if len(batch) >= EMBED_BATCH_SIZE or embed_queue.empty():
+                    break
+                item = embed_queue.get_nowait()
+            finished = item is _DONE
+            if not batch:
+                continue
+            try:
+                async with stage("embed"):
+                    records = await inference_pool.embed(batch)
+                if embeddings_sink:
+                    await embeddings_sink(records)
+                else:
+                    embeddings.extend(records)
+                counters["chunks_embedded"] += len(batch)
+            except Exception as embedding_error:
+                print(f"⚠ Error creating embeddings: {str(embedding_error)}")
+
+    tasks = [
+        asyncio.create_task(transcribe()),
+        asyncio.create_task(assemble()),
+        asyncio.create_task(embed_worker()),
+        *[asyncio.create_task(summarize_worker()) for _ in range(MAX_PARALLEL)],
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+    maybe_report(force=True)
+
+    if not counters[unit]:
+        return StreamResult(transcript, "", None)
+
+    chunk_summaries = [map_results[i] for i in sorted(map_results)]
+    print(f"Streamed {counters[unit]} {unit} into {len(chunk_summaries)} chunks, "
+          f"{counters['chunks_embedded']} embeddings")
+    async with stage("summarize", 0.85):
+        summary = await reduce(chunk_summaries, deadline)
+    return StreamResult(transcript, summary, embeddings or None)
@@ -0,0 +1,48 @@
+"""
+Persistent cache of Whisper transcripts, keyed by the uploaded file's
+content hash plus every setting that changes the transcript (model size,
+compute type, speed factor, language, decoding options). Re-uploading the
+same recording skips decoding and inference entirely.
+"""
+import os
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from utils.kv_store import DATA_DIR, KVStore
+
+# === CONFIG ===
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE", "1") == "1"
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join(DATA_DIR, "transcripts.sqlite3"))
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+
+transcript_cache = KVStore(
+    TRANSCRIPT_CACHE_PATH,
+    max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024,
+    max_entries=TRANSCRIPT_CACHE_MAX_ENTRIES,
+)
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def transcript_cache_key(content_hash: str, model_size: str, compute_type: str,
+                         speed: float, language: Optional[str] = None, variant: str = "") -> str:
+    return f"{content_hash}:{model_size}:{compute_type}:{speed:g}:{language or 'auto'}:{variant}"
+
+
+def get_cached_transcript(key: str) -> Optional[List[Dict[str, Any]]]:
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return None
+    return transcript_cache.get(key)
+
+
+def store_transcript(key: str, transcript: List[Dict[str, Any]]) -> None:
+    # an empty transcript usually means a decode problem; let the next upload retry
+    if TRANSCRIPT_CACHE_ENABLED and transcript:
+        transcript_cache.set(key, transcript)
@@ -0,0 +1,228 @@
+"""
+Per-stage Groq model routing.
+Every LLM call names its stage (map, reduce, final, flashcards, prompts,
+chat). The active policy maps each stage to a primary model, a faster
+fallback model and a latency budget; calls that blow the budget or hit a
+rate limit on the primary are retried once on the fallback.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from langchain_groq import ChatGroq
+from pydantic import SecretStr
+
+from services.llm_resilience import hedge_stats, is_rate_limited, remaining_time, resilient_call
+
+load_dotenv()
+
+# === CONFIG ===
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+FAST_MODEL = os.getenv("GROQ_FAST_MODEL", os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"))
+STRONG_MODEL = os.getenv("GROQ_STRONG_MODEL", "llama-3.3-70b-versatile")
+# "fast" keeps every stage on the model the app has always used; "balanced"
+# and "quality" move stages to STRONG_MODEL, which costs more per call
+MODEL_ROUTING_POLICY = os.getenv("MODEL_ROUTING_POLICY", "fast")
+# how long a rate-limited model is skipped before it is tried again
+RATE_LIMIT_COOLDOWN = float(os.getenv("MODEL_RATE_LIMIT_COOLDOWN", "30"))
+LATENCY_WINDOW = 500
+
+STAGES = ("map", "reduce", "final", "flashcards", "prompts", "chat")
+
+
+@dataclass(frozen=True)
+class StageRoute:
+    model: str
+    fallback: str
+    budget_s: float
+
+
+POLICIES: Dict[str, Dict[str, StageRoute]] = {
+    # everything on the fast model, as before routing existed
+    "fast": {
+        "map": StageRoute(FAST_MODEL, FAST_MODEL, 30.0),
+        "reduce": StageRoute(FAST_MODEL, FAST_MODEL, 30.0),
+        "final": StageRoute(FAST_MODEL, FAST_MODEL, 45.0),
+        "flashcards": StageRoute(FAST_MODEL, FAST_MODEL, 10.0),
+        "prompts": StageRoute(FAST_MODEL, FAST_MODEL, 8.0),
+        "chat": StageRoute(FAST_MODEL, FAST_MODEL, 20.0),
+    },
+    # cheap fan-out on the fast model, the stronger model where quality shows
+    "balanced": {
+        "map": StageRoute(FAST_MODEL, FAST_MODEL, 20.0),
+        "reduce": StageRoute(STRONG_MODEL, FAST_MODEL, 30.0),
+        "final": StageRoute(STRONG_MODEL, FAST_MODEL, 45.0),
+        "flashcards": StageRoute(FAST_MODEL, FAST_MODEL, 10.0),
+        "prompts": StageRoute(FAST_MODEL, FAST_MODEL, 8.0),
+        "chat": StageRoute(FAST_MODEL, FAST_MODEL, 20.0),
+    },
+    "quality": {
+        "map": StageRoute(STRONG_MODEL, FAST_MODEL, 30.0),
+        "reduce": StageRoute(STRONG_MODEL, FAST_MODEL, 40.0),
+        "final": StageRoute(STRONG_MODEL, FAST_MODEL, 60.0),
+        "flashcards": StageRoute(STRONG_MODEL, FAST_MODEL, 12.0),
+        "prompts": StageRoute(STRONG_MODEL, FAST_MODEL, 10.0),
+        "chat": StageRoute(STRONG_MODEL, FAST_MODEL, 25.0),
+    },
+}
+
+
+def _percentile(samples, pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 4)
+
+
+def _summary(samples) -> Dict[str, Any]:
+    return {
+        "count": len(samples),
+        "p50": _percentile(samples, 50),
+        "p95": _percentile(samples, 95),
+        "p99": _percentile(samples, 99),
+    }
+
+
+class ModelRouter:
+    """Routes stage calls to models according to the active policy."""
+
+    def __init__(self, policy: str = MODEL_ROUTING_POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown routing policy: {policy}. Available: {', '.join(POLICIES)}")
+        self.policy = policy
+        self._llms: Dict[tuple, ChatGroq] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._calls: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self._fallbacks: Dict[str, Dict[str, int]] = {
+            stage: {"budget": 0, "rate_limited": 0, "cooldown": 0} for stage in STAGES
+        }
+        self._stage_latency: Dict[tuple, deque] = {}
+        self._request_latency: Dict[tuple, deque] = {}
+
+    def route(self, stage: str) -> StageRoute:
+        return POLICIES[self.policy][stage]
+
+    def llm(self, model: str, temperature: Optional[float] = None) -> ChatGroq:
+        key = (model, temperature)
+        if key not in self._llms:
+            kwargs: Dict[str, Any] = {}
+            if temperature is not None:
+                kwargs["temperature"] = temperature
+            # retries and timeouts are handled by llm_resilience
+            self._llms[key] = ChatGroq(
+                model=model,
+                api_key=SecretStr(GROQ_API_KEY) if GROQ_API_KEY else None,
+                max_retries=0,
+                **kwargs
+            )
+        return self._llms[key]
+
+    async def _call(self, stage: str, model: str, prompt: str,
+                    max_tokens: Optional[int], temperature: Optional[float],
+                    retry_rate_limits: bool = True) -> str:
+        llm = self.llm(model, temperature)
+        runnable = llm.bind(max_tokens=max_tokens) if max_tokens else llm
+        start = time.perf_counter()
+        message = await resilient_call(
+            lambda: runnable.ainvoke(prompt),
+            key=model,
+            retry_rate_limits=retry_rate_limits
+        )
+        self._record(self._stage_latency, (stage, model), time.perf_counter() - start)
+        return str(message.content)
+
+    async def ainvoke(self, stage: str, prompt: str,
+                      max_tokens: Optional[int] = None,
+                      temperature: Optional[float] = None) -> str:
+        """Run one prompt for the given stage and return the reply text."""
+        route = self.route(stage)
+        self._calls[stage] += 1
+
+        if route.model == route.fallback:
+            return await self._call(stage, route.model, prompt, max_tokens, temperature)
+
+        if self._cooldown_until.get(route.model, 0.0) > time.monotonic():
+            self._fallbacks[stage]["cooldown"] += 1
+            return await self._call(stage, route.fallback, prompt, max_tokens, temperature)
+
+        budget = route.budget_s
+        left = remaining_time()
+        if left is not None:
+            budget = min(budget, max(left, 0.0))
+
+        try:
+            # rate limits on the primary go straight to the fallback instead of retrying
+            return await asyncio.wait_for(
+                self._call(stage, route.model, prompt, max_tokens, temperature, retry_rate_limits=False),
+                timeout=budget
+            )
+        except asyncio.TimeoutError:
+            print(f"⚠ {stage}: {route.model} exceeded {budget:.1f}s budget, falling back to {route.fallback}")
+            self._fallbacks[stage]["budget"] += 1
+        except Exception as e:
+            if not is_rate_limited(e):
+                raise
+            print(f"⚠ {stage}: {route.model} rate limited, falling back to {route.fallback}")
+            self._cooldown_until[route.model] = time.monotonic() + RATE_LIMIT_COOLDOWN
+            self._fallbacks[stage]["rate_limited"] += 1
+
+        return await self._call(stage, route.fallback, prompt, max_tokens, temperature)
+
+    @asynccontextmanager
+    async def track_request(self, kind: str):
+        """Record the end-to-end latency of one request under the active policy."""
+        policy = self.policy
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(self._request_latency, (policy, kind), time.perf_counter() - start)
+
+    @staticmethod
+    def _record(table: Dict[tuple, deque], key: tuple, seconds: float) -> None:
+        samples = table.get(key)
+        if samples is None:
+            samples = table[key] = deque(maxlen=LATENCY_WINDOW)
+        samples.append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        for stage in STAGES:
+            route = self.route(stage)
+            stages[stage] = {
+                "model": route.model,
+                "fallback": route.fallback,
+                "budget_s": route.budget_s,
+                "calls": self._calls[stage],
+                "fallbacks": dict(self._fallbacks[stage]),
+                "latency_by_model": {
+                    model: _summary(samples)
+                    for (s, model), samples in self._stage_latency.items() if s == stage
+                },
+            }
+
+        requests: Dict[str, Dict[str, Any]] = {}
+        for (policy, kind), samples in self._request_latency.items():
+            requests.setdefault(policy, {})[kind] = _summary(samples)
+
+        return {
+            "policy": self.policy,
+            # every policy's routes side by side, to compare against the active one
+            "policies": {
+                name: {stage: {"model": r.model, "fallback": r.fallback, "budget_s": r.budget_s}
+                       for stage, r in routes.items()}
+                for name, routes in POLICIES.items()
+            },
+            "stages": stages,
+            "end_to_end_by_policy": requests,
+            "resilience": dict(hedge_stats),
+        }
+
+
+model_router = ModelRouter()
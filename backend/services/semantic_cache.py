@@ -0,0 +1,160 @@
+"""
+Per-note semantic cache for chat answers.
+Serves a stored answer when a new question is a close paraphrase of one
+already answered for the same note (cosine similarity over the question
+embeddings that /chat computes anyway). Notes can't be edited or deleted
+through the API, so a cached answer never goes stale; entries only leave
+by LRU eviction.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# === CONFIG ===
+CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.92"))
+CHAT_CACHE_MAX_PER_NOTE = int(os.getenv("CHAT_CACHE_MAX_PER_NOTE", "64"))
+CHAT_CACHE_MAX_NOTES = int(os.getenv("CHAT_CACHE_MAX_NOTES", "1000"))
+
+# candidate thresholds reported in the tuning stats
+TUNING_THRESHOLDS = [0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96, 0.98]
+HISTOGRAM_BUCKETS = 20
+
+
+def _normalize(vector) -> Optional[np.ndarray]:
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vec))
+    if norm == 0.0:
+        return None
+    return vec / norm
+
+
+class SemanticCache:
+    """
+    Bounded LRU of (question embedding, answer) pairs per note.
+    Least recently used entries are evicted per note, and least recently
+    used notes are evicted once max_notes is reached.
+    """
+
+    def __init__(self,
+                 threshold: float = CHAT_CACHE_THRESHOLD,
+                 max_per_note: int = CHAT_CACHE_MAX_PER_NOTE,
+                 max_notes: int = CHAT_CACHE_MAX_NOTES):
+        self.threshold = threshold
+        self.max_per_note = max_per_note
+        self.max_notes = max_notes
+        self._notes: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        # best similarity seen per lookup, bucketed, to tune the threshold
+        self._histogram = [0] * HISTOGRAM_BUCKETS
+        self._above = {t: 0 for t in TUNING_THRESHOLDS}
+
+    def lookup(self, note_id: str, question_embedding) -> Optional[Dict[str, Any]]:
+        """
+        Return {"answer", "question", "similarity"} for the closest cached
+        question of this note if it clears the threshold, otherwise None.
+        """
+        query = _normalize(question_embedding)
+        if not note_id or query is None:
+            return None
+
+        with self._lock:
+            self.lookups += 1
+            entries = self._notes.get(note_id)
+            if not entries:
+                return None
+            self._notes.move_to_end(note_id)
+
+            keys = list(entries.keys())
+            matrix = np.vstack([entries[k]["vector"] for k in keys])
+            if matrix.shape[1] != query.shape[0]:
+                return None
+
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            best_score = float(similarities[best])
+            self._record_similarity(best_score)
+
+            if best_score < self.threshold:
+                return None
+
+            self.hits += 1
+            entries.move_to_end(keys[best])
+            return {
+                "answer": entries[keys[best]]["answer"],
+                "question": keys[best],
+                "similarity": best_score,
+            }
+
+    def store(self, note_id: str, question: str, question_embedding, answer: str) -> None:
+        vector = _normalize(question_embedding)
+        if not note_id or vector is None or not answer:
+            return
+
+        with self._lock:
+            entries = self._notes.get(note_id)
+            if entries is None:
+                entries = OrderedDict()
+                self._notes[note_id] = entries
+                if len(self._notes) > self.max_notes:
+                    _, dropped = self._notes.popitem(last=False)
+                    self.evictions += len(dropped)
+            self._notes.move_to_end(note_id)
+
+            entries[question] = {"vector": vector, "answer": answer}
+            entries.move_to_end(question)
+            self.stores += 1
+            while len(entries) > self.max_per_note:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def _record_similarity(self, score: float) -> None:
+        bucket = min(HISTOGRAM_BUCKETS - 1, max(0, int(score * HISTOGRAM_BUCKETS)))
+        self._histogram[bucket] += 1
+        for t in TUNING_THRESHOLDS:
+            if score >= t:
+                self._above[t] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            compared = sum(self._histogram)
+            histogram: List[Dict[str, Any]] = []
+            for i, count in enumerate(self._histogram):
+                if count:
+                    histogram.append({
+                        "range": f"{i / HISTOGRAM_BUCKETS:.2f}-{(i + 1) / HISTOGRAM_BUCKETS:.2f}",
+                        "count": count,
+                    })
+            return {
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "notes": len(self._notes),
+                "entries": sum(len(e) for e in self._notes.values()),
+                # lookups with at least one cached question to compare against
+                "compared": compared,
+                "best_similarity_histogram": histogram,
+                # hit rate the cache would have had at each candidate threshold
+                "threshold_tuning": [
+                    {
+                        "threshold": t,
+                        "would_hit": self._above[t],
+                        "hit_rate": round(self._above[t] / self.lookups, 4) if self.lookups else 0.0,
+                    }
+                    for t in TUNING_THRESHOLDS
+                ],
+            }
+
+
+chat_cache = SemanticCache()
@@ -0,0 +1,299 @@
+"""
+Batch YouTube ingestion: a list of URLs or a playlist summarized as one job.
+
+    per video:  fetch transcript (YouTube cap) -> chunk --+--> shared map workers (LLM)
+                                                          \\--> shared embed batcher
+                map summaries in -> reduce + final -> note writer (insert_many)
+
+Chunks from every video go through one pool of map workers, so the LLM
+stays busy across videos instead of each video ramping up and draining on
+its own. Embedding texts from several videos are embedded together in large
+batches, and finished notes are written in bulk.
+"""
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+from youtube_transcript_api._errors import IpBlocked, NoTranscriptFound
+
+from database.historySchema import NoteModel
+from database.crud import create_notes
+from services.YT_summarizer import chunk_transcript, reduce_chunk_summaries, safe_summarize
+from services.media_summariser.embed import create_chunks, wrap_into_document
+from services.inference_pool import inference_pool
+from services.jobs import JobContext, job_runner
+from utils.timed_transcript import compact_transcript
+from utils.youtube_transcript import aget_transcripts, arun_fetcher, extract_videoID, fetch_video_title
+
+# === CONFIG ===
+YT_BATCH_MAX_VIDEOS = int(os.getenv("YT_BATCH_MAX_VIDEOS", "100"))
+# map-stage LLM calls in flight for the whole batch
+YT_BATCH_LLM_CONCURRENCY = int(os.getenv("YT_BATCH_LLM_CONCURRENCY", "16"))
+YT_BATCH_EMBED_BATCH_SIZE = int(os.getenv("YT_BATCH_EMBED_BATCH_SIZE", "128"))
+YT_BATCH_INSERT_SIZE = int(os.getenv("YT_BATCH_INSERT_SIZE", "25"))
+YT_BATCH_REPORT_INTERVAL = float(os.getenv("YT_BATCH_REPORT_INTERVAL", "2"))
+
+_DONE = object()
+
+
+@asynccontextmanager
+async def _no_stage(name: str, progress: Optional[float] = None):
+    yield
+
+
+@dataclass
+class VideoState:
+    url: str
+    status: str = "queued"   # queued, fetching, summarizing, saving, done, failed
+    title: Optional[str] = None
+    chunks: int = 0
+    summarized: int = 0
+    note_id: Optional[str] = None
+    error: Optional[str] = None
+    saved: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def fraction(self) -> float:
+        if self.status in ("done", "failed"):
+            return 1.0
+        if self.status in ("queued", "fetching"):
+            return 0.0
+        return 0.1 + 0.8 * (self.summarized / self.chunks if self.chunks else 1.0)
+
+    def public(self) -> Dict[str, Any]:
+        return {"url": self.url, "status": self.status, "title": self.title, "chunks": self.chunks,
+                "summarized": self.summarized, "id": self.note_id, "error": self.error}
+
+
+class EmbedBatcher:
+    """Collects embedding texts from many videos and embeds them in large batches."""
+
+    def __init__(self, stage, batch_size: int = YT_BATCH_EMBED_BATCH_SIZE):
+        self.stage = stage
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+
+    async def embed(self, texts: List[str]) -> List[Dict[str, Any]]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def close(self) -> None:
+        await self.queue.put(_DONE)
+
+    async def run(self) -> None:
+        finished = False
+        while not finished:
+            groups = []
+            size = 0
+            item = await self.queue.get()
+            while item is not _DONE:
+                groups.append(item)
+                size += len(item[0])
+                if size >= self.batch_size or self.queue.empty():
+                    break
+                item = self.queue.get_nowait()
+            finished = item is _DONE
+            if groups:
+                await self._embed_groups(groups)
+
+    async def _embed_groups(self, groups) -> None:
+        texts = [t for group, _ in groups for t in group]
+        owners = [i for i, (group, _) in enumerate(groups) for _ in group]
+        results: List[List[Dict[str, Any]]] = [[] for _ in groups]
+        try:
+            records = []
+            for start in range(0, len(texts), self.batch_size):
+                async with self.stage("embed"):
+                    records.extend(await inference_pool.embed(texts[start:start + self.batch_size]))
+                self.batches += 1
+            # embed_texts skips failed texts, so walk both lists to match them up
+            i = 0
+            for record in records:
+                while texts[i] != record["text"]:
+                    i += 1
+                results[owners[i]].append(record)
+                i += 1
+        except Exception as embedding_error:
+            print(f"⚠ Error creating embeddings: {str(embedding_error)}")
+        for (_, future), records in zip(groups, results):
+            if not future.done():
+                future.set_result(records)
+
+
+class NoteWriter:
+    """
+    Buffers finished notes and writes them with insert_many. When some
+    inserts of a batch fail, only those videos fail; the rest are saved.
+    """
+
+    def __init__(self, batch_size: int = YT_BATCH_INSERT_SIZE):
+        self.batch_size = batch_size
+        self.pending: List[tuple] = []
+        self.lock = asyncio.Lock()
+        self.inserts = 0
+
+    async def add(self, state: VideoState, note: NoteModel) -> None:
+        state.saved = asyncio.get_running_loop().create_future()
+        self.pending.append((state, note))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        await state.saved
+
+    async def flush(self) -> None:
+        async with self.lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            note_ids = [ObjectId() for _ in batch]
+            errors: Dict[int, Exception] = {}
+            try:
+                await create_notes([note for _, note in batch], note_ids)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    errors[error["index"]] = RuntimeError(f"Failed to save note: {error.get('errmsg')}")
+            except Exception as e:
+                errors = {i: e for i in range(len(batch))}
+            self.inserts += 1
+            for i, ((state, _), note_id) in enumerate(zip(batch, note_ids)):
+                if i in errors:
+                    state.saved.set_exception(errors[i])
+                else:
+                    state.note_id = str(note_id)
+                    state.saved.set_result(None)
+
+
+async def run_yt_batch(urls: List[str], user_id: str, type: str = "youtube", stage=_no_stage,
+                       progress: Optional[Callable[[float, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Summarize and save every video; one failed video doesn't stop the rest."""
+    started = time.perf_counter()
+    states = [VideoState(url) for url in dict.fromkeys(urls)]
+    # the route checks this too; jobs queued before a lower limit was set stop here
+    if len(states) > YT_BATCH_MAX_VIDEOS:
+        raise ValueError(f"Too many videos: {len(states)} (limit {YT_BATCH_MAX_VIDEOS})")
+    map_queue: asyncio.Queue = asyncio.Queue()
+    embedder = EmbedBatcher(stage)
+    writer = NoteWriter()
+    counters = {"map_calls": 0}
+
+    def snapshot() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        done = sum(1 for s in states if s.status == "done")
+        chunks = sum(s.summarized for s in states)
+        return {
+            "videos": [s.public() for s in states],
+            "done": done,
+            "failed": sum(1 for s in states if s.status == "failed"),
+            "elapsed_seconds": round(elapsed, 1),
+            "videos_per_minute": round(done / elapsed * 60, 2) if elapsed else None,
+            "chunks_per_minute": round(chunks / elapsed * 60, 1) if elapsed else None,
+        }
+
+    async def reporter() -> None:
+        while True:
+            await asyncio.sleep(YT_BATCH_REPORT_INTERVAL)
+            if progress:
+                progress(sum(s.fraction() for s in states) / len(states), snapshot())
+
+    async def map_worker() -> None:
+        while True:
+            item = await map_queue.get()
+            if item is _DONE:
+                return
+            state, chunk, future = item
+            try:
+                future.set_result(await safe_summarize(chunk, "map"))
+            except Exception as e:
+                future.set_result(f"Failed to summarize: {e}")
+            counters["map_calls"] += 1
+            state.summarized += 1
+
+    async def process(state: VideoState) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            state.status = "fetching"
+            transcripts, title = await asyncio.gather(
+                aget_transcripts(state.url), arun_fetcher(fetch_video_title, state.url)
+            )
+            if not transcripts:
+                raise ValueError("Empty transcript")
+            state.title = title or f"YouTube video {extract_videoID(state.url)}"
+
+            state.status = "summarizing"
+            chunks = chunk_transcript(transcripts)
+            state.chunks = len(chunks)
+            futures = []
+            for chunk in chunks:
+                futures.append(loop.create_future())
+                await map_queue.put((state, chunk, futures[-1]))
+            text = " ".join(item["text"] for item in transcripts)
+            embed_texts = [c.page_content for c in create_chunks(wrap_into_document(text)) if c.page_content.strip()]
+            embedding = asyncio.ensure_future(embedder.embed(embed_texts))
+
+            summaries = await asyncio.gather(*futures)
+            summary = await reduce_chunk_summaries(list(summaries)) if summaries else "No content found."
+            embeddings = await embedding
+
+            state.status = "saving"
+            await writer.add(state, NoteModel(
+                user_id=user_id,
+                title=state.title,
+                type=type,
+                summary=summary,
+                **compact_transcript(transcripts, clock=True),
+                source=state.url,
+                embeddings=embeddings or None,
+            ))
+            state.status = "done"
+        except NoTranscriptFound:
+            state.status = "failed"
+            state.error = "Transcript not found for this video."
+        except IpBlocked:
+            state.status = "failed"
+            state.error = "Your IP is blocked by YouTube. Try again later or from a different network."
+        except Exception as e:
+            state.status = "failed"
+            state.error = str(e) or e.__class__.__name__
+
+    workers = [asyncio.create_task(map_worker()) for _ in range(YT_BATCH_LLM_CONCURRENCY)]
+    helpers = [asyncio.create_task(embedder.run()), asyncio.create_task(reporter())]
+    videos = [asyncio.create_task(process(s)) for s in states]
+    try:
+        # notes still buffered once every video is summarized go out in a last insert
+        pending = set(videos)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=0.5)
+            if pending and all(s.status in ("saving", "done", "failed") for s in states):
+                await writer.flush()
+        await writer.flush()
+    finally:
+        for video in videos:
+            video.cancel()
+        for _ in workers:
+            map_queue.put_nowait(_DONE)
+        await embedder.close()
+        await asyncio.gather(*workers, helpers[0], return_exceptions=True)
+        helpers[1].cancel()
+
+    result = snapshot()
+    result.update({"map_calls": counters["map_calls"], "embed_batches": embedder.batches,
+                   "note_inserts": writer.inserts})
+    if progress:
+        progress(1.0, result)
+    print(f"✓ Batch of {len(states)} videos: {result['done']} saved, {result['failed']} failed "
+          f"in {result['elapsed_seconds']}s")
+    return result
+
+
+async def run_yt_batch_job(job: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    payload = job["payload"]
+    return await run_yt_batch(payload["urls"], payload["user_id"], payload.get("type", "youtube"),
+                              stage=ctx.stage, progress=ctx.progress)
+
+
+job_runner.register("yt_batch", run_yt_batch_job)
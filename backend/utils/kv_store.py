@@ -0,0 +1,113 @@
+"""
+Small persistent key/value cache on SQLite.
+Values are JSON, zlib-compressed on disk. The store is bounded by total
+bytes and entry count and evicts least recently used entries first.
+Entries can carry a TTL. Hit/miss counters cover the life of the process.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+# === CONFIG ===
+DATA_DIR = os.getenv("SMARTNOTES_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+
+_MISSING = object()
+
+
+class KVStore:
+    def __init__(self, path: str, max_bytes: int, max_entries: int = 0, ttl: Optional[float] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._counters = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv (accessed_at)")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._counters["expired"] += 1
+                row = None
+            if row is None:
+                self._counters["misses"] += 1
+                return default
+            self._conn.execute("UPDATE kv SET accessed_at = ? WHERE key = ?", (now, key))
+            self._counters["hits"] += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def contains(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, size, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now, now + ttl if ttl else None),
+            )
+            self._counters["sets"] += 1
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def _evict(self, now: float) -> None:
+        expired = self._conn.execute(
+            "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        self._counters["expired"] += expired
+
+        entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv").fetchone()
+        if total <= self.max_bytes and (not self.max_entries or entries <= self.max_entries):
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM kv ORDER BY accessed_at"):
+            if total <= self.max_bytes and (not self.max_entries or entries <= self.max_entries):
+                break
+            victims.append((key,))
+            total -= size
+            entries -= 1
+        self._conn.executemany("DELETE FROM kv WHERE key = ?", victims)
+        self._counters["evictions"] += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv").fetchone()
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries or None,
+        }
@@ -0,0 +1,95 @@
+"""
+Layout-aware removal of repeated PDF boilerplate (running headers and
+footers, page numbers, copyright lines, slide template text).
+
+A block is boilerplate when the same text shows up at roughly the same
+place on many pages. Blocks in the top/bottom margin bands are compared
+with digits masked, so "Page 3 of 40" and "Page 4 of 40" match; blocks
+elsewhere on the page must repeat exactly and on more pages before they
+are dropped, so body text (numbers included) is left alone. Frequencies
+come from an evenly spaced sample of pages, which keeps the cost and
+memory bounded on very long documents.
+"""
+import os
+import re
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+
+import pymupdf
+
+# === CONFIG ===
+PDF_STRIP_BOILERPLATE = os.getenv("PDF_STRIP_BOILERPLATE", "1") == "1"
+# fraction of the page height treated as header / footer band
+BOILERPLATE_MARGIN = float(os.getenv("BOILERPLATE_MARGIN", "0.12"))
+# share of sampled pages a margin block must appear on
+BOILERPLATE_MARGIN_FREQUENCY = float(os.getenv("BOILERPLATE_MARGIN_FREQUENCY", "0.5"))
+# share of sampled pages a block elsewhere on the page must appear on, verbatim
+BOILERPLATE_BODY_FREQUENCY = float(os.getenv("BOILERPLATE_BODY_FREQUENCY", "0.8"))
+# documents shorter than this are left alone; there is nothing to compare
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+BOILERPLATE_SAMPLE_PAGES = int(os.getenv("BOILERPLATE_SAMPLE_PAGES", "200"))
+
+# vertical position is bucketed so small layout jitter still matches
+_Y_BUCKETS = 20
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+Block = Tuple[float, float, float, float, str, int, int]
+
+
+def _text_blocks(page: pymupdf.Page) -> List[Block]:
+    # block type 0 is text, 1 is an image
+    return [b for b in page.get_text("blocks") if b[6] == 0 and b[4].strip()]
+
+
+def block_signature(block: Block, page_height: float) -> str:
+    """Position bucket plus normalized text; digits are masked in the margins."""
+    y0, y1, text = block[1], block[3], _SPACES.sub(" ", block[4]).strip().lower()
+    in_margin = y1 <= page_height * BOILERPLATE_MARGIN or y0 >= page_height * (1 - BOILERPLATE_MARGIN)
+    bucket = min(int(y0 / page_height * _Y_BUCKETS), _Y_BUCKETS - 1)
+    if in_margin:
+        return f"m{bucket}:{_DIGITS.sub('#', text)}"
+    return f"b{bucket}:{text}"
+
+
+def sample_pages(page_count: int, limit: int = BOILERPLATE_SAMPLE_PAGES) -> Iterable[int]:
+    if page_count <= limit:
+        return range(page_count)
+    step = page_count / limit
+    return sorted({int(i * step) for i in range(limit)})
+
+
+def find_boilerplate(doc: pymupdf.Document) -> Set[str]:
+    """Signatures of blocks that repeat across enough of the document to be boilerplate."""
+    if not PDF_STRIP_BOILERPLATE or doc.page_count < BOILERPLATE_MIN_PAGES:
+        return set()
+    pages = list(sample_pages(doc.page_count))
+    seen: Counter = Counter()
+    per_page = []
+    for i in pages:
+        page = doc[i]
+        # count each signature once per page
+        signatures = {block_signature(b, page.rect.height) for b in _text_blocks(page)}
+        per_page.append(signatures)
+        seen.update(signatures)
+
+    boilerplate = set()
+    for signature, count in seen.items():
+        share = count / len(pages)
+        threshold = BOILERPLATE_MARGIN_FREQUENCY if signature[0] == "m" else BOILERPLATE_BODY_FREQUENCY
+        if count >= BOILERPLATE_MIN_PAGES and share >= threshold:
+            boilerplate.add(signature)
+
+    # if stripping would empty most pages, the repeated text is the content
+    emptied = sum(1 for signatures in per_page if signatures and signatures <= boilerplate)
+    if emptied > len(pages) / 2:
+        return set()
+    return boilerplate
+
+
+def page_text(page: pymupdf.Page, boilerplate: Set[str]) -> str:
+    """The page's text without boilerplate blocks; plain get_text when there is none."""
+    if not boilerplate:
+        return page.get_text("text")
+    height = page.rect.height
+    return "".join(b[4] for b in _text_blocks(page) if block_signature(b, height) not in boilerplate)
@@ -1,18 +1,140 @@
-import fitz
-def extract_text_from_pdf_optimised(file_path : str) -> str:
-    doc=fitz.open(file_path)
-    text=""
-    for page in doc:
-        pagetext = page.get_text("text")
-        text += str(pagetext)
-    doc.close()
-    return text
-    
-    
+"""
+PDF text extraction on PyMuPDF.
+
+Pages come back as LangChain Documents (one per page, metadata: source,
+page, total_pages), the same records PyPDFLoader produced, so the
+summarizer and embedder are unchanged. A PDF can be opened from the
+uploaded bytes (no temp file) or from a path; large documents are split
+into page ranges that the inference pool extracts in parallel.
+stream_pdf_pages yields one page at a time instead, for ingestion whose
+memory should not grow with the document. Repeated headers, footers and
+template text are dropped (utils.pdf_boilerplate) unless
+PDF_STRIP_BOILERPLATE=0.
+"""
+import os
+import asyncio
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pymupdf
+from langchain_core.documents import Document
+
+from utils.pdf_boilerplate import find_boilerplate, page_text
+
+# === CONFIG ===
+# documents with fewer pages are extracted in one task
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+# upper bound on pages per task, so one huge PDF doesn't hog a worker
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "500"))
+
+PdfSource = Union[bytes, str]
+
+
+def open_pdf(source: PdfSource) -> pymupdf.Document:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pymupdf.open(stream=source, filetype="pdf")
+    return pymupdf.open(source)
+
+
+def page_record(text: str, page: int, total_pages: int, filename: str) -> Document:
+    return Document(page_content=text, metadata={"source": filename, "page": page, "total_pages": total_pages})
+
+
+def extract_page_range(source, start: int, end: int, filename: str = "") -> List[Document]:
+    """Pages [start, end) as records. `source` may also be a SharedArray of the file bytes."""
+    if not isinstance(source, (bytes, bytearray, memoryview, str)):
+        source = source.read().tobytes()
+    with open_pdf(source) as doc:
+        total = doc.page_count
+        boilerplate = find_boilerplate(doc)
+        return [page_record(page_text(doc[i], boilerplate), i, total, filename)
+                for i in range(start, min(end, total))]
+
+
+def iter_page_texts(source) -> Iterator[Dict[str, Any]]:
+    """Yield {"page", "text"} per page; only the current page is held in memory."""
+    if not isinstance(source, (bytes, bytearray, memoryview, str)):
+        source = source.read().tobytes()
+    with open_pdf(source) as doc:
+        boilerplate = find_boilerplate(doc)
+        for i in range(doc.page_count):
+            yield {"page": i, "text": page_text(doc[i], boilerplate)}
+
+
+def page_ranges(page_count: int, workers: int) -> List[tuple]:
+    if page_count < PDF_PARALLEL_MIN_PAGES or workers <= 1:
+        return [(0, page_count)]
+    size = min(PDF_PAGES_PER_TASK, -(-page_count // workers))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def count_pages(source: PdfSource) -> int:
+    with open_pdf(source) as doc:
+        return doc.page_count
+
+
+def extract_pages(source: PdfSource, filename: str = "", executor=None, workers: int = 1) -> List[Document]:
+    """Synchronous extraction; pass a process executor to fan large documents out."""
+    if executor is None:
+        return extract_page_range(source, 0, count_pages(source), filename)
+    futures = [executor.submit(extract_page_range, source, start, end, filename)
+               for start, end in page_ranges(count_pages(source), workers)]
+    return [record for future in futures for record in future.result()]
+
+
+async def load_pdf(source: PdfSource, filename: str = "") -> List[Document]:
+    """Extract every page in the inference pool, in parallel for large documents."""
+    from services.inference_pool import SharedArray, inference_pool
+
+    filename = filename or (source if isinstance(source, str) else "")
+    page_count = await asyncio.to_thread(count_pages, source)
+    workers = inference_pool.workers if inference_pool.enabled else 1
+    ranges = page_ranges(page_count, workers)
+
+    shared: Optional[SharedArray] = None
+    task_source = source
+    if inference_pool.enabled and not isinstance(source, str):
+        # one copy into shared memory instead of pickling the whole file per task
+        shared = SharedArray.publish(np.frombuffer(source, dtype=np.uint8))
+        task_source = shared
+    try:
+        parts = await asyncio.gather(*(
+            inference_pool.run("pdf", extract_page_range, task_source, start, end, filename)
+            for start, end in ranges
+        ))
+    finally:
+        if shared is not None:
+            shared.release()
+    return [record for part in parts for record in part]
+
+
+def stream_pdf_pages(source: PdfSource) -> Iterator[Dict[str, Any]]:
+    """Blocking generator of pages extracted in an inference pool worker, in order."""
+    from services.inference_pool import SharedArray, inference_pool
+
+    shared: Optional[SharedArray] = None
+    task_source = source
+    if inference_pool.enabled and not isinstance(source, str):
+        shared = SharedArray.publish(np.frombuffer(source, dtype=np.uint8))
+        task_source = shared
+    try:
+        yield from inference_pool.iterate("pdf", iter_page_texts, task_source)
+    finally:
+        if shared is not None:
+            shared.release()
+
+
+def extract_text_from_pdf_optimised(file_path: str) -> str:
+    with open_pdf(file_path) as doc:
+        return "".join(page.get_text("text") for page in doc)
+
+
 def extract_text_from_large_pdf(file_path: str) -> str:
-    texts = []
-    doc= fitz.open(file_path)
-    for page in doc:
-        texts.append(page.get_text("text"))
-        
-    return "\n".join(texts)
\ No newline at end of file
+    with open_pdf(file_path) as doc:
+        return "\n".join(page.get_text("text") for page in doc)
+
+
+def load_pdf_documents(file_path: str):
+    """PyPDFLoader pages as LangChain Documents; kept for comparison in benchmarks."""
+    from langchain_community.document_loaders import PyPDFLoader
+    return PyPDFLoader(file_path).load()
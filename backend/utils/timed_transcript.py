@@ -0,0 +1,209 @@
+"""
+Numeric, time-indexed transcript.
+
+Start and end times live in two float arrays, and every segment's text is a
+slice of one shared string (offsets array), so:
+    - the segment playing at time t is a binary search (segment_at)
+    - the text of a time range is a single string slice (text_between)
+    - a range becomes its own TimedTranscript without copying per segment
+Builds from Whisper segments ("12.00s -> 15.00s"), YouTube chunks ("M:SS")
+or raw YouTube lines (start, duration), and serializes to a compact dict
+(packed millisecond arrays, base64) for the note. to_segments() gives back
+the {time, text} list the API and frontend use.
+"""
+import re
+import sys
+import base64
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FORMAT_VERSION = 1
+_SEPARATOR = " "
+_RANGE = re.compile(r"^\s*([\d.:]+)s?\s*->\s*([\d.:]+)s?\s*$")
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds from "12.00s", "12.5", "M:SS" or "H:MM:SS"."""
+    value = value.strip().rstrip("s")
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_time(value: str) -> Tuple[float, Optional[float]]:
+    """(start, end) from a segment's "time"; end is None for a bare timestamp."""
+    match = _RANGE.match(value)
+    if match:
+        return parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+    return parse_timestamp(value), None
+
+
+def format_clock(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    return f"{minutes}:{int(seconds % 60):02d}"
+
+
+def _pack(values: Iterable[int]) -> str:
+    packed = array("I", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def _unpack(data: str) -> array:
+    packed = array("I")
+    packed.frombytes(base64.b64decode(data))
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed
+
+
+class TimedTranscript:
+    __slots__ = ("starts", "ends", "offsets", "text")
+
+    def __init__(self, starts: array, ends: array, offsets: array, text: str):
+        self.starts = starts    # seconds, ascending
+        self.ends = ends        # seconds
+        self.offsets = offsets  # len(starts) + 1 positions into text
+        self.text = text
+
+    # ---- building ----
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[float, Optional[float], str]]) -> "TimedTranscript":
+        """From (start, end, text) in time order; a missing end is the next start."""
+        starts, ends, offsets = array("d"), array("d"), array("L", [0])
+        parts: List[str] = []
+        position = 0
+        for start, end, text in items:
+            if ends and ends[-1] < 0:
+                ends[-1] = max(start, starts[-1])
+            starts.append(start)
+            ends.append(end if end is not None else -1.0)
+            parts.append(text)
+            position += len(text) + len(_SEPARATOR)
+            offsets.append(position)
+        if ends and ends[-1] < 0:
+            ends[-1] = starts[-1]
+        return cls(starts, ends, offsets, _SEPARATOR.join(parts) + (_SEPARATOR if parts else ""))
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "TimedTranscript":
+        """From the {time, text} lists stored on notes and returned by the API."""
+        return cls.build((*parse_time(s["time"]), s["text"]) for s in segments)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[Any]) -> "TimedTranscript":
+        """From youtube_transcript_api snippets (start, duration, text)."""
+        return cls.build((line.start, line.start + getattr(line, "duration", 0.0), line.text) for line in lines)
+
+    # ---- lookup ----
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1] - len(_SEPARATOR)]
+
+    def text_range(self, first: int, stop: int) -> str:
+        """Text of segments [first, stop) as one slice of the shared buffer."""
+        if first >= stop:
+            return ""
+        return self.text[self.offsets[first]:self.offsets[stop] - len(_SEPARATOR)]
+
+    def segment(self, i: int) -> Dict[str, Any]:
+        return {"start": self.starts[i], "end": self.ends[i], "text": self.segment_text(i)}
+
+    def index_at(self, t: float) -> Optional[int]:
+        """Index of the last segment starting at or before t, or None before the first."""
+        i = bisect_right(self.starts, t) - 1
+        return i if i >= 0 else None
+
+    def segment_at(self, t: float) -> Optional[Dict[str, Any]]:
+        i = self.index_at(t)
+        return None if i is None else self.segment(i)
+
+    def range_indices(self, start: float, end: float) -> Tuple[int, int]:
+        """[first, stop) of the segments overlapping [start, end)."""
+        first = bisect_right(self.ends, start)
+        stop = bisect_left(self.starts, end, lo=first)
+        return first, stop
+
+    def text_between(self, start: float, end: float) -> str:
+        return self.text_range(*self.range_indices(start, end))
+
+    def slice(self, start: float, end: float) -> "TimedTranscript":
+        first, stop = self.range_indices(start, end)
+        base = self.offsets[first]
+        return TimedTranscript(
+            self.starts[first:stop],
+            self.ends[first:stop],
+            array("L", (o - base for o in self.offsets[first:stop + 1])),
+            self.text[base:self.offsets[stop]],
+        )
+
+    # ---- conversion ----
+
+    def to_segments(self, clock: bool = False) -> List[Dict[str, Any]]:
+        """The {time, text} list: "M:SS" with clock=True, else "12.00s -> 15.00s"."""
+        if clock:
+            return [{"time": format_clock(self.starts[i]), "text": self.segment_text(i)} for i in range(len(self))]
+        return [{"time": f"{self.starts[i]:.2f}s -> {self.ends[i]:.2f}s", "text": self.segment_text(i)}
+                for i in range(len(self))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form for storage: millisecond arrays and segment lengths, packed."""
+        return {
+            "v": FORMAT_VERSION,
+            "text": self.text,
+            "starts_ms": _pack(round(s * 1000) for s in self.starts),
+            "durations_ms": _pack(max(0, round((e - s) * 1000)) for s, e in zip(self.starts, self.ends)),
+            "lengths": _pack(self.offsets[i + 1] - self.offsets[i] for i in range(len(self))),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TimedTranscript":
+        if data.get("v") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported timed transcript version: {data.get('v')}")
+        starts = array("d", (ms / 1000 for ms in _unpack(data["starts_ms"])))
+        ends = array("d", (s + ms / 1000 for s, ms in zip(starts, _unpack(data["durations_ms"]))))
+        offsets = array("L", [0])
+        for length in _unpack(data["lengths"]):
+            offsets.append(offsets[-1] + length)
+        return cls(starts, ends, offsets, data["text"])
+
+
+def compact_transcript(segments: List[Dict[str, Any]], clock: bool = False) -> Dict[str, Any]:
+    """
+    Note fields for a {time, text} list: the packed timed form when it
+    converts back to exactly the same list, otherwise the list as is.
+    """
+    try:
+        timed = TimedTranscript.from_segments(segments)
+    except (KeyError, TypeError, ValueError):
+        return {"transcript": segments}
+    if timed.to_segments(clock=clock) != segments:
+        return {"transcript": segments}
+    return {"timed_transcript": {**timed.to_dict(), "clock": clock}}
+
+
+def load_timed_transcript(note: Dict[str, Any]) -> Optional[TimedTranscript]:
+    """The note's transcript as a TimedTranscript; older notes only have the list."""
+    if note.get("timed_transcript"):
+        return TimedTranscript.from_dict(note["timed_transcript"])
+    if note.get("transcript"):
+        try:
+            return TimedTranscript.from_segments(note["transcript"])
+        except (KeyError, TypeError, ValueError):
+            return None
+    return None
+
+
+def transcript_segments(note: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """The {time, text} list of a note, whichever form it was stored in."""
+    timed = note.get("timed_transcript")
+    if timed:
+        return TimedTranscript.from_dict(timed).to_segments(clock=timed.get("clock", False))
+    return note.get("transcript")
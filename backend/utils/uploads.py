@@ -0,0 +1,90 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+MB = 1024 * 1024
+UPLOAD_CHUNK_SIZE = MB
+MAX_MEDIA_UPLOAD_BYTES = int(os.getenv("MAX_MEDIA_UPLOAD_MB", "2048")) * MB
+MAX_PDF_UPLOAD_BYTES = int(os.getenv("MAX_PDF_UPLOAD_MB", "200")) * MB
+# PDFs up to this size are parsed straight from memory; larger ones go through disk
+PDF_IN_MEMORY_MAX_BYTES = int(os.getenv("PDF_IN_MEMORY_MAX_MB", "64")) * MB
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class BufferedUpload:
+    data: bytes
+    size: int
+    sha256: str
+
+
+def check_upload_size(size: Optional[int], max_bytes: int) -> None:
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(f"File is too large: {size // MB} MB (limit {max_bytes // MB} MB)")
+
+
+async def save_upload_to_disk(upload: UploadFile, suffix: str, max_bytes: int,
+                              chunk_size: int = UPLOAD_CHUNK_SIZE) -> SavedUpload:
+    """
+    Stream an upload into a named temp file in fixed-size chunks, hashing it
+    on the way, so memory use does not grow with the file size.
+    The caller owns (and must remove) the returned path.
+    """
+    check_upload_size(upload.size, max_bytes)
+
+    digest = hashlib.sha256()
+    size = 0
+    temp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+
+    def write_chunk(chunk: bytes) -> None:
+        temp.write(chunk)
+        digest.update(chunk)
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            # the declared size can be missing or wrong, so enforce while streaming too
+            check_upload_size(size, max_bytes)
+            await asyncio.to_thread(write_chunk, chunk)
+        temp.close()
+    except BaseException:
+        temp.close()
+        os.remove(temp.name)
+        raise
+
+    return SavedUpload(path=temp.name, size=size, sha256=digest.hexdigest())
+
+
+async def read_upload_to_memory(upload: UploadFile, max_bytes: int,
+                                chunk_size: int = UPLOAD_CHUNK_SIZE) -> BufferedUpload:
+    """Read a (small) upload into one bytes buffer, enforcing the cap while reading."""
+    check_upload_size(upload.size, max_bytes)
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        check_upload_size(len(buffer), max_bytes)
+        digest.update(chunk)
+    return BufferedUpload(data=bytes(buffer), size=len(buffer), sha256=digest.hexdigest())
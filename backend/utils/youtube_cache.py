@@ -0,0 +1,116 @@
+"""
+Persistent cache of YouTube transcripts keyed by (video ID, languages),
+shared by /transcript/ and /summarize-yt so a video is fetched from YouTube
+once per TTL rather than once per user and per endpoint. "No transcript"
+answers are cached too, for a shorter time. Concurrent requests for the
+same video wait for one upstream fetch instead of each making their own.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, List, Sequence
+
+from youtube_transcript_api import NoTranscriptFound
+
+from utils.kv_store import DATA_DIR, KVStore
+
+# === CONFIG ===
+YT_TRANSCRIPT_CACHE_ENABLED = os.getenv("YT_TRANSCRIPT_CACHE", "1") == "1"
+YT_TRANSCRIPT_CACHE_PATH = os.getenv("YT_TRANSCRIPT_CACHE_PATH", os.path.join(DATA_DIR, "youtube_transcripts.sqlite3"))
+YT_TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("YT_TRANSCRIPT_CACHE_MAX_MB", "256"))
+YT_TRANSCRIPT_TTL_HOURS = float(os.getenv("YT_TRANSCRIPT_TTL_HOURS", "168"))
+# captions can be added after upload, so a miss is remembered for less time
+YT_TRANSCRIPT_NEGATIVE_TTL_HOURS = float(os.getenv("YT_TRANSCRIPT_NEGATIVE_TTL_HOURS", "6"))
+
+# bump when the cached transcript format changes
+_KEY_VERSION = "v1"
+
+youtube_cache = KVStore(
+    YT_TRANSCRIPT_CACHE_PATH,
+    max_bytes=YT_TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024,
+    ttl=YT_TRANSCRIPT_TTL_HOURS * 3600,
+)
+
+_counters = {"hits": 0, "negative_hits": 0, "coalesced": 0, "upstream_fetches": 0,
+             "upstream_not_found": 0, "upstream_errors": 0}
+_counters_lock = threading.Lock()
+_inflight: Dict[str, threading.Lock] = {}
+_inflight_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def youtube_cache_key(video_id: str, languages: Sequence[str]) -> str:
+    return f"{_KEY_VERSION}:{video_id}:{','.join(languages)}"
+
+
+def _lookup(key: str, video_id: str, languages: Sequence[str]):
+    entry = youtube_cache.get(key)
+    if entry is None:
+        return None
+    if entry.get("not_found"):
+        _count("negative_hits")
+        raise NoTranscriptFound(video_id, languages, "(cached: no transcript in these languages)")
+    _count("hits")
+    return entry["transcript"]
+
+
+def cached_transcript(video_id: str, languages: Sequence[str],
+                      fetch: Callable[[str, Sequence[str]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Return the cached transcript for the video, or call `fetch(video_id,
+    languages)` and cache what it returns. NoTranscriptFound is cached and
+    re-raised; other errors (IpBlocked, network) are not cached.
+    """
+    if not YT_TRANSCRIPT_CACHE_ENABLED:
+        _count("upstream_fetches")
+        return fetch(video_id, languages)
+
+    key = youtube_cache_key(video_id, languages)
+    transcript = _lookup(key, video_id, languages)
+    if transcript is not None:
+        return transcript
+
+    with _inflight_lock:
+        lock = _inflight.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            # another request may have fetched it while we waited
+            entry = youtube_cache.get(key)
+            if entry is not None:
+                _count("coalesced")
+                if entry.get("not_found"):
+                    raise NoTranscriptFound(video_id, languages, "(cached: no transcript in these languages)")
+                return entry["transcript"]
+            try:
+                _count("upstream_fetches")
+                transcript = fetch(video_id, languages)
+            except NoTranscriptFound:
+                _count("upstream_not_found")
+                youtube_cache.set(key, {"not_found": True}, ttl=YT_TRANSCRIPT_NEGATIVE_TTL_HOURS * 3600)
+                raise
+            except Exception:
+                _count("upstream_errors")
+                raise
+            if transcript:
+                youtube_cache.set(key, {"transcript": transcript})
+            return transcript
+    finally:
+        with _inflight_lock:
+            if _inflight.get(key) is lock:
+                _inflight.pop(key)
+
+
+def youtube_cache_stats() -> Dict[str, Any]:
+    with _counters_lock:
+        counters = dict(_counters)
+    avoided = counters["hits"] + counters["negative_hits"] + counters["coalesced"]
+    requests = avoided + counters["upstream_fetches"]
+    return {
+        **counters,
+        "fetches_avoided": avoided,
+        "avoided_rate": round(avoided / requests, 4) if requests else None,
+        "store": youtube_cache.stats(),
+    }
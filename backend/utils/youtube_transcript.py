@@ -1,26 +1,53 @@
-from youtube_transcript_api import YouTubeTranscriptApi,NoTranscriptFound
+import os
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from youtube_transcript_api import YouTubeTranscriptApi
 from urllib.parse import urlparse, parse_qs
 
+from utils.youtube_cache import cached_transcript
+
 CHUNK_DURATION = 120
+# tried in order; the first language with a transcript wins
+TRANSCRIPT_LANGUAGES = ("en", "hi")
+# max transcript requests to YouTube in flight at once, across all routes;
+# bursts beyond this queue here instead of tripping YouTube's IP blocking
+YT_FETCH_CONCURRENCY = int(os.getenv("YT_FETCH_CONCURRENCY", "4"))
+YT_HTTP_POOL_SIZE = int(os.getenv("YT_HTTP_POOL_SIZE", "8"))
+
+_upstream_slots = threading.BoundedSemaphore(YT_FETCH_CONCURRENCY)
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list={}"
+OEMBED_URL = "https://www.youtube.com/oembed"
+_PLAYLIST_VIDEO = re.compile(r'"playlistVideoRenderer":\{"videoId":"([\w-]{11})"')
+# async callers get their own threads, so fetches queued behind the cap
+# don't tie up the default executor used for database writes and the like
+_fetch_executor = ThreadPoolExecutor(max_workers=YT_HTTP_POOL_SIZE, thread_name_prefix="yt-fetch")
 
 def merge_lines_into_chunks(lines, chunk_duration=CHUNK_DURATION):
     chunks = []
-    current_chunk = {"start": lines[0].start, "text": ""}
+    chunk_start = lines[0].start if lines else 0
+    parts = []  # joined once per chunk instead of growing a string line by line
     current_duration = 0
 
     for line in lines:
-        if current_duration + line.start - current_chunk["start"] >= chunk_duration:
-            chunks.append(current_chunk)
-            current_chunk = {"start": line.start, "text": line.text}
+        if current_duration + line.start - chunk_start >= chunk_duration:
+            chunks.append({"start": chunk_start, "text": " ".join(parts)})
+            chunk_start = line.start
+            parts = [line.text]
             current_duration = 0
         else:
-            if current_chunk["text"]:
-                current_chunk["text"] += " "  # separate lines with space
-            current_chunk["text"] += line.text
-            current_duration = line.start - current_chunk["start"]
+            parts.append(line.text)
+            current_duration = line.start - chunk_start
 
-    if current_chunk["text"]:
-        chunks.append(current_chunk)
+    text = " ".join(parts)
+    if text:
+        chunks.append({"start": chunk_start, "text": text})
     return chunks
 
 def format_time(seconds: float) -> str:
@@ -54,16 +81,32 @@ def extract_videoID(url: str) -> str:
     else:
         raise ValueError("Unsupported URL format")
 
-def get_transcripts(url: str):
-    "0""Return transcripts as a list of {time, text} dictionaries."""
-    video_id = extract_videoID(url)
-    api=YouTubeTranscriptApi()
-    try:
-        transcript_list = api.fetch(video_id, languages=['en'])
-    except NoTranscriptFound:
-        transcript_list = api.fetch(video_id, languages=['hi'])
+@lru_cache(maxsize=1)
+def get_http_session() -> requests.Session:
+    """Pooled keep-alive HTTP session shared by every request to YouTube."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=YT_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@lru_cache(maxsize=1)
+def get_transcript_api() -> YouTubeTranscriptApi:
+    """One API client for the process, on the shared session."""
+    return YouTubeTranscriptApi(http_client=get_http_session())
+
+def fetch_transcripts(video_id: str, languages=TRANSCRIPT_LANGUAGES):
+    """
+    Fetch from YouTube as {time, text} chunks. The video's transcripts are
+    listed once and the first available language (manual before generated)
+    is fetched, instead of one round trip per language tried.
+    """
+    with _upstream_slots:
+        transcript_list = get_transcript_api().list(video_id)
+        transcript = transcript_list.find_transcript(languages)
+        fetched = transcript.fetch()
 
-    chunks = merge_lines_into_chunks(transcript_list)
+    chunks = merge_lines_into_chunks(fetched)
 
     formatted_transcripts =[]
     for chunk in chunks:
@@ -74,3 +117,46 @@ def get_transcripts(url: str):
             }) 
     return formatted_transcripts
 
+def get_transcripts(url: str, languages=TRANSCRIPT_LANGUAGES):
+    """Return transcripts as a list of {time, text} dictionaries, from the cache when possible."""
+    video_id = extract_videoID(url)
+    return cached_transcript(video_id, languages, fetch_transcripts)
+
+def extract_playlistID(url: str) -> str:
+    return parse_qs(urlparse(url).query).get("list", [""])[0]
+
+def expand_playlist(url: str) -> list:
+    """
+    Watch URLs of a playlist's videos, read from the playlist page. Only the
+    first page is parsed (about 100 videos); pass longer courses as URLs.
+    """
+    playlist_id = extract_playlistID(url)
+    if not playlist_id:
+        raise ValueError("Unsupported playlist URL")
+    with _upstream_slots:
+        response = get_http_session().get(PLAYLIST_URL.format(playlist_id),
+                                          headers={"Accept-Language": "en-US"}, timeout=15)
+    response.raise_for_status()
+    video_ids = list(dict.fromkeys(_PLAYLIST_VIDEO.findall(response.text)))
+    if not video_ids:
+        raise ValueError("No videos found in the playlist")
+    return [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+
+def fetch_video_title(url: str):
+    """Video title from YouTube's oEmbed endpoint, or None."""
+    try:
+        with _upstream_slots:
+            response = get_http_session().get(OEMBED_URL, params={"url": url, "format": "json"}, timeout=10)
+        response.raise_for_status()
+        return response.json().get("title")
+    except Exception:
+        return None
+
+async def arun_fetcher(function, *args):
+    """Run a blocking YouTube helper on the fetch threads, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_fetch_executor, function, *args)
+
+async def aget_transcripts(url: str, languages=TRANSCRIPT_LANGUAGES):
+    """get_transcripts for async routes."""
+    return await arun_fetcher(get_transcripts, url, languages)
@@ -9,53 +9,80 @@ export default function History() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [selectedNote, setSelectedNote] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const formatDate = (createdAt) =>
+    createdAt
+      ? new Date(createdAt).toLocaleDateString("en-US", {
+          year: "numeric",
+          month: "short",
+          day: "numeric",
+        })
+      : "Unknown date";
+
+  // One page of titles and summary previews; the full note is fetched on click
+  const fetchNotes = async (cursor = null) => {
+    const user = auth.currentUser;
+    if (!user) throw new Error("User not logged in");
+
+    const params = new URLSearchParams({ user_id: user.uid });
+    if (cursor) params.set("cursor", cursor);
+    const response = await fetch(`http://localhost:8000/notes/?${params}`);
+    if (!response.ok) throw new Error("Failed to fetch notes");
+
+    const data = await response.json();
+    if (data.error) throw new Error(data.error);
+
+    const page = Array.isArray(data.notes) ? data.notes : [];
+    setNotes((prev) => [
+      ...(cursor ? prev : []),
+      ...page.map((note) => ({ ...note, date: formatDate(note.created_at) })),
+    ]);
+    setNextCursor(data.next_cursor || null);
+  };
 
   useEffect(() => {
-    const fetchNotes = async () => {
-      try {
-        const user = auth.currentUser;
-        if (!user) throw new Error("User not logged in");
-
-        const userId = user.uid;
-        const response = await fetch(
-          `http://localhost:8000/notes/?user_id=${userId}`
-        );
-        if (!response.ok) throw new Error("Failed to fetch notes");
-
-        const data = await response.json();
-        if (data.error) throw new Error(data.error);
-        if (!Array.isArray(data)) {
-          setNotes([]);
-          return;
-        }
-
-        const formattedNotes = data.map((note) => ({
-          ...note,
-          date: note.created_at
-            ? new Date(note.created_at).toLocaleDateString("en-US", {
-                year: "numeric",
-                month: "short",
-                day: "numeric",
-              })
-            : "Unknown date",
-        }));
-
-        setNotes(formattedNotes);
-      } catch (err) {
+    fetchNotes()
+      .catch((err) => {
         setError(err.message);
         setNotes([]);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchNotes();
+      })
+      .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await fetchNotes(nextCursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const openNote = async (note) => {
+    setSelectedNote({ ...note, summary: note.preview });
+    try {
+      const user = auth.currentUser;
+      const response = await fetch(
+        `http://localhost:8000/notes/${note.id}?user_id=${user.uid}`
+      );
+      if (!response.ok) throw new Error("Failed to fetch note");
+      const data = await response.json();
+      setSelectedNote((current) =>
+        current && current.id === note.id ? { ...current, ...data } : current
+      );
+    } catch (err) {
+      console.error("Error fetching note:", err);
+    }
+  };
+
   const filteredNotes = notes.filter(
     (note) =>
-      note.title.toLowerCase().includes(search.toLowerCase()) ||
-      note.summary.toLowerCase().includes(search.toLowerCase())
+      (note.title || "").toLowerCase().includes(search.toLowerCase()) ||
+      (note.preview || "").toLowerCase().includes(search.toLowerCase())
   );
 
   // Format summary function
@@ -131,7 +158,7 @@ export default function History() {
             filteredNotes.map((note) => (
               <div
                 key={note.id}
-                onClick={() => setSelectedNote(note)}
+                onClick={() => openNote(note)}
                 className="p-3 sm:p-4 border-0 rounded-xl hover:bg-gray-700 cursor-pointer transition"
               >
                 <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center mb-2 gap-2">
@@ -143,7 +170,7 @@ export default function History() {
                   </span>
                 </div>
                 <p className="text-sm sm:text-base text-gray-300 line-clamp-2">
-                  {note.summary}
+                  {note.preview}
                 </p>
               </div>
             ))
@@ -152,6 +179,15 @@ export default function History() {
               No notes found.
             </p>
           )}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm sm:text-base text-gray-300 hover:text-white disabled:text-gray-500"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          )}
         </div>
       )}
 